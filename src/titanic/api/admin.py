@@ -0,0 +1,41 @@
+"""Routes d'administration : profils CPU et mémoire du worker, téléchargés en fichiers.
+
+Montées par create_app seulement si PROFILING_ENABLED=true, et réservées au scope api:admin.
+"""
+
+from collections.abc import Callable
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response
+
+from titanic import profiling
+from titanic.api.auth import verify_token
+
+router = APIRouter(prefix="/admin")
+
+
+def _capture(kind: str, extension: str, run: Callable[..., str], *args: float) -> Response:
+    try:
+        content = run(*args)
+    except profiling.ProfilingBusyError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+    return Response(content, media_type="text/plain", headers=profiling.attachment(kind, extension))
+
+
+@router.get("/profile/cpu")
+def profile_cpu(
+    seconds: float = Query(10.0, gt=0, le=profiling.MAX_SECONDS),
+    interval: float = Query(profiling.SAMPLE_INTERVAL, gt=0, le=1),
+    token: str = Depends(verify_token("api:admin")),
+) -> Response:
+    """Profil échantillonné des threads du worker, au format folded (flame graph)."""
+    return _capture("cpu", "folded", profiling.cpu_profile, seconds, interval)
+
+
+@router.get("/profile/memory")
+def profile_memory(
+    seconds: float = Query(10.0, gt=0, le=profiling.MAX_SECONDS),
+    token: str = Depends(verify_token("api:admin")),
+) -> Response:
+    """Allocations tracemalloc du worker pendant la capture, par site d'allocation."""
+    return _capture("memory", "txt", profiling.allocation_profile, seconds)
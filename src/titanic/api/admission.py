@@ -0,0 +1,118 @@
+"""Contrôle d'admission des requêtes d'inférence : concurrence bornée, file d'attente bornée, délestage rapide.
+
+Au plus ADMISSION_MAX_CONCURRENCY requêtes d'inférence s'exécutent à la fois dans le worker ; au-delà,
+ADMISSION_MAX_QUEUE requêtes attendent une place, au plus ADMISSION_QUEUE_TIMEOUT secondes. Une requête
+qui ne trouve pas de place dans la file, qui attend trop longtemps, ou dont l'échéance du client
+(header X-Request-Deadline, en secondes epoch) est dépassée reçoit aussitôt un 503 avec Retry-After :
+la latence des requêtes admises reste bornée et le service se dégrade de façon prévisible.
+
+Toutes les routes sous /infer sont limitées, flux compris (/infer/stream, /infer/arrow : ils gardent leur
+place jusqu'à la fin de la réponse). Les sondes, /metrics et les routes d'administration ne le sont
+jamais. ADMISSION_MAX_CONCURRENCY=0 désactive le contrôle.
+"""
+
+import asyncio
+import contextlib
+import math
+import os
+import time
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from titanic.api.metrics import QUEUE_SECONDS, SHED_REQUESTS
+
+ADMITTED_PREFIX = "/infer"
+
+DEADLINE_HEADER = b"x-request-deadline"
+
+
+def _admitted(path: str) -> bool:
+    """Vrai pour /infer et toutes les routes en dessous (GET, batch, flux)."""
+    return path == ADMITTED_PREFIX or path.startswith(f"{ADMITTED_PREFIX}/")
+
+
+def _deadline(scope: dict) -> float | None:
+    """Échéance du client (epoch en secondes), ou None si absente ou illisible."""
+    for key, value in scope["headers"]:
+        if key == DEADLINE_HEADER:
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI : sémaphore à file d'attente FIFO bornée, par worker (une boucle asyncio)."""
+
+    def __init__(self, app: object) -> None:
+        self.app = app
+        self.max_concurrency = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "4"))
+        self.max_queue = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+        self.queue_timeout = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "1.0"))
+        self.retry_after = str(max(1, math.ceil(self.queue_timeout)))
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def __call__(self, scope: dict, receive: object, send: object) -> None:
+        if scope["type"] != "http" or self.max_concurrency <= 0 or not _admitted(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        reason = await self._acquire(_deadline(scope))
+        if reason is not None:
+            SHED_REQUESTS.inc(reason=reason)
+            detail = "Request deadline exceeded" if reason == "deadline" else "Server overloaded, retry later"
+            response = JSONResponse({"detail": detail}, status_code=503, headers={"Retry-After": self.retry_after})
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _acquire(self, deadline: float | None) -> str | None:
+        """Prend une place ; retourne la raison du refus sinon (deadline, queue_full, queue_timeout)."""
+        if deadline is not None and deadline <= time.time():
+            return "deadline"
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+
+        start = time.perf_counter()
+        try:
+            admitted = await self._wait(deadline)
+        finally:
+            QUEUE_SECONDS.observe(time.perf_counter() - start)
+        if admitted:
+            return None
+        return "deadline" if deadline is not None and deadline <= time.time() else "queue_timeout"
+
+    async def _wait(self, deadline: float | None) -> bool:
+        """Attend dans la file qu'une place soit transmise ; faux si l'attente expire."""
+        timeout = self.queue_timeout if deadline is None else min(self.queue_timeout, deadline - time.time())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:  # Expiration, ou client parti pendant l'attente
+            if waiter.cancelled():
+                with contextlib.suppress(ValueError):  # Déjà retiré par _release
+                    self._waiters.remove(waiter)
+            else:  # Place transmise au même moment : elle est rendue
+                self._release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+        return True
+
+    def _release(self) -> None:
+        """Transmet la place à la première requête en attente, ou la libère."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
@@ -6,9 +6,27 @@ import jwt
 from jwt import PyJWKClient
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError, InvalidAudienceError
 
+from titanic.api.metrics import CACHE_REQUESTS
+
 
 security = HTTPBearer()
 
+# Durée de validité du jeu de clés en cache ; une clé inconnue (rotation) force un rechargement
+JWKS_CACHE_SECONDS = float(os.getenv("OAUTH2_JWKS_CACHE_SECONDS", "300"))
+
+# Un client par URL de JWKS : PyJWKClient garde les clés en cache, pas de téléchargement par requête
+_jwks_clients: dict[str, PyJWKClient] = {}
+
+
+def _jwks_client(jwks_url: str) -> PyJWKClient:
+    client = _jwks_clients.get(jwks_url)
+    if client is not None:
+        CACHE_REQUESTS.inc(cache="jwks_client", result="hit")
+        return client
+    CACHE_REQUESTS.inc(cache="jwks_client", result="miss")
+    client = _jwks_clients[jwks_url] = PyJWKClient(jwks_url, lifespan=JWKS_CACHE_SECONDS)
+    return client
+
 
 def verify_token(required_scope: str) -> Callable:  # noqa: C901
     """Create a token validator with a specific required scope using Auth0 JWKS."""
@@ -25,7 +43,7 @@ def verify_token(required_scope: str) -> Callable:  # noqa: C901
 
         try:
             jwks_url = f"https://{auth0_domain}/.well-known/jwks.json"
-            jwks_client = PyJWKClient(jwks_url)
+            jwks_client = _jwks_client(jwks_url)
 
             signing_key = jwks_client.get_signing_key_from_jwt(token)
 
@@ -0,0 +1,478 @@
+"""Benchmark de /infer : débit, latences p50/p99 et mémoire sous concurrence.
+
+Chaque scénario combine un mode (inprocess : l'application ASGI appelée directement, sans réseau ;
+socket : l'API démarrée dans un sous-process et appelée en HTTP local), l'authentification (off, ou
+on avec un JWKS local : les tokens sont vérifiés par le vrai code d'auth), la taille des requêtes
+(1 : /infer, n > 1 : /infer/batch), l'encodage des requêtes et réponses (json ou msgpack), la
+concurrence et le tracing (mode socket : off, full ou lean, les spans étant exportés vers un
+collecteur OTLP local). Chaque scénario mesure aussi le temps CPU par requête (cpu_ms_per_request) :
+celui du process de benchmark en mode inprocess, celui des process de l'API en mode socket. Les
+résultats sont écrits en JSON avec le commit courant, pour comparer deux commits avec la
+sous-commande compare.
+
+Exemples :
+    python -m titanic.api.benchmark run --modes inprocess socket --auth off on --batch-sizes 1 32 -o bench.json
+    python -m titanic.api.benchmark run --modes socket --tracing off full lean -o tracing.json
+    python -m titanic.api.benchmark run --encodings json msgpack --batch-sizes 1 100 -o encodings.json
+    python -m titanic.api.benchmark compare base.json bench.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import http.server
+import itertools
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Self
+from unittest.mock import patch
+
+import jwt
+from jwt import PyJWKClient
+from jwt.algorithms import RSAAlgorithm
+
+from titanic.api.loadtest import _free_port, run_load, summarize, wait_until_ready
+
+STUB_DOMAIN = "jwks-stub.local"
+
+STUB_AUDIENCE = "titanic-api"
+
+STUB_KID = "benchmark"
+
+MODES = ("inprocess", "socket")
+
+MIXES = ("fixed", "random")
+
+ENCODINGS = ("json", "msgpack")
+
+# Configuration OTEL de l'API pour chaque mode de tracing ; lean reprend les valeurs de production
+TRACING = {
+    "off": {"OTEL_SDK_DISABLED": "true"},
+    "full": {"OTEL_SDK_DISABLED": "false", "OTEL_TRACES_SAMPLER": "always_on", "TRACING_LEAN": "false"},
+    "lean": {
+        "OTEL_SDK_DISABLED": "false",
+        "OTEL_TRACES_SAMPLER": "parentbased_traceidratio",
+        "OTEL_TRACES_SAMPLER_ARG": "0.1",
+        "TRACING_LEAN": "true",
+    },
+}
+
+
+@dataclass
+class Workload:
+    """Charge envoyée pendant un scénario : requêtes (chemin, corps JSON) jouées à tour de rôle."""
+
+    requests: list[tuple[str, str | bytes]]
+    headers: dict[str, str]
+    concurrency: int
+    duration: float
+
+
+class JwksStub:
+    """Clé RSA locale : signe les tokens du benchmark et sert le JWKS à la place d'Auth0."""
+
+    def __init__(self) -> None:
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        self._key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = RSAAlgorithm.to_jwk(self._key.public_key(), as_dict=True)
+        self.jwks = {"keys": [{**jwk, "kid": STUB_KID, "use": "sig", "alg": "RS256"}]}
+
+    def token(self, scope: str = "api:read") -> str:
+        now = int(time.time())
+        claims = {
+            "iss": f"https://{STUB_DOMAIN}/",
+            "aud": STUB_AUDIENCE,
+            "scope": scope,
+            "iat": now,
+            "exp": now + 3600,
+        }
+        return jwt.encode(claims, self._key, algorithm="RS256", headers={"kid": STUB_KID})
+
+
+class OtlpSink:
+    """Collecteur OTLP/HTTP local : accepte les exports de spans, compte les octets reçus et les jette."""
+
+    def __init__(self) -> None:
+        sink = self
+        self.received_bytes = 0
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                sink.received_bytes += len(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/v1/traces"
+
+    def __enter__(self) -> Self:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@contextlib.contextmanager
+def stub_jwks(jwks: dict) -> Iterator[None]:
+    """Remplace le téléchargement du JWKS d'Auth0 par le JWKS local (le reste de l'auth est inchangé)."""
+
+    class StubJWKClient(PyJWKClient):
+        def fetch_data(self) -> dict:
+            return jwks
+
+    # Cache de clients vide : aucun client créé avec un autre JWKS n'est réutilisé
+    with patch("titanic.api.auth.PyJWKClient", StubJWKClient), patch("titanic.api.auth._jwks_clients", {}):
+        yield
+
+
+def auth_env(auth: bool) -> dict[str, str]:
+    """Variables d'environnement lues par verify_token : auth désactivée sans OAUTH2_DOMAIN."""
+    return {"OAUTH2_DOMAIN": STUB_DOMAIN if auth else "", "OAUTH2_JWT_AUDIENCE": STUB_AUDIENCE}
+
+
+def payload_mix(mix: str, batch_size: int, n_payloads: int = 64, seed: int = 0) -> list[tuple[str, str]]:
+    """Requêtes (chemin, corps JSON) envoyées à tour de rôle : un passager fixe ou des passagers aléatoires."""
+    if mix not in MIXES:
+        raise ValueError(f"Unknown payload mix '{mix}', expected one of {MIXES}")
+    rng = random.Random(seed)  # noqa: S311 (génération de données de test)
+
+    def passenger() -> dict:
+        if mix == "fixed":
+            return {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
+        return {
+            "pclass": rng.choice([1, 2, 3]),
+            "sex": rng.choice(["female", "male"]),
+            "sibSp": rng.randint(0, 4),
+            "parch": rng.randint(0, 3),
+        }
+
+    if batch_size == 1:
+        return [("/infer", json.dumps(passenger())) for _ in range(n_payloads)]
+    return [("/infer/batch", json.dumps([passenger() for _ in range(batch_size)])) for _ in range(n_payloads)]
+
+
+def encode_requests(requests: list[tuple[str, str]], encoding: str) -> list[tuple[str, str | bytes]]:
+    """Corps JSON tels quels, ou réencodés en MessagePack."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding '{encoding}', expected one of {ENCODINGS}")
+    if encoding == "json":
+        return requests
+    import ormsgpack
+
+    return [(path, ormsgpack.packb(json.loads(body))) for path, body in requests]
+
+
+def encoding_headers(encoding: str) -> dict[str, str]:
+    """Content-Type du corps et Accept de la réponse pour l'encodage."""
+    media_type = "application/msgpack" if encoding == "msgpack" else "application/json"
+    return {"Content-Type": media_type, "Accept": media_type}
+
+
+async def _asgi_post(app: object, path: str, body: bytes, headers: list[tuple[bytes, bytes]]) -> int:
+    """Appelle l'application ASGI comme le ferait un serveur, sans réseau ; retourne le code HTTP."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [*headers, (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    done = asyncio.Event()
+    request_sent = False
+    status = 0
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()  # Le client ne se déconnecte qu'une fois la réponse reçue
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            done.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _run_inprocess(app: object, workload: Workload) -> dict:
+    raw_headers = [(key.lower().encode(), value.encode()) for key, value in workload.headers.items()]
+    bodies = [(path, body if isinstance(body, bytes) else body.encode()) for path, body in workload.requests]
+    latencies: list[list[float]] = [[] for _ in range(workload.concurrency)]
+    errors = 0
+
+    async def client(i: int) -> None:
+        nonlocal errors
+        k = i
+        while time.monotonic() < deadline:
+            path, body = bodies[k % len(bodies)]
+            k += 1
+            start = time.perf_counter()
+            if await _asgi_post(app, path, body, raw_headers) == 200:
+                latencies[i].append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    async with app.router.lifespan_context(app):  # Chargement du modèle comme au démarrage d'un worker
+        deadline = time.monotonic() + workload.duration
+        start, cpu_start = time.perf_counter(), time.process_time()
+        await asyncio.gather(*(client(i) for i in range(workload.concurrency)))
+        elapsed, cpu_seconds = time.perf_counter() - start, time.process_time() - cpu_start
+    result = summarize(latencies, errors, elapsed)
+    result["cpu_ms_per_request"] = cpu_seconds * 1000 / max(result["requests"], 1)
+    return result
+
+
+def run_inprocess(model_path: str, workload: Workload, stub: JwksStub | None) -> dict:
+    """Scénario sans réseau : coût du décodage, de l'auth, de l'encodage et du predict uniquement."""
+    from titanic.api.infer import create_app
+
+    auth = stub is not None
+    with patch.dict(os.environ, auth_env(auth)), stub_jwks(stub.jwks) if auth else contextlib.nullcontext():
+        result = asyncio.run(_run_inprocess(create_app(model_path, tracing=False), workload))
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Pic du process de benchmark
+    return result
+
+
+def _process_tree(pid: int) -> list[int]:
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    child_pids = [int(child) for child in children.read_text().split()] if children.exists() else []
+    return [pid, *itertools.chain.from_iterable(_process_tree(child) for child in child_pids)]
+
+
+def _peak_rss_mb(pid: int) -> float:
+    """Somme des pics de RSS (VmHWM) du serveur et de ses workers ; les pages partagées sont comptées par process."""
+    total_kb = 0
+    for process in _process_tree(pid):
+        try:
+            for line in Path(f"/proc/{process}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def _cpu_seconds(pid: int) -> float:
+    """Temps CPU (utilisateur et système) cumulé du serveur et de ses workers."""
+    ticks = 0
+    for process in _process_tree(pid):
+        try:
+            fields = Path(f"/proc/{process}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        ticks += int(fields[11]) + int(fields[12])  # utime et stime (champs 14 et 15 de /proc/<pid>/stat)
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def run_socket(model_path: str, workload: Workload, jwks: dict | None, workers: int, tracing: str = "off") -> dict:
+    """Scénario HTTP local : l'API tourne dans un sous-process, comme en production.
+
+    Avec le tracing, les spans partent vers un collecteur local ; exported_kb inclut ceux vidés à l'arrêt.
+    """
+    port = _free_port()
+    with OtlpSink() as sink:
+        env = {
+            **os.environ,
+            **auth_env(jwks is not None),
+            **TRACING[tracing],
+            "API_WORKERS": str(workers),
+            "PORT": str(port),
+            "MODEL_PATH": model_path,
+            "JAEGER_ENDPOINT": sink.url,
+            "BENCHMARK_JWKS": json.dumps(jwks) if jwks else "",
+        }
+        server = subprocess.Popen([sys.executable, "-m", "titanic.api.benchmark", "serve"], env=env)  # noqa: S603
+        try:
+            wait_until_ready(port)
+            cpu_start = _cpu_seconds(server.pid)
+            result = run_load(port, workload.concurrency, workload.duration, workload.requests, workload.headers)
+            result["cpu_ms_per_request"] = (_cpu_seconds(server.pid) - cpu_start) * 1000 / max(result["requests"], 1)
+            result["peak_rss_mb"] = _peak_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        result["exported_kb"] = sink.received_bytes / 1024
+    return result
+
+
+def _git_commit() -> str | None:
+    try:
+        git = ["git", "rev-parse", "HEAD"]
+        return subprocess.run(git, capture_output=True, text=True, check=True).stdout.strip()  # noqa: S603
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(  # noqa: PLR0913
+    model_path: str,
+    modes: list[str],
+    auth: list[str],
+    batch_sizes: list[int],
+    concurrency: list[int],
+    mix: str = "random",
+    duration: float = 5.0,
+    workers: int = 1,
+    tracing: tuple[str, ...] = ("off",),
+    encodings: tuple[str, ...] = ("json",),
+) -> dict:
+    """Exécute tous les scénarios et retourne le rapport JSON."""
+    stub = JwksStub() if "on" in auth else None
+    results = []
+    scenarios = itertools.product(modes, tracing, encodings, auth, batch_sizes, concurrency)
+    for mode, tracing_mode, encoding, auth_mode, batch_size, n_clients in scenarios:
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        if tracing_mode not in TRACING:
+            raise ValueError(f"Unknown tracing mode '{tracing_mode}', expected one of {tuple(TRACING)}")
+        if mode == "inprocess" and tracing_mode != "off":  # Un seul provider OTEL par process : socket uniquement
+            continue
+        token = stub.token() if auth_mode == "on" else "benchmark"
+        headers = {**encoding_headers(encoding), "Authorization": f"Bearer {token}"}
+        requests = encode_requests(payload_mix(mix, batch_size), encoding)
+        workload = Workload(requests, headers, n_clients, duration)
+        if mode == "inprocess":
+            result = run_inprocess(model_path, workload, stub if auth_mode == "on" else None)
+        else:
+            jwks = stub.jwks if auth_mode == "on" else None
+            result = run_socket(model_path, workload, jwks, workers, tracing_mode)
+        scenario = {
+            "mode": mode,
+            "tracing": tracing_mode,
+            "encoding": encoding,
+            "auth": auth_mode,
+            "batch_size": batch_size,
+            "concurrency": n_clients,
+            "mix": mix,
+        }
+        result["rows_per_second"] = result["throughput_rps"] * batch_size
+        results.append({**scenario, **result})
+        print(json.dumps(results[-1]), file=sys.stderr, flush=True)
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {"model_path": model_path, "duration": duration, "workers": workers},
+        "results": results,
+    }
+
+
+SCENARIO_KEYS = ("mode", "tracing", "encoding", "auth", "batch_size", "concurrency", "mix")
+
+# Valeur des dimensions ajoutées après coup, pour les rapports qui ne les contiennent pas
+SCENARIO_DEFAULTS = {"tracing": "off", "encoding": "json"}
+
+
+def _scenario_key(result: dict) -> tuple:
+    return tuple(result.get(key, SCENARIO_DEFAULTS.get(key)) for key in SCENARIO_KEYS)
+
+
+def compare(base: dict, new: dict) -> list[dict]:
+    """Variation relative du débit, des latences, de la mémoire et du CPU par requête, scénario par scénario."""
+    base_results = {_scenario_key(result): result for result in base["results"]}
+    rows = []
+    for result in new["results"]:
+        key = _scenario_key(result)
+        if key not in base_results:
+            continue
+        row = dict(zip(SCENARIO_KEYS, key, strict=True))
+        for metric in ("throughput_rps", "latency_p50_ms", "latency_p99_ms", "peak_rss_mb", "cpu_ms_per_request"):
+            before, after = base_results[key].get(metric), result.get(metric)  # Absentes des anciens rapports
+            row[metric] = after
+            row[f"{metric}_change"] = (after - before) / before if before and after is not None else None
+        rows.append(row)
+    return rows
+
+
+def serve() -> None:
+    """Démarre l'API (titanic.api.main) avec le JWKS local fourni par le benchmark."""
+    from titanic.api.main import main as api_main
+
+    jwks = os.getenv("BENCHMARK_JWKS")
+    with stub_jwks(json.loads(jwks)) if jwks else contextlib.nullcontext():  # Workers forkés compris
+        api_main()
+
+
+def main() -> None:
+    from titanic.api.infer import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="exécute les scénarios")
+    run_parser.add_argument("--model-path", default=MODEL_PATH)
+    run_parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    run_parser.add_argument("--auth", nargs="+", default=["off"], choices=["off", "on"])
+    run_parser.add_argument("--tracing", nargs="+", default=["off"], choices=list(TRACING), help="mode socket")
+    run_parser.add_argument("--encodings", nargs="+", default=["json"], choices=ENCODINGS)
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1])
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    run_parser.add_argument("--mix", default="random", choices=MIXES)
+    run_parser.add_argument("--duration", type=float, default=5.0)
+    run_parser.add_argument("--workers", type=int, default=1, help="workers de l'API en mode socket")
+    run_parser.add_argument("-o", "--output", help="fichier JSON de résultats (sortie standard sinon)")
+    compare_parser = commands.add_parser("compare", help="compare deux fichiers de résultats")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("new")
+    commands.add_parser("serve", help="usage interne : API avec le JWKS local")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve()
+    elif args.command == "compare":
+        base, new = (json.loads(Path(path).read_text()) for path in (args.base, args.new))
+        for row in compare(base, new):
+            print(json.dumps(row))
+    else:
+        report = run(
+            args.model_path,
+            args.modes,
+            args.auth,
+            args.batch_sizes,
+            args.concurrency,
+            args.mix,
+            args.duration,
+            args.workers,
+            args.tracing,
+            args.encodings,
+        )
+        output = json.dumps(report, indent=2)
+        if args.output:
+            Path(args.output).write_text(output)
+        else:
+            print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Coalescence des évaluations identiques en cours (single-flight).
+
+Quand plusieurs requêtes concurrentes demandent la même évaluation (mêmes features, même version
+de modèle), seule la première appelle le modèle : les suivantes attendent son résultat au lieu de
+refaire le calcul. Rien n'est conservé après la fin de l'évaluation : ce n'est pas un cache.
+"""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Évaluations en cours par clé ; les appels concurrents de même clé partagent le résultat du premier."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], object]) -> tuple[object, bool]:
+        """Retourne (résultat, coalescé) ; une exception de fn est levée pour tous les appels en attente."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
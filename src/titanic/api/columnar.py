@@ -0,0 +1,208 @@
+"""Scoring en colonnes : corps Arrow IPC (stream ou file) ou Parquet, prédictions renvoyées en stream Arrow.
+
+Le corps est écrit dans un fichier temporaire puis projeté en mémoire (mmap) : les lots sont lus un
+par un, découpés en tranches d'au plus CHUNK_ROWS lignes, encodés colonne par colonne et prédits.
+La mémoire reste bornée par la taille d'une tranche, quel que soit le nombre de lignes envoyées.
+Colonnes, types et nulls sont vérifiés avant la réponse (pied de page Parquet, en-têtes des lots Arrow) :
+une erreur est un 422, jamais un stream interrompu après le 200.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from collections.abc import Callable, Collection, Iterator
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from fastapi import Request
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+ARROW_FILE = "application/vnd.apache.arrow.file"
+
+PARQUET = "application/vnd.apache.parquet"
+
+CONTENT_TYPES = (ARROW_STREAM, ARROW_FILE, PARQUET, "application/x-parquet")
+
+CHUNK_ROWS = 65536
+
+MAX_UPLOAD_BYTES = int(os.getenv("COLUMNAR_MAX_UPLOAD_BYTES", str(2**30)))  # 1 Gio par défaut
+
+OPENAPI_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {content_type: {"schema": {"type": "string", "format": "binary"}} for content_type in CONTENT_TYPES},
+    }
+}
+
+
+class UploadTooLargeError(ValueError):
+    """Le corps dépasse MAX_UPLOAD_BYTES."""
+
+
+class MissingColumnsError(ValueError):
+    """Le schéma du corps n'a pas toutes les colonnes attendues par l'encodeur."""
+
+
+class InvalidColumnError(ValueError):
+    """Une colonne attendue contient des valeurs nulles ou n'a pas un type numérique là où il en faut un."""
+
+
+def media_type(content_type: str | None) -> str:
+    """Type du corps sans paramètres ; ValueError s'il n'est pas un format colonne accepté."""
+    value = (content_type or "").split(";", 1)[0].strip().lower()
+    if value not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported content type '{value}', expected one of {CONTENT_TYPES}")
+    return value
+
+
+async def spool_body(request: Request) -> tempfile._TemporaryFileWrapper:
+    """Écrit le corps reçu par morceaux (au plus MAX_UPLOAD_BYTES) dans un fichier temporaire."""
+    spool = tempfile.NamedTemporaryFile(prefix="titanic-columnar-", suffix=".arrow")  # noqa: SIM115
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise UploadTooLargeError(f"Body larger than {MAX_UPLOAD_BYTES} bytes")
+            spool.write(chunk)
+        spool.flush()
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+def _open(
+    source: pa.MemoryMappedFile, content_type: str, columns: list[str]
+) -> tuple[pa.Schema, Iterator[pa.RecordBatch], pq.ParquetFile | None]:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    source.seek(0)
+    if content_type == ARROW_STREAM:
+        reader = pa.ipc.open_stream(source)
+        return reader.schema, iter(reader), None
+    if content_type == ARROW_FILE:
+        reader = pa.ipc.open_file(source)
+        return reader.schema, (reader.get_batch(i) for i in range(reader.num_record_batches)), None
+    parquet = pq.ParquetFile(source)
+    return parquet.schema_arrow, parquet.iter_batches(batch_size=CHUNK_ROWS, columns=columns), parquet
+
+
+def _parquet_null_count(parquet: pq.ParquetFile, name: str) -> int:
+    """Nulls de la colonne d'après le pied de page, en ne lisant que les row groups sans statistiques."""
+    index = parquet.schema_arrow.get_field_index(name)
+    total = 0
+    for i in range(parquet.metadata.num_row_groups):
+        statistics = parquet.metadata.row_group(i).column(index).statistics
+        if statistics is not None and statistics.has_null_count:
+            total += statistics.null_count
+        else:
+            total += parquet.read_row_group(i, columns=[name]).column(0).null_count
+    return total
+
+
+def _null_counts(
+    batches: Iterator[pa.RecordBatch], parquet: pq.ParquetFile | None, columns: list[str]
+) -> dict[str, int]:
+    if parquet is not None:
+        return {name: _parquet_null_count(parquet, name) for name in columns}
+    counts = dict.fromkeys(columns, 0)
+    for batch in batches:  # Lots Arrow projetés en mémoire : seuls leurs en-têtes sont lus
+        for name in columns:
+            counts[name] += batch.column(name).null_count
+    return counts
+
+
+def _validate(
+    schema: pa.Schema,
+    batches: Iterator[pa.RecordBatch],
+    parquet: pq.ParquetFile | None,
+    columns: list[str],
+    numeric: Collection[str],
+) -> None:
+    """Lève MissingColumnsError ou InvalidColumnError si une tranche ne pourrait pas être encodée."""
+    import pyarrow as pa
+
+    missing = [column for column in columns if column not in schema.names]
+    if missing:
+        raise MissingColumnsError(f"Missing columns {missing}, expected {columns}")
+    for name in numeric:
+        column_type = schema.field(name).type
+        if not any(check(column_type) for check in (pa.types.is_integer, pa.types.is_floating, pa.types.is_boolean)):
+            raise InvalidColumnError(f"Column {name} has type {column_type}, expected a numeric type")
+    nullable = [name for name in columns if schema.field(name).nullable]
+    for name, count in _null_counts(batches, parquet, nullable).items():
+        if count:
+            raise InvalidColumnError(f"Column {name} contains {count} null values")
+
+
+def open_batches(
+    path: str, content_type: str, columns: list[str], numeric: Collection[str] = ()
+) -> tuple[Callable[[], None], Iterator[pa.RecordBatch]]:
+    """Ouvre et valide le fichier, puis retourne (fermeture, lots) sans lire les données des lots.
+
+    Toutes les erreurs sont levées ici, avant le début de la réponse : MissingColumnsError,
+    InvalidColumnError (valeurs nulles, ou type non numérique dans une colonne de numeric), ou
+    ArrowInvalid (un ValueError) si le corps n'est pas dans le format annoncé.
+    """
+    import pyarrow as pa
+
+    source = pa.memory_map(path)
+    try:
+        _validate(*_open(source, content_type, columns), columns, numeric)
+        _, batches, _ = _open(source, content_type, columns)  # Relecture depuis le début
+    except BaseException:
+        source.close()
+        raise
+    return source.close, batches
+
+
+def _chunks(batches: Iterator[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+    for batch in batches:
+        for offset in range(0, batch.num_rows, CHUNK_ROWS):
+            yield batch.slice(offset, CHUNK_ROWS)  # Vue sans copie
+
+
+def _column_values(batch: pa.RecordBatch, name: str) -> np.ndarray:
+    return batch.column(name).to_numpy(zero_copy_only=False)  # Sans nulls : validé par open_batches
+
+
+def score_batches(
+    batches: Iterator[pa.RecordBatch],
+    columns: list[str],
+    predict: Callable[[dict[str, np.ndarray], int], np.ndarray],
+) -> Iterator[pa.RecordBatch]:
+    """Prédictions tranche par tranche, en lots Arrow d'une colonne prediction.
+
+    predict reçoit les colonnes brutes de la tranche (tableaux numpy) et son nombre de lignes.
+    """
+    import pyarrow as pa
+
+    for chunk in _chunks(batches):
+        values = {name: _column_values(chunk, name) for name in columns}
+        predictions = predict(values, chunk.num_rows)
+        yield pa.record_batch([pa.array(predictions, type=pa.int64())], names=["prediction"])
+
+
+def ipc_stream(batches: Iterator[pa.RecordBatch]) -> Iterator[bytes]:
+    """Sérialise les lots en stream Arrow IPC, un morceau de corps de réponse par lot."""
+    import io
+
+    import pyarrow as pa
+
+    buffer = io.BytesIO()
+    writer = pa.ipc.new_stream(buffer, pa.schema([("prediction", pa.int64())]))
+    for batch in batches:
+        writer.write_batch(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    writer.close()  # Marqueur de fin de stream
+    yield buffer.getvalue()
@@ -0,0 +1,88 @@
+"""Encodages des requêtes et réponses de l'API : JSON (orjson) ou MessagePack, négociés par les headers.
+
+Le corps est décodé selon son Content-Type puis validé par FastAPI comme avant ; la réponse est
+encodée selon le header Accept, en JSON par défaut. orjson et ormsgpack sérialisent directement
+les tableaux numpy retournés par le modèle.
+"""
+
+from collections.abc import Awaitable, Callable
+
+import orjson
+import ormsgpack
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+JSON = "application/json"
+
+MSGPACK = "application/msgpack"
+
+MSGPACK_TYPES = frozenset({MSGPACK, "application/x-msgpack", "application/vnd.msgpack"})
+
+_MSGPACK_BODY = "titanic.msgpack_body"  # Clé du scope ASGI : corps à décoder en MessagePack
+
+
+def _media_types(header: str | None) -> list[str]:
+    """Types d'un header Content-Type ou Accept, sans paramètres ni ceux refusés par q=0."""
+    types = []
+    for item in (header or "").split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        if "q=0" not in params and "q=0.0" not in params:
+            types.append(media_type.lower())
+    return types
+
+
+def _is_msgpack(header: str | None) -> bool:
+    return any(media_type in MSGPACK_TYPES for media_type in _media_types(header))
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Vrai si le client accepte MessagePack ; JSON reste le défaut (Accept absent ou */*)."""
+    return _is_msgpack(request.headers.get("accept"))
+
+
+class FastJSONResponse(Response):
+    media_type = JSON
+
+    def render(self, content: object) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content: object) -> bytes:
+        return ormsgpack.packb(content, option=ormsgpack.OPT_SERIALIZE_NUMPY)
+
+
+def respond(request: Request, content: object) -> Response:
+    """Réponse MessagePack si le client l'accepte, JSON sinon."""
+    return MsgPackResponse(content) if wants_msgpack(request) else FastJSONResponse(content)
+
+
+class NegotiatedRequest(Request):
+    """Requête dont le corps est décodé par orjson, ou par ormsgpack pour un corps MessagePack."""
+
+    async def json(self) -> object:
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            self._json = ormsgpack.unpackb(body) if self.scope.get(_MSGPACK_BODY) else orjson.loads(body)
+        return self._json
+
+
+class NegotiatedRoute(APIRoute):
+    """Route qui accepte un corps JSON ou MessagePack, validé ensuite par FastAPI comme un corps JSON."""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            scope = request.scope
+            if _is_msgpack(request.headers.get("content-type")):
+                # FastAPI ne passe par request.json() que pour un corps JSON : le type est présenté comme tel
+                scope[_MSGPACK_BODY] = True
+                scope["headers"] = [
+                    (key, JSON.encode()) if key == b"content-type" else (key, value) for key, value in scope["headers"]
+                ]
+            return await handler(NegotiatedRequest(scope, request.receive))
+
+        return route_handler
@@ -0,0 +1,75 @@
+"""Encodage des passagers avec la disposition de colonnes figée à l'entraînement.
+
+Le schéma (feature_schema.json) est loggé par l'entraînement à côté du modèle et téléchargé
+avec lui dans resources/. L'encodeur est construit une seule fois au chargement de l'API.
+"""
+
+import json
+import logging
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Disposition produite par l'entraînement, utilisée si le schéma n'a pas été téléchargé avec le modèle
+DEFAULT_SCHEMA = {
+    "features": [
+        {"name": "Pclass", "dtype": "int64"},
+        {"name": "Sex", "dtype": "category", "categories": ["female", "male"]},
+        {"name": "SibSp", "dtype": "int64"},
+        {"name": "Parch", "dtype": "int64"},
+    ],
+    "columns": ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"],
+}
+
+
+def load_feature_schema(path: str | Path) -> dict:
+    """Charge le schéma loggé avec le modèle, ou le schéma par défaut s'il est absent."""
+    path = Path(path)
+    if not path.exists():
+        logging.warning(f"Feature schema {path} not found, using the default layout")
+        return DEFAULT_SCHEMA
+    return json.loads(path.read_text())
+
+
+class FeatureEncoder:
+    """Encodeur à disposition fixe : chaque valeur brute est écrite directement à sa colonne."""
+
+    def __init__(self, schema: dict) -> None:
+        self.columns: list[str] = schema["columns"]
+        self.inputs: list[str] = [feature["name"] for feature in schema["features"]]  # Champs bruts (Pclass, Sex...)
+        index = {column: i for i, column in enumerate(self.columns)}
+        self._numeric: list[tuple[str, int]] = []
+        self._categorical: list[tuple[str, dict[object, int]]] = []
+        for feature in schema["features"]:
+            name = feature["name"]
+            if feature["dtype"] == "category":
+                columns = {level: f"{name}_{level}" for level in feature["categories"]}
+                self._categorical.append((name, {level: index[col] for level, col in columns.items() if col in index}))
+            elif name in index:
+                self._numeric.append((name, index[name]))
+        self.numeric_inputs: list[str] = [name for name, _ in self._numeric]  # Convertis en float64 à l'encodage
+
+    def encode(self, rows: list[dict]) -> pd.DataFrame:
+        """Matrice de features (une ligne par passager) avec les colonnes du fit, dans le même ordre."""
+        values = np.zeros((len(rows), len(self.columns)), dtype=np.float64)
+        for i, row in enumerate(rows):
+            for name, column in self._numeric:
+                values[i, column] = row[name]
+            for name, levels in self._categorical:
+                column = levels.get(row[name])
+                if column is not None:  # Modalité inconnue au fit : toutes les colonnes restent à 0
+                    values[i, column] = 1.0
+        return pd.DataFrame(values, columns=self.columns)
+
+    def encode_columns(self, columns: Mapping[str, np.ndarray], n_rows: int) -> pd.DataFrame:
+        """Même matrice que encode, à partir de colonnes brutes (une opération vectorisée par colonne)."""
+        values = np.zeros((n_rows, len(self.columns)), dtype=np.float64)
+        for name, column in self._numeric:
+            values[:, column] = columns[name]
+        for name, levels in self._categorical:
+            raw = columns[name]
+            for level, column in levels.items():
+                values[:, column] = raw == level
+        return pd.DataFrame(values, columns=self.columns)
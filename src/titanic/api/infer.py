@@ -2,51 +2,132 @@
 Ce script permet d'inférer le model de machine learning et de le mettre à disposition
 dans un Webservice. Il pourra donc être utilisé par notre chatbot par exemple,
 ou directement par un front. Remplir ce script une fois l'entrainement du model fonctionne
+
+L'import du module est sans effet de bord : le modèle et la télémétrie sont chargés une fois
+par worker dans le lifespan de l'application créée par create_app.
 """
 
+import hashlib
+import logging
 import os
 import pickle
+import time
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager
 
 # DONE: Importer les dépendances utiles au bon développement en Python (dataclass, enum, pandas)
 # DONE : Importer les dépendances pour sérialiser / désérialiser le model
 from dataclasses import dataclass
 from enum import Enum
-import pandas as pd
+
 # DONE : Importer les dépendances fastAPI
-from fastapi import FastAPI,Depends
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 # DONE : Importer les dépendances OTEL pour le monitoring
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter as HTTPSpanExporter
+from opentelemetry import context, trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
-from opentelemetry.sdk.resources import Resource
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
 
+from titanic import profiling, telemetry
+from titanic.api import admin, columnar, ndjson
+from titanic.api.admission import AdmissionMiddleware
 from titanic.api.auth import verify_token
+from titanic.api.coalesce import SingleFlight
+from titanic.api.encoding import NegotiatedRoute, respond, wants_msgpack
+from titanic.api.features import FeatureEncoder, load_feature_schema
+from titanic.api.metrics import (
+    BATCH_SIZE,
+    COALESCED_REQUESTS,
+    CONTENT_TYPE,
+    DECODE_AUTH_SECONDS,
+    ENCODE_SECONDS,
+    MODEL_INFO,
+    PREDICT_SECONDS,
+    REGISTRY,
+    MetricsMiddleware,
+)
+from titanic.telemetry import TRACING_LEAN
 
 
-JAEGER_ENDPOINT = os.getenv("JAEGER_ENDPOINT", "http://jaeger.willemanmariepro-dev.svc.cluster.local:4318/v1/traces")
+MODEL_PATH = os.getenv("MODEL_PATH", "./src/titanic/api/resources/model.pkl")
 
-# DONE : Intégrer les configurations d'OTEL et instancier le tracer. Peut être fait plus tard si le cours
-# sur l'observabilité n'est pas encore donné
+FEATURE_SCHEMA_PATH = os.getenv("FEATURE_SCHEMA_PATH", "./src/titanic/api/resources/feature_schema.json")
 
-resource = Resource(attributes={"service.name": "titanic-inference-api"})
-
-provider = TracerProvider(resource=resource)
-processor = BatchSpanProcessor(HTTPSpanExporter(endpoint=JAEGER_ENDPOINT))
-provider.add_span_processor(processor)
-trace.set_tracer_provider(provider)
+# Durée de réutilisation des réponses de GET /infer par les caches (CDN, proxys, clients)
+INFER_CACHE_MAX_AGE = int(os.getenv("INFER_CACHE_MAX_AGE", "300"))
 
+# Tracer proxy : les spans partent vers le provider installé au démarrage (aucun tant qu'il n'y en a pas)
 tracer = trace.get_tracer(__name__)
 
-app = FastAPI()
-FastAPIInstrumentor.instrument_app(app)
+router = APIRouter(route_class=NegotiatedRoute)  # Routes ajoutées à chaque application créée par create_app
+
+
+def load_model(path: str) -> object:
+    """Ouvre et charge en mémoire le pickle qui sérialise le model."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def model_version(path: str) -> str:
+    """MODEL_VERSION si renseigné, sinon empreinte du fichier du modèle."""
+    version = os.getenv("MODEL_VERSION")
+    if version:
+        return version
+    try:
+        with open(path, "rb") as f:
+            return hashlib.file_digest(f, "sha256").hexdigest()[:12]
+    except OSError:
+        return "unknown"
+
+
+def create_app(
+    model_path: str = MODEL_PATH,
+    schema_path: str = FEATURE_SCHEMA_PATH,
+    tracing: bool = True,
+    model: object | None = None,
+) -> FastAPI:
+    """Instancie l'application FastAPI ; le chargement a lieu au démarrage de chaque worker.
+
+    model permet de fournir un modèle déjà chargé (pré-fork : chargé une fois par le process parent).
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        if tracing:  # DONE : Intégrer les configurations d'OTEL et instancier le tracer
+            telemetry.configure("titanic-inference-api")
+        app.state.model = model if model is not None else load_model(model_path)
+        # Schéma des features loggé à l'entraînement : encodeur construit une seule fois
+        app.state.encoder = FeatureEncoder(load_feature_schema(schema_path))
+        app.state.model_version = model_version(model_path)
+        app.state.inflight = SingleFlight()  # Évaluations /infer en cours, partagées entre requêtes identiques
+        MODEL_INFO.clear()
+        MODEL_INFO.set(1, version=app.state.model_version)
+        app.state.startup_seconds = time.perf_counter() - start
+        app.state.ready = True
+        logging.warning(f"API ready in {app.state.startup_seconds:.3f}s (model {model_path})")
+        try:
+            yield
+        finally:
+            app.state.ready = False  # Plus de trafic pendant l'arrêt
+            if tracing:
+                telemetry.shutdown()  # Exporte les spans encore en file
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.ready = False
+    app.state.startup_seconds = None
+    if tracing and telemetry.enabled():  # Télémétrie désactivée : pas de middleware OTEL
+        FastAPIInstrumentor.instrument_app(app)
+    app.add_middleware(AdmissionMiddleware)  # Délestage avant toute lecture du corps
+    app.add_middleware(MetricsMiddleware)  # Ajouté en dernier : mesure aussi les requêtes délestées
+    app.include_router(router)
+    if profiling.enabled():  # Opt-in : aucune route d'administration par défaut
+        app.include_router(admin.router)
+    return app
+
 
-# DONE : Instancier l'application FastAPI
-# DONE : Ouvrir et charger en mémoire le pickle qui sérialise le model
-with open("./src/titanic/api/resources/model.pkl", "rb") as f:
-    model = pickle.load(f)
 # DONE : Créer les class et dataclass représentant la donnée qui sera transmise au Webservice pour l'inférence
 # DONE : Créer Pclass (enum)
 # DONE : Créer Sex (enum)
@@ -71,27 +152,241 @@ class Passenger:
 
     def to_dict(self) -> dict:
         return {"Pclass": self.pclass.value, "Sex": self.sex.value, "SibSp": self.sibSp, "Parch": self.parch}
-    
+
+
+@dataclass
+class Prediction:
+    prediction: int
+    probability: float  # Probabilité de survie
+
+
+PASSENGER = TypeAdapter(Passenger)  # Validation d'un passager hors du corps de requête (lignes NDJSON)
+
+
 # DONE : Faire en sorte que cette fonction soit exposée via une toute GET /health
-@app.get("/health")
+@router.get("/health")
 def health() -> dict:
+    """Liveness : le process répond, même si le modèle n'est pas encore chargé."""
     return {"status": "OK"}
 
+
+@router.get("/health/ready")
+def ready(request: Request) -> JSONResponse:
+    """Readiness : le modèle est chargé et le worker peut recevoir du trafic."""
+    state = request.app.state
+    if not state.ready:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return JSONResponse({"status": "ready", "startup_seconds": state.startup_seconds})
+
+
+@router.get("/metrics")
+def metrics() -> Response:
+    """Métriques agrégées de tous les workers (une série par pid), au format texte Prometheus."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _ready_state(request: Request) -> object:
+    """État du worker, ou 503 tant que le modèle n'est pas chargé."""
+    state = request.app.state
+    if not state.ready:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model not loaded")
+    start = getattr(request.state, "request_start", None)  # Posé par MetricsMiddleware
+    if start is not None:  # Tout ce qui précède l'endpoint : lecture et validation du corps, auth
+        DECODE_AUTH_SECONDS.observe(time.perf_counter() - start, path=request.scope["route"].path)
+    return state
+
+
+def _predict(state: object, rows: list[dict], path: str, probability: bool = False) -> object:
+    """Encode les passagers et appelle le modèle une seule fois, en mesurant chaque étape.
+
+    Avec probability, un seul predict_proba donne la probabilité de survie et la classe (celle de
+    predict), retournées ensemble : [{"prediction": 1, "probability": 0.83}, ...].
+    """
+    BATCH_SIZE.observe(len(rows), path=path)
+    with ENCODE_SECONDS.time(path=path):
+        features = state.encoder.encode(rows)
+    with PREDICT_SECONDS.time(path=path):
+        if not probability:
+            return state.model.predict(features)
+        probas = state.model.predict_proba(features)
+    classes = state.model.classes_
+    labels = classes[probas.argmax(axis=1)].tolist()  # Même règle que predict
+    survival = probas[:, list(classes).index(1)].tolist()
+    return [{"prediction": label, "probability": p} for label, p in zip(labels, survival, strict=True)]
+
+
+def _predict_columns(state: object, columns: dict, n_rows: int, path: str) -> object:
+    """Comme _predict, pour une tranche de colonnes brutes (scoring Arrow / Parquet)."""
+    BATCH_SIZE.observe(n_rows, path=path)
+    with ENCODE_SECONDS.time(path=path):
+        features = state.encoder.encode_columns(columns, n_rows)
+    with PREDICT_SECONDS.time(path=path):
+        return state.model.predict(features)
+
+
 # DONE : Ajouter les paramètres de la fonction (peut se faire en deux fois avec la sécurisation via oAuth2)
-@app.post("/infer")
-def infer(passenger: Passenger, token: str = Depends(verify_token("api:read"))) -> list:
+@router.post("/infer", response_model=list[int] | list[Prediction])  # Schéma documenté ; réponse encodée par respond
+def infer(
+    passenger: Passenger,
+    request: Request,
+    probability: bool = False,
+    token: str = Depends(verify_token("api:read")),
+) -> Response:
+    """Prédiction d'un passager ; avec ?probability=true, classe et probabilité de survie ensemble."""
+    return _infer_one(_ready_state(request), passenger, request, probability)
+
+
+def _infer_one(state: object, passenger: Passenger, request: Request, probability: bool) -> Response:
+    """Prédiction d'un passager (POST et GET /infer), partagée avec les requêtes identiques en cours."""
     with tracer.start_as_current_span("model_inference") as span:
-        span.set_attribute("passenger.pclass", passenger.pclass.value)
-        span.set_attribute("passenger.sex", passenger.sex.value)
-        span.set_attribute("passenger.sibsp", passenger.sibSp)
-        span.set_attribute("passenger.parch", passenger.parch)
+        detailed = span.is_recording() and not TRACING_LEAN  # Span non échantillonné : rien à renseigner
+        if detailed:
+            span.set_attribute("passenger.pclass", passenger.pclass.value)
+            span.set_attribute("passenger.sex", passenger.sex.value)
+            span.set_attribute("passenger.sibsp", passenger.sibSp)
+            span.set_attribute("passenger.parch", passenger.parch)
+
+        row = passenger.to_dict()
+        # Features normalisées et version du modèle : deux requêtes de même clé ont la même réponse
+        key = (state.model_version, probability, *(row[name] for name in state.encoder.inputs))
+        res, coalesced = state.inflight.do(key, lambda: _predict(state, [row], "/infer", probability))
+        if coalesced:
+            COALESCED_REQUESTS.inc(path="/infer")
+        if detailed:
+            span.set_attribute("inference.coalesced", coalesced)
+            result = int(res[0]["prediction"] if probability else res[0])
+            span.set_attribute("prediction.result", result)
+            span.add_event("prediction_completed", {"result": result})
+        return respond(request, res)
+
+
+def _etag(state: object, request: Request) -> str:
+    """ETag de GET /infer : la réponse d'une URL ne dépend que de la version du modèle et de l'encodage."""
+    encoding = "msgpack" if wants_msgpack(request) else "json"
+    return f'"{state.model_version}-{encoding}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Vrai si If-None-Match contient l'ETag (comparaison faible, W/ ignoré) ou vaut *."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+@router.get("/infer", response_model=list[int] | list[Prediction])
+def infer_get(  # noqa: PLR0913
+    request: Request,
+    sex: Sex,
+    sibSp: int,  # noqa: N803
+    parch: int,
+    pclass: int = Query(ge=1, le=3),
+    probability: bool = False,
+    token: str = Depends(verify_token("api:read")),
+) -> Response:
+    """Comme POST /infer, en paramètres d'URL : réponse réutilisable par le client tant que le modèle ne change pas.
+
+    Un If-None-Match qui contient l'ETag courant reçoit un 304 sans évaluation du modèle.
+    """
+    state = _ready_state(request)
+    headers = {
+        "ETag": _etag(state, request),
+        "Cache-Control": f"private, max-age={INFER_CACHE_MAX_AGE}",  # Route authentifiée : cache du client seulement
+        "Vary": "Accept, Authorization",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response = _infer_one(state, Passenger(Pclass(pclass), sex, sibSp, parch), request, probability)
+    response.headers.update(headers)
+    return response
+
+
+@router.post("/infer/batch", response_model=list[int] | list[Prediction])
+def infer_batch(
+    passengers: list[Passenger],
+    request: Request,
+    probability: bool = False,
+    token: str = Depends(verify_token("api:read")),
+) -> Response:
+    """Prédictions de plusieurs passagers avec un seul appel au modèle (probabilités comprises si demandées)."""
+    state = _ready_state(request)
+    with tracer.start_as_current_span("model_inference_batch") as span:
+        span.set_attribute("batch.size", len(passengers))
+        if not passengers:
+            return respond(request, [])
+        res = _predict(state, [passenger.to_dict() for passenger in passengers], "/infer/batch", probability)
+        return respond(request, res)
+
+
+def _stream_predictions(
+    state: object, batches: Iterator, cleanup: Callable[[], None], parent: context.Context
+) -> Iterator[bytes]:
+    """Score et sérialise les lots un par un, puis libère le fichier reçu (même si le client coupe)."""
+    # Span non courant : le générateur avance dans des threads successifs du threadpool
+    span = tracer.start_span("model_inference_arrow", context=parent)
+    try:
+        scored = columnar.score_batches(
+            batches,
+            state.encoder.inputs,
+            lambda columns, n_rows: _predict_columns(state, columns, n_rows, "/infer/arrow"),
+        )
+        yield from columnar.ipc_stream(scored)
+    finally:
+        span.end()
+        cleanup()
+
+
+@router.post("/infer/arrow", openapi_extra=columnar.OPENAPI_BODY)
+async def infer_arrow(request: Request, token: str = Depends(verify_token("api:read"))) -> StreamingResponse:
+    """Scoring en colonnes : corps Arrow IPC ou Parquet (Pclass, Sex, SibSp, Parch), prédictions en stream Arrow."""
+    state = _ready_state(request)
+    try:
+        content_type = columnar.media_type(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e)) from e
+    try:
+        spool = await columnar.spool_body(request)
+    except columnar.UploadTooLargeError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)) from e
+    try:
+        close, batches = await run_in_threadpool(
+            columnar.open_batches, spool.name, content_type, state.encoder.inputs, state.encoder.numeric_inputs
+        )
+    except (columnar.MissingColumnsError, columnar.InvalidColumnError) as e:
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_CONTENT, detail=str(e)) from e
+    except ValueError as e:  # ArrowInvalid : corps illisible dans le format annoncé
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)) from e
+
+    def cleanup() -> None:
+        close()
+        spool.close()
+
+    stream = _stream_predictions(state, batches, cleanup, context.get_current())
+    return StreamingResponse(stream, media_type=columnar.ARROW_STREAM)
+
+
+@router.post("/infer/stream", openapi_extra=ndjson.OPENAPI_BODY)
+async def infer_stream(request: Request, token: str = Depends(verify_token("api:read"))) -> StreamingResponse:
+    """Scoring en flux : un passager JSON par ligne, une ligne {"prediction": ...} ou {"error": ...} par passager."""
+    state = _ready_state(request)
+    try:
+        ndjson.media_type(request.headers.get("content-type"))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(e)) from e
+
+    def parse(line: bytes) -> dict:
+        return PASSENGER.validate_json(line).to_dict()
+
+    def predict(rows: list[dict]) -> object:
+        return _predict(state, rows, "/infer/stream")
+
+    async def score(lines: list[bytes]) -> bytes:
+        return await run_in_threadpool(ndjson.score_lines, lines, parse, predict)
 
-        df_passenger = pd.DataFrame([passenger.to_dict()])
-        df_passenger["Sex"] = pd.Categorical(df_passenger["Sex"], categories=[Sex.FEMALE.value, Sex.MALE.value])
-        df_to_predict = pd.get_dummies(df_passenger)
+    stream = ndjson.stream_predictions(request.stream(), score)
+    return ndjson.DuplexStreamingResponse(stream, media_type=ndjson.NDJSON)
 
-        res = model.predict(df_to_predict)
-        span.set_attribute("prediction.result", int(res[0]))
-        span.add_event("prediction_completed", {"result": int(res[0])})
-        return res.tolist()
 
+app = create_app()  # Aucun chargement ici : voir le lifespan
@@ -0,0 +1,133 @@
+"""Test de charge local de /infer selon le nombre de workers de l'API.
+
+Pour chaque nombre de workers, l'API est démarrée dans un sous-process (python -m titanic.api.main
+avec API_WORKERS), puis des clients concurrents envoient des requêtes pendant une durée fixe.
+Exemple : python -m titanic.api.loadtest --workers 1 2 4 --concurrency 8 --duration 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+PAYLOAD = json.dumps({"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0})
+
+HEADERS = {"Content-Type": "application/json", "Authorization": "Bearer load-test"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port: int, timeout: float = 60.0) -> None:
+    """Attend que /health/ready réponde 200."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/health/ready")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"API on port {port} not ready after {timeout}s")
+
+
+def summarize(latencies: list[list[float]], errors: int, elapsed: float) -> dict:
+    """Débit et percentiles de latence à partir des latences de chaque client."""
+    n_requests = sum(len(values) for values in latencies)
+    all_latencies = np.concatenate([np.asarray(values) for values in latencies]) if n_requests else np.zeros(1)
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "throughput_rps": n_requests / elapsed,
+        "latency_p50_ms": float(np.percentile(all_latencies, 50) * 1000),
+        "latency_p99_ms": float(np.percentile(all_latencies, 99) * 1000),
+    }
+
+
+def _back_off(response: http.client.HTTPResponse, deadline: float) -> None:
+    """Respecte le Retry-After d'un 503 (délestage par l'API), comme un client bien élevé."""
+    retry_after = response.getheader("Retry-After")
+    if response.status == 503 and retry_after:
+        time.sleep(min(float(retry_after), max(deadline - time.monotonic(), 0)))
+
+
+def run_load(
+    port: int,
+    concurrency: int,
+    duration: float,
+    requests: list[tuple[str, str]] | None = None,
+    headers: dict[str, str] = HEADERS,
+) -> dict:
+    """Clients concurrents (une connexion keep-alive chacun) ; retourne débit et latences.
+
+    requests est la liste des (chemin, corps JSON) envoyés à tour de rôle, /infer par défaut.
+    """
+    requests = requests or [("/infer", PAYLOAD)]
+    latencies: list[list[float]] = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    deadline = time.monotonic() + duration
+
+    def client(i: int) -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        k = i  # Chaque client démarre à un endroit différent du mélange de requêtes
+        while time.monotonic() < deadline:
+            path, body = requests[k % len(requests)]
+            k += 1
+            start = time.perf_counter()
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies[i].append(time.perf_counter() - start)
+            else:
+                errors[i] += 1
+                _back_off(response, deadline)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, sum(errors), time.perf_counter() - start)
+
+
+def load_test(workers: int, concurrency: int, duration: float) -> dict:
+    """Démarre l'API avec workers workers, mesure, puis l'arrête."""
+    port = _free_port()
+    env = {**os.environ, "API_WORKERS": str(workers), "PORT": str(port)}
+    server = subprocess.Popen([sys.executable, "-m", "titanic.api.main"], env=env)  # noqa: S603
+    try:
+        wait_until_ready(port)
+        return {"workers": workers, "concurrency": concurrency, **run_load(port, concurrency, duration)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        print(json.dumps(load_test(workers, args.concurrency, args.duration)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
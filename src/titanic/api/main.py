@@ -1,10 +1,131 @@
+"""Démarrage de l'API : un seul worker uvicorn, ou plusieurs workers pré-forkés.
+
+En mode multi-worker, le process parent charge le modèle puis forke les workers : les pages
+mémoire du modèle sont partagées en copy-on-write au lieu d'être chargées par chaque worker.
+Le nombre de workers vaut API_WORKERS, ou par défaut le quota CPU du conteneur. Leurs métriques sont
+partagées dans un dossier (METRICS_DIR, ou un dossier temporaire) : /metrics les rend toutes.
+"""
+
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import tempfile
+from pathlib import Path
+
 import uvicorn
 
 from titanic.api import infer
+from titanic.api.metrics import REGISTRY
+from titanic.cgroup import available_cpus
+
+HOST = "0.0.0.0"
+
+PORT = int(os.getenv("PORT", "8080"))
+
+STARTUP_FAILURE = 3  # Code de sortie d'un worker dont le lifespan a échoué
+
+
+def default_workers() -> int:
+    """API_WORKERS si renseigné, sinon autant de workers que le quota CPU du conteneur."""
+    return int(os.getenv("API_WORKERS") or 0) or available_cpus()
+
+
+def _bind(host: str, port: int) -> socket.socket:
+    """Socket d'écoute ouverte par le parent et partagée par tous les workers."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: object, sock: socket.socket) -> int:
+    """Boucle uvicorn d'un worker forké ; retourne son code de sortie."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)  # uvicorn installe ses propres handlers
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="on"))
+    stop_snapshots = REGISTRY.start_snapshots()  # Lus par le worker qui reçoit le scrape
+    try:
+        server.run(sockets=[sock])
+    finally:
+        stop_snapshots()
+    return 0 if server.started else STARTUP_FAILURE
+
+
+class _Supervisor:
+    """Workers forkés par le parent : relancés s'ils meurent, arrêtés ensemble au SIGTERM."""
+
+    def __init__(self, app: object, sock: socket.socket) -> None:
+        self.app = app
+        self.sock = sock
+        self.children: set[int] = set()
+        self.stopping = False
+        self.exit_code = 0
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                code = _run_worker(self.app, self.sock)
+            finally:
+                os._exit(code)
+        self.children.add(pid)
+
+    def stop(self, signum: int, frame: object) -> None:
+        self.stopping = True
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+    def reap(self) -> None:
+        """Attend la fin d'un worker, et le relance sauf à l'arrêt ou s'il n'a pas pu démarrer."""
+        pid, status = os.wait()
+        self.children.discard(pid)
+        REGISTRY.remove_snapshot(pid)
+        code = os.waitstatus_to_exitcode(status)
+        if self.stopping:
+            return
+        if code == STARTUP_FAILURE:  # Le modèle ou la télémétrie ne se chargent pas : inutile de relancer en boucle
+            logging.error(f"worker {pid} failed to start, stopping")
+            self.exit_code = STARTUP_FAILURE
+            self.stop(signal.SIGTERM, None)
+            return
+        logging.warning(f"worker {pid} exited with code {code}, restarting")
+        self.spawn()
+
+
+def serve_prefork(host: str, port: int, workers: int) -> int:
+    """Charge le modèle une fois, forke les workers et les supervise jusqu'au SIGTERM."""
+    app = infer.create_app(model=infer.load_model(infer.MODEL_PATH))
+    sock = _bind(host, port)
+    shared_metrics = REGISTRY.directory is None
+    if shared_metrics:  # Un scrape n'atteint qu'un worker : chacun y écrit ses échantillons
+        REGISTRY.directory = Path(tempfile.mkdtemp(prefix="titanic-metrics-"))
+    gc.freeze()  # Objets du parent exclus du GC : les workers ne réécrivent pas les pages partagées
+    supervisor = _Supervisor(app, sock)
+    for _ in range(workers):
+        supervisor.spawn()
+    logging.warning(f"API listening on {host}:{port} with {workers} pre-forked workers")
+    signal.signal(signal.SIGTERM, supervisor.stop)
+    signal.signal(signal.SIGINT, supervisor.stop)
+
+    while supervisor.children:
+        supervisor.reap()
+    sock.close()
+    if shared_metrics:
+        shutil.rmtree(REGISTRY.directory, ignore_errors=True)
+    return supervisor.exit_code
 
 
 def main() -> None:
-    uvicorn.run(infer.app, host="0.0.0.0", port=8080)
+    workers = default_workers()
+    if workers > 1:
+        raise SystemExit(serve_prefork(HOST, PORT, workers))
+    uvicorn.run(infer.app, host=HOST, port=PORT)
 
 
 if __name__ == "__main__":
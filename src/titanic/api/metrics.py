@@ -0,0 +1,282 @@
+"""Métriques agrégées en process (compteurs, jauges, histogrammes) exposées au format texte Prometheus.
+
+Une observation coûte une recherche dichotomique dans les bornes et quelques additions sous un
+verrou : rien n'est exporté par requête, Prometheus lit l'état agrégé sur /metrics. Chaque worker
+a ses propres métriques, étiquetées par son pid.
+
+Avec plusieurs workers pré-forkés, un scrape n'atteint qu'un seul d'entre eux : chaque worker écrit
+donc ses échantillons dans un dossier partagé (METRICS_DIR, créé par le process parent), au plus
+tard toutes les METRICS_SNAPSHOT_SECONDS secondes, et /metrics rend ceux de tous les workers.
+"""
+
+import abc
+import bisect
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+# Bornes en secondes, adaptées à des étapes de l'ordre de la dizaine de µs à la seconde
+LATENCY_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS_SNAPSHOT_SECONDS = float(os.getenv("METRICS_SNAPSHOT_SECONDS", "1.0"))
+
+Sample = tuple[str, dict[str, str], float]  # Suffixe, labels, valeur
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+
+    def _key(self, labels: dict[str, str]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def _samples(self) -> Iterator[Sample]:
+        """Échantillons courants du process, au format texte Prometheus une fois préfixés du nom."""
+
+    def render(self, workers: dict[str, list[Sample]]) -> list[str]:
+        """Lignes de la métrique, avec les échantillons de chaque worker (pid -> échantillons)."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for worker, samples in workers.items():
+            for suffix, labels, value in samples:
+                lines.append(f"{self.name}{suffix}{_format_labels({'worker': worker, **labels})} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "_total", dict(zip(self.labelnames, key, strict=True)), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key, strict=True)), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # Premier bucket dont la borne est >= value
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def _samples(self) -> Iterator[Sample]:
+        with self._lock:
+            items = [(key, (list(counts), total, n)) for key, (counts, total, n) in self._values.items()]
+        for key, (counts, total, n) in items:
+            labels = dict(zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                yield "_bucket", {**labels, "le": str(bound)}, cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, n
+
+
+class Registry:
+    """Ensemble des métriques d'un process, rendues ensemble sur /metrics.
+
+    Avec directory, /metrics rend les échantillons écrits par tous les workers dans ce dossier.
+    """
+
+    def __init__(self, directory: str | None = None) -> None:
+        self._metrics: list[_Metric] = []
+        self.directory = Path(directory) if directory else None
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def _snapshot(self) -> dict[str, list[Sample]]:
+        return {metric.name: list(metric._samples()) for metric in self._metrics}
+
+    def _snapshot_path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def write_snapshot(self) -> None:
+        """Écrit les échantillons du process dans directory/<pid>.json (remplacement atomique)."""
+        path = self._snapshot_path(os.getpid())
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._snapshot()))
+        tmp.replace(path)
+
+    def remove_snapshot(self, pid: int) -> None:
+        """Oublie un worker arrêté (appelé par le process parent)."""
+        if self.directory is not None:
+            self._snapshot_path(pid).unlink(missing_ok=True)
+
+    def start_snapshots(self, interval: float = METRICS_SNAPSHOT_SECONDS) -> Callable[[], None]:
+        """Écrit les échantillons toutes les interval secondes dans un thread ; retourne son arrêt."""
+        stopped = threading.Event()
+
+        def run() -> None:
+            while not stopped.wait(interval):
+                self.write_snapshot()
+
+        threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+        return stopped.set
+
+    def _workers(self) -> dict[str, dict[str, list[Sample]]]:
+        """Échantillons par worker : ceux du process, ou ceux de tous les workers du dossier partagé."""
+        if self.directory is None:
+            return {str(os.getpid()): self._snapshot()}
+        self.write_snapshot()  # Le worker qui répond rend ses valeurs à jour
+        workers = {}
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                workers[path.stem] = json.loads(path.read_text())
+            except FileNotFoundError:  # Worker oublié pendant la lecture
+                continue
+        return workers
+
+    def render(self) -> str:
+        workers = self._workers()  # Workers pré-forkés : une série par process
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render({pid: samples.get(metric.name, []) for pid, samples in workers.items()}))
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry(os.getenv("METRICS_DIR"))
+
+REQUESTS = REGISTRY.register(Counter("titanic_api_requests", "Requêtes traitées", ("path", "status")))
+
+REQUEST_SECONDS = REGISTRY.register(Histogram("titanic_api_request_seconds", "Durée totale des requêtes", ("path",)))
+
+DECODE_AUTH_SECONDS = REGISTRY.register(
+    Histogram("titanic_api_decode_auth_seconds", "Lecture, validation du corps et authentification", ("path",))
+)
+
+ENCODE_SECONDS = REGISTRY.register(Histogram("titanic_api_encode_seconds", "Encodage des features", ("path",)))
+
+PREDICT_SECONDS = REGISTRY.register(Histogram("titanic_api_predict_seconds", "Appel au modèle", ("path",)))
+
+BATCH_SIZE = REGISTRY.register(
+    Histogram("titanic_api_batch_size", "Passagers par appel au modèle", ("path",), buckets=BATCH_SIZE_BUCKETS)
+)
+
+CACHE_REQUESTS = REGISTRY.register(Counter("titanic_api_cache_requests", "Accès aux caches", ("cache", "result")))
+
+COALESCED_REQUESTS = REGISTRY.register(
+    Counter("titanic_api_coalesced_requests", "Requêtes servies par une évaluation identique déjà en cours", ("path",))
+)
+
+SHED_REQUESTS = REGISTRY.register(
+    Counter("titanic_api_shed_requests", "Requêtes refusées par le contrôle d'admission", ("reason",))
+)
+
+QUEUE_SECONDS = REGISTRY.register(
+    Histogram("titanic_api_admission_queue_seconds", "Attente d'une place d'exécution dans la file d'admission")
+)
+
+MODEL_INFO = REGISTRY.register(Gauge("titanic_api_model_info", "Version du modèle servi", ("version",)))
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : durée et statut de chaque requête, et heure d'arrivée pour les étapes suivantes.
+
+    Le chemin est celui de la route (et non l'URL brute) pour borner le nombre de séries.
+    """
+
+    def __init__(self, app: object) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: object, send: object) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        scope.setdefault("state", {})["request_start"] = start  # Lu via request.state.request_start
+        status = 500
+
+        async def send_with_status(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "other")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, path=path)
+            REQUESTS.inc(path=path, status=str(status))
@@ -0,0 +1,108 @@
+"""Scoring en flux NDJSON : un passager JSON par ligne en entrée, une prédiction par ligne en sortie.
+
+Le corps est lu au fil de l'eau. Les lignes complètes reçues sont prédites par tranches d'au plus
+CHUNK_ROWS (un appel au modèle par tranche) et les résultats envoyés avant de lire la suite : la
+lecture n'avance qu'au rythme où le client consomme la réponse (contrôle de flux TCP de bout en bout),
+et la mémoire du serveur reste bornée par une tranche, quelle que soit la durée du flux. Le client
+doit donc lire la réponse pendant qu'il envoie (client full-duplex), sinon les deux côtés se bloquent.
+"""
+
+import os
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+import orjson
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON = "application/x-ndjson"
+
+CONTENT_TYPES = (NDJSON, "application/ndjson", "application/jsonl")
+
+CHUNK_ROWS = int(os.getenv("NDJSON_CHUNK_ROWS", "1024"))
+
+MAX_LINE_BYTES = 64 * 1024
+
+OPENAPI_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {content_type: {"schema": {"type": "string"}} for content_type in CONTENT_TYPES},
+    }
+}
+
+
+class LineTooLongError(ValueError):
+    """Une ligne dépasse MAX_LINE_BYTES sans retour à la ligne."""
+
+
+def media_type(content_type: str | None) -> str:
+    """Type du corps sans paramètres ; ValueError s'il n'est pas NDJSON."""
+    value = (content_type or "").split(";", 1)[0].strip().lower()
+    if value not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported content type '{value}', expected one of {CONTENT_TYPES}")
+    return value
+
+
+async def line_chunks(body: AsyncIterator[bytes], size: int) -> AsyncIterator[list[bytes]]:
+    """Tranches d'au plus size lignes non vides, dès leur réception (sans attendre qu'une tranche soit pleine)."""
+    pending = b""  # Début de la ligne en cours de réception
+    async for piece in body:
+        *lines, pending = (pending + piece).split(b"\n")
+        if len(pending) > MAX_LINE_BYTES:
+            raise LineTooLongError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        lines = [line for line in lines if line.strip()]
+        for start in range(0, len(lines), size):
+            yield lines[start : start + size]
+    if pending.strip():
+        yield [pending]
+
+
+def score_lines(lines: list[bytes], parse: Callable[[bytes], dict], predict: Callable[[list[dict]], object]) -> bytes:
+    """Prédictions d'une tranche en NDJSON, dans l'ordre des lignes.
+
+    Une ligne invalide donne une ligne {"error": ...} sans interrompre le flux ; les autres sont prédites ensemble.
+    """
+    rows, errors = [], {}
+    for i, line in enumerate(lines):
+        try:
+            rows.append(parse(line))
+        except ValueError as e:  # JSON illisible ou passager invalide (ValidationError)
+            errors[i] = str(e)
+    predictions = iter(predict(rows) if rows else ())
+    out = [
+        orjson.dumps({"error": errors[i]} if i in errors else {"prediction": int(next(predictions))})
+        for i in range(len(lines))
+    ]
+    return b"\n".join(out) + b"\n"
+
+
+async def stream_predictions(
+    body: AsyncIterator[bytes], score: Callable[[list[bytes]], Awaitable[bytes]]
+) -> AsyncIterator[bytes]:
+    """Réponse NDJSON : une tranche de prédictions par tranche de lignes reçue.
+
+    Une ligne trop longue termine le flux par une ligne d'erreur ; une déconnexion du client l'arrête.
+    """
+    try:
+        async for lines in line_chunks(body, CHUNK_ROWS):
+            yield await score(lines)
+    except LineTooLongError as e:
+        yield orjson.dumps({"error": str(e)}) + b"\n"
+    except ClientDisconnect:
+        return
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse qui laisse le corps de la requête à l'endpoint pendant l'envoi de la réponse.
+
+    Avec un serveur ASGI < 2.4 (uvicorn), Starlette lit receive() en parallèle pour détecter la
+    déconnexion et consommerait le corps : ici, la déconnexion est vue par request.stream().
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as e:
+            raise ClientDisconnect from e
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,203 @@
+"""Cache local des artefacts mlflow, adressé par contenu, partagé entre les étapes, la CI et les process.
+
+Une clé (URI de l'artefact : runs:/<run_id>/<chemin>, models:/<model_id>) pointe, via refs/, vers un
+objet objects/<sha256> : le même contenu n'est stocké qu'une fois, quelle que soit la clé. Un artefact
+qu'un run vient d'uploader y est ajouté par put : les étapes suivantes le relisent sans aller-retour
+vers le serveur de tracking. Les autres sont téléchargés au premier fetch, une seule fois même si
+plusieurs process le demandent en même temps (verrou fichier par clé).
+
+Seules ces URI immuables sont mises en cache : models:/<nom>@<alias> ou models:/<nom>/latest changent
+de cible sans changer d'URI, elles sont téléchargées à chaque fetch.
+
+Les fichiers sont copiés à l'entrée du cache, jamais liés : réécrire le fichier d'origine ne change
+pas l'objet, dont les fichiers sont en lecture seule.
+
+Au-delà de ARTIFACT_CACHE_MAX_BYTES (5 Gio par défaut), les objets les moins récemment lus sont
+supprimés ; ARTIFACT_CACHE_MAX_BYTES=0 désactive le cache. Le dossier est ARTIFACT_CACHE_DIR
+(~/.cache/titanic/artifacts par défaut).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import functools
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_DIR = Path.home() / ".cache" / "titanic" / "artifacts"
+
+DEFAULT_MAX_BYTES = 5 * 1024**3
+
+EVICTION_GRACE_SECONDS = 60  # Un objet lu depuis moins longtemps peut être en cours de lecture par un autre process
+
+IMMUTABLE_URI = re.compile(r"runs:/[^/]+/.+|models:/m-[^/@]+")  # Artefact d'un run, modèle désigné par son id
+
+
+def _tree_digest(path: Path) -> str:
+    """sha256 des chemins relatifs et du contenu de tous les fichiers du dossier."""
+    digest = hashlib.sha256()
+    for file in sorted(p for p in path.rglob("*") if p.is_file()):
+        digest.update(str(file.relative_to(path)).encode() + b"\0")
+        with file.open("rb") as f:
+            digest.update(hashlib.file_digest(f, "sha256").digest())
+    return digest.hexdigest()
+
+
+def _tree_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def _copy(source: Path, target: Path) -> None:
+    """Place une copie de source (fichier ou dossier) en target : aucun inode partagé avec l'appelant."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if source.is_dir():
+        shutil.copytree(source, target)
+    else:
+        shutil.copy2(source, target)
+
+
+def _make_read_only(path: Path) -> None:
+    """Fichiers en lecture seule ; les dossiers restent modifiables pour que l'éviction puisse les supprimer."""
+    for file in (p for p in path.rglob("*") if p.is_file()):
+        file.chmod(0o444)
+
+
+@contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    """Verrou exclusif entre process (flock), relâché à la fermeture du fichier."""
+    with path.open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+class ArtifactCache:
+    """Cache en lecture (read-through) : fetch retourne le chemin local, en téléchargeant si besoin."""
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _ref(self, key: str) -> Path:
+        return self.root / "refs" / hashlib.sha256(key.encode()).hexdigest()
+
+    def _staging(self) -> Path:
+        """Dossier temporaire dans le cache : même système de fichiers, donc rename atomique vers objects/."""
+        for name in ("objects", "refs", "locks", "tmp"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix="staging-", dir=self.root / "tmp"))
+
+    def lookup(self, key: str) -> str | None:
+        """Chemin local de l'artefact de key s'il est en cache ; marque son objet comme récemment lu."""
+        try:
+            digest, relative = self._ref(key).read_text().split("\n", 1)
+            obj = self.root / "objects" / digest
+            os.utime(obj)  # Date d'accès pour l'éviction LRU (atime n'est pas fiable avec noatime/relatime)
+        except (FileNotFoundError, ValueError):  # Clé inconnue, ou objet évincé depuis
+            return None
+        return str(obj / relative)
+
+    def fetch(self, key: str, download: Callable[[str], str]) -> str:
+        """Chemin local de l'artefact de key ; en cas d'absence, download(dossier) le télécharge dans dossier."""
+        if self.max_bytes <= 0 or not IMMUTABLE_URI.fullmatch(key):
+            return _download_uncached(key, download)
+        cached = self.lookup(key)
+        if cached is not None:
+            return cached
+        staging = self._staging()
+        try:
+            with _locked(self.root / "locks" / self._ref(key).name):  # Un seul téléchargement par clé
+                cached = self.lookup(key)  # Téléchargé par un autre process pendant l'attente du verrou
+                if cached is not None:
+                    return cached
+                data = staging / "data"
+                data.mkdir()
+                downloaded = Path(download(str(data)))
+                if not downloaded.is_relative_to(data):  # Client qui retourne un fichier déjà local
+                    _copy(downloaded, data / downloaded.name)
+                    downloaded = data / downloaded.name
+                logging.warning(f"artifact {key} downloaded to cache")
+                return self._insert(key, data, downloaded.relative_to(data))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def put(self, key: str, local_path: str) -> str:
+        """Ajoute un fichier local sous key (ex: artefact que le run vient d'uploader) ; retourne sa copie en cache."""
+        if self.max_bytes <= 0 or not IMMUTABLE_URI.fullmatch(key):
+            return local_path
+        staging = self._staging()
+        try:
+            data = staging / "data"
+            _copy(Path(local_path), data / Path(local_path).name)
+            return self._insert(key, data, Path(Path(local_path).name))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _insert(self, key: str, data: Path, relative: Path) -> str:
+        """Range data sous objects/<sha256>, fait pointer key dessus, puis évince si besoin."""
+        digest = _tree_digest(data)
+        obj = self.root / "objects" / digest
+        _make_read_only(data)
+        with _locked(self.root / "locks" / "index"):
+            if obj.exists():  # Même contenu déjà en cache sous une autre clé
+                os.utime(obj)
+            else:
+                data.rename(obj)
+            ref = self._ref(key)
+            tmp_ref = ref.with_name(f"{ref.name}.{os.getpid()}")
+            tmp_ref.write_text(f"{digest}\n{relative}")
+            tmp_ref.replace(ref)
+            self._evict(keep=obj)
+        return str(obj / relative)
+
+    def _evict(self, keep: Path) -> None:
+        """Supprime les objets les moins récemment lus tant que le cache dépasse max_bytes."""
+        objects = [(obj.stat().st_mtime, _tree_size(obj), obj) for obj in (self.root / "objects").iterdir()]
+        total = sum(size for _, size, _ in objects)
+        recent = time.time() - EVICTION_GRACE_SECONDS
+        for mtime, size, obj in sorted(objects):
+            if total <= self.max_bytes:
+                break
+            if obj == keep or mtime > recent:
+                continue
+            shutil.rmtree(obj, ignore_errors=True)
+            total -= size
+            logging.warning(f"artifact cache: evicted {obj.name} ({size} bytes)")
+
+
+@functools.cache
+def _uncached_dir() -> tempfile.TemporaryDirectory:
+    """Dossier des téléchargements hors cache du process, supprimé à sa sortie."""
+    return tempfile.TemporaryDirectory(prefix="artifact-")
+
+
+def _download_uncached(key: str, download: Callable[[str], str]) -> str:
+    """Télécharge hors cache dans un dossier par clé, vidé au fetch suivant de la même clé et à la sortie."""
+    dst_path = Path(_uncached_dir().name, hashlib.sha256(key.encode()).hexdigest())
+    shutil.rmtree(dst_path, ignore_errors=True)
+    dst_path.mkdir()
+    return download(str(dst_path))
+
+
+def get_cache() -> ArtifactCache:
+    """Cache configuré par ARTIFACT_CACHE_DIR et ARTIFACT_CACHE_MAX_BYTES (lues à chaque appel)."""
+    root = Path(os.getenv("ARTIFACT_CACHE_DIR", str(DEFAULT_DIR)))
+    return ArtifactCache(root, int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES))))
+
+
+def download_uri(artifact_uri: str) -> str:
+    """mlflow.artifacts.download_artifacts à travers le cache ; l'URI est la clé."""
+
+    def download(dst_path: str) -> str:
+        import mlflow  # noqa: PLC0415
+
+        return mlflow.artifacts.download_artifacts(artifact_uri=artifact_uri, dst_path=dst_path)
+
+    return get_cache().fetch(artifact_uri, download)
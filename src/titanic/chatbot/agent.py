@@ -6,13 +6,10 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from pydantic import SecretStr
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter as HTTPSpanExporter
-from opentelemetry.sdk.resources import Resource
 from opentelemetry.propagate import inject, set_global_textmap
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from traceloop.sdk import Traceloop
+from titanic import telemetry
 
 SYSTEM_PROMPT = """You are a helpful assistant that predicts Titanic passenger survival.
 
@@ -32,26 +29,19 @@ Examples:
 Be friendly and explain predictions clearly."""
 
 
-JAEGER_ENDPOINT = os.getenv("JAEGER_ENDPOINT", "http://jaeger.willemanmariepro-dev.svc.cluster.local:4318/v1/traces")
-
 set_global_textmap(TraceContextTextMapPropagator())
 
-resource = Resource(attributes={"service.name": "titanic-chatbot"})
-provider = TracerProvider(resource=resource)
-_jaeger_exporter = HTTPSpanExporter(endpoint=JAEGER_ENDPOINT)
-processor = BatchSpanProcessor(_jaeger_exporter)
-provider.add_span_processor(processor)
-trace.set_tracer_provider(provider)
-
-Traceloop.init(
-    app_name="titanic-chatbot",
-    exporter=_jaeger_exporter,
-    disable_batch=False,
-    telemetry_enabled=False,
-)
+if telemetry.configure("titanic-chatbot") is not None:  # Instrumentation LLM seulement si la télémétrie est active
+    Traceloop.init(
+        app_name="titanic-chatbot",
+        exporter=telemetry.otlp_exporter(),
+        disable_batch=False,
+        telemetry_enabled=False,
+    )
 
 tracer = trace.get_tracer(__name__)
 
+
 def _make_otel_headers() -> dict[str, str]:
     """Injecte le traceparent W3C dans un dict de headers."""
     headers: dict[str, str] = {}
@@ -77,8 +67,8 @@ class ChatbotAgent:
             base_url=os.getenv("OPENAI_BASE_URL", "https://models.github.ai/inference"),
             temperature=0.7,
         )
+
     async def chat_async(self, message: str) -> str:
-        
         # DONE : Créer le client MCP avec la configuration définie dans le constructeur
         # DONE : Récupérer les outils disponibles depuis le client MCP
         # DONe : Lier les outils au LLM pour obtenir un LLM capable d'utiliser les outils
@@ -86,7 +76,7 @@ class ChatbotAgent:
         # DONE : Invoquer le LLM avec les messages construits
         # DONE : Vérifier si une tool a été appelée dans la réponse
         # DONE : Retourner le résultat du tool si c'est la réponse du llm, sinon, sa réponse générée.
-        
+
         """Chat async utilisant l'adaptateur MCP Langchain officiel."""
 
         with tracer.start_as_current_span("chatbot.chat") as span:
@@ -1,27 +1,113 @@
+"""Recherche du dernier modèle d'une expérience mlflow et pré-téléchargement local, pour la CI et le déploiement.
+
+    python -m titanic.ci.search_mlflow uri --experiment_name titanic [--metric roc_auc]
+    python -m titanic.ci.search_mlflow prefetch --experiment_name titanic --output_dir ./src/titanic/api/resources/
+
+prefetch range les artefacts du modèle dans le cache local partagé (titanic.artifact_cache), adressé
+par leur contenu : un modèle déjà présent n'est pas retéléchargé au build suivant.
+"""
+
+import functools
 import logging
+import shutil
+from pathlib import Path
 
 import fire
 import mlflow
 from mlflow.entities import Run
 
+from titanic.artifact_cache import ArtifactCache, get_cache
+
+SEARCH_PAGE = 10  # Runs lus par requête ; les pages suivantes ne sont lues que si aucun run de la page n'a de modèle
+
+
+def _experiment_id(experiment_name: str) -> str:
+    """Retourne l'identifiant de l'expérience experiment_name."""
+    experiment = mlflow.get_experiment_by_name(experiment_name)
+    if experiment is None:
+        raise ValueError(f"Experiment {experiment_name!r} not found on {mlflow.get_tracking_uri()}")
+    return dict(experiment)["experiment_id"]
+
+
+def _first_run_with_model(experiment_id: str, order_by: list[str]) -> Run | None:
+    """Premier run terminé, dans l'ordre order_by, qui a loggé un modèle ; lit les runs page par page.
+
+    Les runs sans modèle (parents, échecs de validate, métrique absente) peuvent remplir une page
+    entière : la recherche continue avec le page_token tant qu'il en reste.
+    """
+    client = mlflow.MlflowClient()
+    page_token = None
+    while True:
+        runs = client.search_runs(
+            [experiment_id],
+            filter_string="attributes.status = 'FINISHED'",
+            max_results=SEARCH_PAGE,
+            order_by=order_by,
+            page_token=page_token,
+        )
+        run = next((run for run in runs if run.outputs and run.outputs.model_outputs), None)
+        if run is not None or not runs.token:
+            return run
+        page_token = runs.token
 
-def get_last_model_uri(experiment_name: str) -> str:
+
+def get_last_model_uri(experiment_name: str, metric: str | None = None, ascending: bool = False) -> str:
+    """URI models:/ du modèle du dernier run terminé, ou du meilleur selon metric.
+
+    Les runs retournés par search_runs portent déjà leurs modèles (outputs) : pas de get_run par run.
+    """
     logging.warning(f"experiment_name: {experiment_name}")
-    current_experiment = dict(mlflow.get_experiment_by_name(experiment_name))
-    experiment_id = current_experiment['experiment_id']
-    runs: list[Run] = mlflow.search_runs(
-        [experiment_id],
-        filter_string="attributes.status = 'FINISHED'",
-        max_results=1,
-        order_by=["attributes.end_time DESC"],
-        output_format="list"
-    )
-    run = mlflow.get_run(runs[0].info.run_id)
+    experiment_id = _experiment_id(experiment_name)
+    order_by = ["attributes.end_time DESC"]
+    if metric:
+        order_by.insert(0, f"metrics.{metric} {'ASC' if ascending else 'DESC'}")
+    run = _first_run_with_model(experiment_id, order_by)
+    if run is None:
+        raise ValueError(f"No finished run with a logged model in experiment {experiment_name!r}")
     logging.warning(f"Found model id: {run.outputs.model_outputs[0].model_id}")
     model_uri = f"models:/{run.outputs.model_outputs[0].model_id}"
     logging.warning(f"Returning: {model_uri}")
     return model_uri
 
 
+def _download(model_uri: str, dst_path: str) -> str:
+    return mlflow.artifacts.download_artifacts(artifact_uri=model_uri, dst_path=dst_path)
+
+
+def _copy_tree(source: Path, destination: Path) -> None:
+    """Place une copie modifiable des fichiers de source dans destination ; l'objet en cache reste intact."""
+    for file in (p for p in source.rglob("*") if p.is_file()):
+        target = destination / file.relative_to(source)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.unlink(missing_ok=True)
+        shutil.copyfile(file, target)
+
+
+def prefetch(
+    experiment_name: str | None = None,
+    model_uri: str | None = None,
+    metric: str | None = None,
+    cache_dir: str | None = None,
+    output_dir: str | None = None,
+) -> str:
+    """Télécharge les artefacts du modèle dans le cache local s'ils n'y sont pas ; retourne leur dossier.
+
+    cache_dir remplace ARTIFACT_CACHE_DIR. Avec output_dir, les fichiers y sont aussi copiés (ex: ressources
+    de l'image de l'API).
+    """
+    if model_uri is None:
+        if experiment_name is None:
+            raise ValueError("prefetch needs experiment_name or model_uri")
+        model_uri = get_last_model_uri(experiment_name, metric)
+    cache = get_cache()
+    if cache_dir is not None:
+        cache = ArtifactCache(Path(cache_dir), cache.max_bytes)
+    local_path = Path(cache.fetch(model_uri, functools.partial(_download, model_uri)))
+    logging.warning(f"{model_uri} available in {local_path}")
+    if output_dir is not None:
+        _copy_tree(local_path, Path(output_dir))
+    return str(local_path)
+
+
 if __name__ == "__main__":
-    fire.Fire(get_last_model_uri)
+    fire.Fire({"uri": get_last_model_uri, "prefetch": prefetch})
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import httpx
 from fastmcp import FastMCP
@@ -7,24 +8,17 @@ from fastmcp.server.dependencies import get_http_headers
 from starlette.requests import Request
 from starlette.responses import JSONResponse, Response
 from opentelemetry import context as otel_context, trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter as HTTPSpanExporter
-from opentelemetry.sdk.resources import Resource
 from opentelemetry.propagate import extract, inject, set_global_textmap
 from opentelemetry.propagators.composite import CompositePropagator
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from titanic import profiling, telemetry
 from titanic.mcp_server.auth import token_manager
+from titanic.telemetry import TRACING_LEAN
 
 
 API_URL = os.getenv("TITANIC_API_URL", "http://titanic-api-service.willemanmariepro-dev.svc.cluster.local:8080")
-JAEGER_ENDPOINT = os.getenv("JAEGER_ENDPOINT", "http://jaeger.willemanmariepro-dev.svc.cluster.local:4318/v1/traces")
 
-resource = Resource(attributes={"service.name": "titanic-mcp-server"})
-provider = TracerProvider(resource=resource)
-processor = BatchSpanProcessor(HTTPSpanExporter(endpoint=JAEGER_ENDPOINT))
-provider.add_span_processor(processor)
-trace.set_tracer_provider(provider)
+telemetry.configure("titanic-mcp-server")
 set_global_textmap(CompositePropagator([TraceContextTextMapPropagator()]))
 
 tracer = trace.get_tracer(__name__)
@@ -32,6 +26,7 @@ tracer = trace.get_tracer(__name__)
 # dONE : Créer le server MCP avec le bon nom : "titanic-mcp-server"
 mcp = FastMCP("titanic-mcp-server")
 
+
 class OtelMiddleware(Middleware):
     """Extrait le traceparent W3C des headers HTTP entrants via le middleware FastMCP natif."""
 
@@ -47,6 +42,7 @@ class OtelMiddleware(Middleware):
 
 mcp.add_middleware(OtelMiddleware())
 
+
 # DONE : déclarer cette fonction en tant que tool
 @mcp.tool()
 async def predict_survival(pclass: int, sex: str, sibsp: int, parch: int) -> str:
@@ -64,12 +60,14 @@ async def predict_survival(pclass: int, sex: str, sibsp: int, parch: int) -> str
 
     """
     # DONE : Implémenter l'appel http sécurisé avec oAuth2 vers l'API titanic
-    #return "Tool not implemented yet"
+    # return "Tool not implemented yet"
     with tracer.start_as_current_span("mcp.predict_survival") as span:
-        span.set_attribute("passenger.pclass", pclass)
-        span.set_attribute("passenger.sex", sex)
-        span.set_attribute("passenger.sibsp", sibsp)
-        span.set_attribute("passenger.parch", parch)
+        detailed = span.is_recording() and not TRACING_LEAN
+        if detailed:
+            span.set_attribute("passenger.pclass", pclass)
+            span.set_attribute("passenger.sex", sex)
+            span.set_attribute("passenger.sibsp", sibsp)
+            span.set_attribute("passenger.parch", parch)
 
         try:
             payload = {"pclass": pclass, "sex": sex, "sibSp": sibsp, "parch": parch}
@@ -88,7 +86,8 @@ async def predict_survival(pclass: int, sex: str, sibsp: int, parch: int) -> str
 
             prediction = result[0] if isinstance(result, list) else result
             survived = bool(prediction)
-            span.set_attribute("prediction.result", int(prediction))
+            if detailed:
+                span.set_attribute("prediction.result", int(prediction))
 
             if survived:
                 return (
@@ -111,9 +110,37 @@ async def health_check(request: Request) -> Response:
     return JSONResponse({"status": "healthy"})
 
 
+async def _profile(request: Request, kind: str, extension: str, run: Callable[[float], str]) -> Response:
+    """Capture de profil réservée au porteur de PROFILING_TOKEN, exécutée hors de la boucle asyncio."""
+    if not profiling.authorized(request.headers.get("authorization")):
+        return JSONResponse({"detail": "Admin token required"}, status_code=403)
+    try:
+        content = await asyncio.to_thread(run, float(request.query_params.get("seconds", "10")))
+    except ValueError as e:
+        return JSONResponse({"detail": str(e)}, status_code=400)
+    except profiling.ProfilingBusyError as e:
+        return JSONResponse({"detail": str(e)}, status_code=409)
+    return Response(content, media_type="text/plain", headers=profiling.attachment(kind, extension))
+
+
+async def profile_cpu(request: Request) -> Response:
+    """Profil échantillonné des threads du serveur MCP, au format folded (flame graph)."""
+    return await _profile(request, "cpu", "folded", profiling.cpu_profile)
+
+
+async def profile_memory(request: Request) -> Response:
+    """Allocations tracemalloc du serveur MCP pendant la capture, par site d'allocation."""
+    return await _profile(request, "memory", "txt", profiling.allocation_profile)
+
+
+if profiling.enabled():  # Opt-in : aucune route d'administration par défaut
+    mcp.custom_route("/admin/profile/cpu", methods=["GET"])(profile_cpu)
+    mcp.custom_route("/admin/profile/memory", methods=["GET"])(profile_memory)
+
+
 if __name__ == "__main__":
     # DONE : Démarrer le server web en local, sur le port 8080, en transport streamable-http
-    #print("toto")
+    # print("toto")
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", "8000"))
-    mcp.run(transport="streamable-http", host=host, port=port, path="/mcp")
\ No newline at end of file
+    mcp.run(transport="streamable-http", host=host, port=port, path="/mcp")
@@ -0,0 +1,116 @@
+"""Profils à la demande des services en production : échantillonnage des piles et allocations tracemalloc.
+
+Les routes d'administration qui s'en servent ne sont montées qu'avec PROFILING_ENABLED=true : sans
+capture en cours, aucun thread, hook ni traçage ne tourne. Une seule capture à la fois par process ;
+avec des workers pré-forkés, seul le worker qui reçoit la requête est profilé.
+"""
+
+import collections
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from types import FrameType
+
+MAX_SECONDS = 60.0
+
+SAMPLE_INTERVAL = 0.005  # 200 échantillons par seconde
+
+TRACEBACK_FRAMES = 10
+
+_busy = threading.Lock()
+
+
+class ProfilingBusyError(RuntimeError):
+    """Une capture est déjà en cours dans ce process."""
+
+
+def enabled() -> bool:
+    """Vrai si les routes de profilage doivent être montées (PROFILING_ENABLED=true)."""
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+
+
+def authorized(authorization: str | None) -> bool:
+    """Vérifie le header Authorization contre PROFILING_TOKEN (refus si aucun token n'est configuré)."""
+    expected = os.getenv("PROFILING_TOKEN")
+    if not expected or not authorization:
+        return False
+    return hmac.compare_digest(authorization, f"Bearer {expected}")
+
+
+def attachment(kind: str, extension: str) -> dict[str, str]:
+    """Headers de téléchargement, nommés d'après le process et l'heure de la capture."""
+    timestamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    return {"Content-Disposition": f'attachment; filename="{kind}-{os.getpid()}-{timestamp}.{extension}"'}
+
+
+def _check_duration(seconds: float) -> None:
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f"Profiling duration must be in ]0, {MAX_SECONDS}] seconds, got {seconds}")
+
+
+@contextmanager
+def _exclusive() -> Iterator[None]:
+    if not _busy.acquire(blocking=False):
+        raise ProfilingBusyError("A profile is already being captured in this process")
+    try:
+        yield
+    finally:
+        _busy.release()
+
+
+def _folded_stack(frame: FrameType | None) -> str:
+    names = []
+    while frame is not None:
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def cpu_profile(seconds: float, interval: float = SAMPLE_INTERVAL) -> str:
+    """Échantillonne les piles de tous les threads pendant seconds, au format folded des flame graphs.
+
+    Chaque ligne vaut « thread;module.fonction;... nombre_d'échantillons ». L'échantillonnage est en
+    temps réel : un thread bloqué (attente réseau, sleep) apparaît aussi, dans sa fonction d'attente.
+    """
+    _check_duration(seconds)
+    with _exclusive():
+        me = threading.get_ident()
+        counts: collections.Counter[str] = collections.Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != me:  # Le thread d'échantillonnage lui-même
+                    counts[f"{names.get(ident, ident)};{_folded_stack(frame)}"] += 1
+            time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def allocation_profile(seconds: float, limit: int = 50) -> str:
+    """Trace les allocations pendant seconds ; rapport des sites qui retiennent le plus de mémoire.
+
+    Seules les allocations faites pendant la capture et encore vivantes à la fin sont comptées.
+    """
+    _check_duration(seconds)
+    with _exclusive():
+        if tracemalloc.is_tracing():
+            raise ProfilingBusyError("tracemalloc is already tracing in this process")
+        tracemalloc.start(TRACEBACK_FRAMES)
+        try:
+            time.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    stats = snapshot.statistics("traceback")
+    lines = [f"# {seconds:g}s, {current / 2**20:.2f} MiB retained, peak {peak / 2**20:.2f} MiB, top {limit} sites"]
+    for stat in stats[:limit]:
+        lines.append(f"size={stat.size / 1024:.1f} KiB count={stat.count}")
+        lines.extend(stat.traceback.format())
+    return "\n".join(lines) + "\n"
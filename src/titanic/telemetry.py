@@ -0,0 +1,120 @@
+"""Télémétrie OTEL commune à l'API, au serveur MCP et au chatbot.
+
+configure() installe une seule fois par process le provider du service. L'export OTLP part vers
+JAEGER_ENDPOINT, ou à défaut vers les variables standard OTEL_EXPORTER_OTLP_*. L'échantillonnage et
+les tailles de file / de lot suivent OTEL_TRACES_SAMPLER(_ARG) et OTEL_BSP_*. Avec
+OTEL_SDK_DISABLED=true, le SDK n'est ni importé ni installé : les tracers restent ceux, no-op, de
+l'API OTEL. shutdown() vide la file avant l'arrêt du process.
+
+Mesure du coût de démarrage et par span : python -m titanic.telemetry --spans 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from opentelemetry import trace
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+
+# Mode lean : aucun attribut ni événement par passager sur les spans d'inférence (moins de CPU et de volume exporté)
+TRACING_LEAN = os.getenv("TRACING_LEAN", "false").lower() == "true"
+
+_lock = threading.Lock()
+
+_state: dict[str, TracerProvider] = {}  # "provider" : provider installé par configure
+
+
+def enabled() -> bool:
+    """Faux si OTEL_SDK_DISABLED=true : aucun span n'est enregistré ni exporté."""
+    return os.getenv("OTEL_SDK_DISABLED", "false").lower() != "true"
+
+
+def otlp_exporter() -> SpanExporter:
+    """Exporteur OTLP/HTTP vers JAEGER_ENDPOINT, sinon vers la destination OTEL_EXPORTER_OTLP_* du SDK."""
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=os.getenv("JAEGER_ENDPOINT") or None)
+
+
+def configure(service_name: str, exporter: SpanExporter | None = None) -> TracerProvider | None:
+    """Installe le provider du process au premier appel et le retourne ; None si la télémétrie est désactivée.
+
+    exporter remplace l'export OTLP (InMemorySpanExporter dans les tests).
+    """
+    with _lock:
+        if "provider" in _state or not enabled():
+            return _state.get("provider")
+        start = time.perf_counter()
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+        provider.add_span_processor(BatchSpanProcessor(exporter or otlp_exporter()))
+        trace.set_tracer_provider(provider)
+        atexit.register(shutdown)  # Services sans hook d'arrêt (MCP, chatbot)
+        _state["provider"] = provider
+    logging.info(f"Telemetry for {service_name} configured in {time.perf_counter() - start:.3f}s")
+    return provider
+
+
+def shutdown() -> None:
+    """Vide la file des spans puis arrête le provider ; sans effet s'il n'y en a pas."""
+    with _lock:
+        provider = _state.pop("provider", None)
+    if provider is not None:
+        provider.shutdown()
+
+
+def span_overhead(tracer: trace.Tracer, n_spans: int) -> float:
+    """Coût moyen en µs d'un span d'inférence (4 attributs et un événement) avec ce tracer."""
+    start = time.perf_counter()
+    for i in range(n_spans):
+        with tracer.start_as_current_span("model_inference") as span:
+            if span.is_recording():
+                span.set_attributes({"passenger.pclass": 1, "passenger.sex": "female", "passenger.sibsp": i})
+                span.set_attribute("passenger.parch", 0)
+                span.add_event("prediction_completed", {"result": 1})
+    return (time.perf_counter() - start) / n_spans * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=20000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()  # Import du SDK et de l'exporteur OTLP compris
+    configure("titanic-telemetry-benchmark")
+    report = {"enabled": enabled(), "configure_seconds": time.perf_counter() - start, "span_us": {}}
+    shutdown()
+
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+    from opentelemetry.sdk.trace.sampling import ALWAYS_OFF, ALWAYS_ON
+
+    tracers = {
+        "noop": trace.NoOpTracerProvider().get_tracer(__name__),
+        "sampled_out": TracerProvider(sampler=ALWAYS_OFF).get_tracer(__name__),
+    }
+    sampled = TracerProvider(sampler=ALWAYS_ON)
+    sampled.add_span_processor(BatchSpanProcessor(InMemorySpanExporter()))
+    tracers["sampled"] = sampled.get_tracer(__name__)
+    for name, tracer in tracers.items():
+        report["span_us"][name] = span_overhead(tracer, args.spans)
+    sampled.shutdown()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""Évaluation vectorisée d'un classifieur binaire à partir des probabilités prédites.
+
+Toutes les métriques sont dérivées d'un seul tableau de probabilités (une seule passe de
+predict_proba) : matrice de confusion, accuracy, ROC-AUC, log-loss, Brier et calibration.
+StreamingEvaluation calcule les mêmes métriques chunk par chunk, en mémoire bornée.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from titanic.cgroup import available_cpus
+
+EPSILON = 1e-15
+
+BOOTSTRAP_METRICS = ("accuracy", "roc_auc", "log_loss")
+
+SCORE_BINS = 2**16  # Histogramme des scores du mode streaming : ROC-AUC à 1/65536 près
+
+BOOTSTRAP_SAMPLE_SIZE = 100_000  # Lignes gardées pour le bootstrap en mode streaming
+
+
+def _roc_auc(y_true: np.ndarray, proba: np.ndarray) -> float:
+    """ROC-AUC par la statistique de Mann-Whitney (rangs moyens en cas d'égalité)."""
+    from scipy.stats import rankdata
+
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+    ranks = rankdata(proba)
+    return float((ranks[y_true == 1].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg))
+
+
+def _log_loss(y_true: np.ndarray, proba: np.ndarray) -> float:
+    p = np.clip(proba, EPSILON, 1 - EPSILON)
+    return float(-np.mean(y_true * np.log(p) + (1 - y_true) * np.log(1 - p)))
+
+
+def _calibration_sums(y_true: np.ndarray, proba: np.ndarray, n_bins: int) -> np.ndarray:
+    """Effectif, somme des probabilités et nombre de positifs par tranche de probabilité."""
+    bins = np.minimum((proba * n_bins).astype(np.int64), n_bins - 1)
+    return np.stack(
+        [
+            np.bincount(bins, minlength=n_bins),
+            np.bincount(bins, weights=proba, minlength=n_bins),
+            np.bincount(bins, weights=y_true, minlength=n_bins),
+        ]
+    )
+
+
+def _calibration_table(sums: np.ndarray) -> dict[str, list]:
+    counts, proba_sums, positives = sums
+    n_bins = len(counts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_predicted = np.where(counts > 0, proba_sums / counts, np.nan)
+        observed_rate = np.where(counts > 0, positives / counts, np.nan)
+    return {
+        "bin_edges": np.linspace(0, 1, n_bins + 1).tolist(),
+        "count": counts.astype(np.int64).tolist(),
+        "mean_predicted": [None if np.isnan(v) else float(v) for v in mean_predicted],
+        "observed_rate": [None if np.isnan(v) else float(v) for v in observed_rate],
+    }
+
+
+def calibration_bins(y_true: np.ndarray, proba: np.ndarray, n_bins: int = 10) -> dict[str, list]:
+    """Effectif, probabilité moyenne prédite et taux observé par tranche de probabilité."""
+    return _calibration_table(_calibration_sums(y_true, proba, n_bins))
+
+
+def _confusion_metrics(tn: int, fp: int, fn: int, tp: int) -> dict[str, float]:
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "tn": tn,
+        "fp": fp,
+        "fn": fn,
+        "tp": tp,
+        "accuracy": (tp + tn) / (tn + fp + fn + tp),
+        "precision": precision,
+        "recall": recall,
+        "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+    }
+
+
+def evaluate(y_true: np.ndarray, proba: np.ndarray, threshold: float = 0.5) -> dict[str, float]:
+    """Métriques de classification binaire, y_true en {0, 1} et proba = P(classe 1)."""
+    y_true = np.asarray(y_true, dtype=np.int64)
+    proba = np.asarray(proba, dtype=np.float64)
+    y_pred = (proba >= threshold).astype(np.int64)
+
+    tn, fp, fn, tp = np.bincount(2 * y_true + y_pred, minlength=4).tolist()  # Matrice de confusion en une passe
+    return {
+        **_confusion_metrics(tn, fp, fn, tp),
+        "roc_auc": _roc_auc(y_true, proba),
+        "log_loss": _log_loss(y_true, proba),
+        "brier": float(np.mean((proba - y_true) ** 2)),
+    }
+
+
+class StreamingEvaluation:
+    """Métriques d'evaluate accumulées chunk par chunk, en mémoire indépendante du nombre de lignes.
+
+    Matrice de confusion, log-loss, Brier et calibration sont des sommes exactes. La ROC-AUC est
+    calculée sur un histogramme de SCORE_BINS scores par classe (égalités comptées pour moitié).
+    Le bootstrap porte sur un échantillon uniforme de sample_size lignes, tirées sans remise : au-delà,
+    ses intervalles correspondent à sample_size lignes et sont donc plus larges que ceux du test complet.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        n_bins: int = 10,
+        sample_size: int = BOOTSTRAP_SAMPLE_SIZE,
+        random_state: int = 42,
+    ) -> None:
+        self.threshold = threshold
+        self.n_bins = n_bins
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(random_state)
+        self._confusion = np.zeros(4, dtype=np.int64)
+        self._scores = np.zeros((2, SCORE_BINS), dtype=np.int64)  # Histogramme des scores des négatifs, positifs
+        self._log_loss = 0.0
+        self._brier = 0.0
+        self._calibration = np.zeros((3, n_bins))
+        self._sample_keys = np.empty(0)
+        self._sample_y = np.empty(0, dtype=np.int64)
+        self._sample_proba = np.empty(0)
+
+    def update(self, y_true: np.ndarray, proba: np.ndarray) -> None:
+        """Ajoute un chunk de cibles et de probabilités."""
+        y_true = np.asarray(y_true, dtype=np.int64)
+        proba = np.asarray(proba, dtype=np.float64)
+        y_pred = (proba >= self.threshold).astype(np.int64)
+        self._confusion += np.bincount(2 * y_true + y_pred, minlength=4)
+        scores = np.minimum((proba * SCORE_BINS).astype(np.int64), SCORE_BINS - 1)
+        self._scores += np.bincount(y_true * SCORE_BINS + scores, minlength=2 * SCORE_BINS).reshape(2, -1)
+        self._log_loss += _log_loss(y_true, proba) * len(y_true)
+        self._brier += float(np.sum((proba - y_true) ** 2))
+        self._calibration += _calibration_sums(y_true, proba, self.n_bins)
+        self._add_to_sample(y_true, proba)
+
+    def _add_to_sample(self, y_true: np.ndarray, proba: np.ndarray) -> None:
+        """Garde les sample_size lignes de plus petite clé aléatoire, dans leur ordre d'arrivée."""
+        keys = np.concatenate([self._sample_keys, self._rng.random(len(y_true))])
+        y_true = np.concatenate([self._sample_y, y_true])
+        proba = np.concatenate([self._sample_proba, proba])
+        if len(keys) > self.sample_size:
+            keep = np.sort(np.argpartition(keys, self.sample_size - 1)[: self.sample_size])
+            keys, y_true, proba = keys[keep], y_true[keep], proba[keep]
+        self._sample_keys, self._sample_y, self._sample_proba = keys, y_true, proba
+
+    @property
+    def sample(self) -> tuple[np.ndarray, np.ndarray]:
+        """Cibles et probabilités de l'échantillon de bootstrap (tout le test s'il tient dans sample_size)."""
+        return self._sample_y, self._sample_proba
+
+    def _roc_auc(self) -> float:
+        negatives, positives = self._scores
+        n_neg, n_pos = int(negatives.sum()), int(positives.sum())
+        if n_pos == 0 or n_neg == 0:
+            return float("nan")
+        negatives_below = np.cumsum(negatives) - negatives
+        return float((positives * (negatives_below + negatives / 2)).sum() / (n_pos * n_neg))
+
+    def metrics(self) -> dict[str, float]:
+        """Mêmes métriques qu'evaluate, sur toutes les lignes ajoutées."""
+        n = int(self._confusion.sum())
+        return {
+            **_confusion_metrics(*self._confusion.tolist()),
+            "roc_auc": self._roc_auc(),
+            "log_loss": self._log_loss / n,
+            "brier": self._brier / n,
+        }
+
+    def calibration(self) -> dict[str, list]:
+        """Même table que calibration_bins, sur toutes les lignes ajoutées."""
+        return _calibration_table(self._calibration)
+
+
+def _bootstrap_worker(
+    y_true: np.ndarray, proba: np.ndarray, n_resamples: int, seed: np.random.SeedSequence
+) -> np.ndarray:
+    """Métriques de BOOTSTRAP_METRICS pour n_resamples rééchantillonnages, calculées dans un worker."""
+    rng = np.random.default_rng(seed)
+    n = len(y_true)
+    results = np.empty((n_resamples, len(BOOTSTRAP_METRICS)))
+    for i in range(n_resamples):
+        idx = rng.integers(0, n, n)
+        y, p = y_true[idx], proba[idx]
+        results[i] = ((p >= 0.5) == y).mean(), _roc_auc(y, p), _log_loss(y, p)
+    return results
+
+
+def bootstrap_ci(  # noqa: PLR0913
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    n_resamples: int = 200,
+    confidence: float = 0.95,
+    random_state: int = 42,
+    n_workers: int | None = None,
+) -> dict[str, tuple[float, float]]:
+    """Intervalles de confiance bootstrap (percentiles), rééchantillonnages répartis sur les cœurs."""
+    y_true = np.asarray(y_true, dtype=np.int64)
+    proba = np.asarray(proba, dtype=np.float64)
+    n_workers = max(1, min(n_workers or available_cpus(), n_resamples))
+    sizes = [len(part) for part in np.array_split(np.arange(n_resamples), n_workers)]
+    seeds = np.random.SeedSequence(random_state).spawn(n_workers)  # Flux aléatoires indépendants par worker
+
+    if n_workers == 1:
+        results = _bootstrap_worker(y_true, proba, n_resamples, seeds[0])
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            parts = pool.map(_bootstrap_worker, [y_true] * n_workers, [proba] * n_workers, sizes, seeds)
+            results = np.concatenate(list(parts))
+
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(results, [alpha, 1 - alpha], axis=0)
+    return {name: (float(lower[i]), float(upper[i])) for i, name in enumerate(BOOTSTRAP_METRICS)}
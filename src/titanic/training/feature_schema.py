@@ -0,0 +1,54 @@
+"""Schéma des features d'entraînement : colonnes brutes, types, modalités et disposition encodée.
+
+Le schéma est loggé à côté du modèle pour que validation et inférence encodent les données
+exactement comme au fit, sans re-dériver les colonnes avec get_dummies.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SCHEMA_FILENAME = "feature_schema.json"
+
+
+def schema_path_for(model_path: str) -> str:
+    """Chemin mlflow du schéma loggé à côté d'un modèle (ex: model_trained/feature_schema.json)."""
+    return f"{model_path.rsplit('/', 1)[0]}/{SCHEMA_FILENAME}"
+
+
+def build_feature_schema(x: pd.DataFrame, categories: dict[str, list] | None = None) -> dict:
+    """Construit le schéma à partir des features brutes.
+
+    categories permet d'imposer les modalités d'une feature (utile quand x n'est qu'un échantillon).
+    """
+    from pandas.api.types import is_numeric_dtype
+
+    categories = categories or {}
+    features = []
+    for name in x.columns:
+        if name in categories or not is_numeric_dtype(x[name]):
+            levels = categories.get(name) or sorted(x[name].dropna().unique().tolist())
+            features.append({"name": name, "dtype": "category", "categories": list(levels)})
+        else:
+            features.append({"name": name, "dtype": str(x[name].dtype)})
+
+    schema = {"features": features, "columns": []}
+    schema["columns"] = encode_features(x.head(0), schema, reindex=False).columns.tolist()
+    return schema
+
+
+def encode_features(x: pd.DataFrame, schema: dict, reindex: bool = True) -> pd.DataFrame:
+    """Encode les features brutes avec la disposition de colonnes du schéma."""
+    import pandas as pd
+
+    x = x[[feature["name"] for feature in schema["features"]]].copy()
+    for feature in schema["features"]:
+        if feature["dtype"] == "category":  # Modalités figées : une colonne par modalité, même absente
+            x[feature["name"]] = pd.Categorical(x[feature["name"]], categories=feature["categories"])
+    encoded = pd.get_dummies(x)
+    if reindex:
+        encoded = encoded.reindex(columns=schema["columns"], fill_value=False)
+    return encoded
@@ -1,29 +1,66 @@
 import logging
 
 import fire
+
 # imports fichiers python
+from titanic.training.evaluation import BOOTSTRAP_SAMPLE_SIZE
 from titanic.training.steps.load_data import load_data
 from titanic.training.steps.validate import validate
-from titanic.training.steps.split_train_test import split_train_test
+from titanic.training.steps.split_train_test import split_train_test, split_train_test_chunked
+from titanic.training.steps.search_hyperparameters import search_hyperparameters
 from titanic.training.steps.train import train
+from titanic.training.steps.train_incremental import train_incremental
+
 
+from titanic.training.tracking import start_run
 
-#importer mlflow : autolog
-import mlflow
 
-def workflow(input_data_path: str, n_estimators: int, max_depth: int, random_state: int) -> None:
+def workflow(  # noqa: PLR0913
+    input_data_path: str,
+    n_estimators: int,
+    max_depth: int,
+    random_state: int,
+    search: str = "none",
+    n_candidates: int = 10,
+    n_workers: int | None = None,
+    n_jobs: int | None = None,
+    warm_start_model_uri: str = "none",
+    chunk_size: int | None = None,
+    test_size: float = 0.3,
+    split_strategy: str = "random",
+    stratify: bool = False,
+    bootstrap_sample_size: int = BOOTSTRAP_SAMPLE_SIZE,
+) -> None:
     logging.warning(f"workflow input path : {input_data_path}")
     # workflow
-    with mlflow.start_run():
-        local_path = load_data(input_data_path)
-        xtrain_path, xtest_path, ytrain_path, ytest_path = split_train_test(local_path)
-        model_path = train(xtrain_path, ytrain_path, 100, 10, 42)
-        validate(model_path, xtest_path, ytest_path)
+    chunk_size = chunk_size or None  # 0 (valeur par défaut du MLProject) désactive le mode chunké
+    if chunk_size and search != "none":
+        raise ValueError("Hyperparameter search is not available in chunked mode")
+    with start_run():  # Logging mlflow asynchrone, attendu avant la fin du run
+        local_path = load_data(input_data_path, chunk_size)
+        if chunk_size:  # Mode out-of-core : la mémoire est bornée par chunk_size lignes à chaque étape
+            xtrain_path, xtest_path, ytrain_path, ytest_path = split_train_test_chunked(
+                local_path, chunk_size, test_size, random_state, stratify
+            )
+            model_path = train_incremental(xtrain_path, ytrain_path, chunk_size, random_state)
+            validate(model_path, xtest_path, ytest_path, chunk_size, bootstrap_sample_size=bootstrap_sample_size)
+            return
 
+        xtrain_path, xtest_path, ytrain_path, ytest_path = split_train_test(
+            local_path, test_size, random_state, split_strategy, stratify
+        )
+        if search != "none":  # Recherche d'hyperparamètres : "grid" ou "random"
+            best_params = search_hyperparameters(
+                xtrain_path, ytrain_path, search, n_candidates, random_state, n_workers
+            )
+            n_estimators, max_depth = best_params["n_estimators"], best_params["max_depth"]
+        # Ajoute des arbres à une forêt existante
+        warm_start = None if warm_start_model_uri == "none" else warm_start_model_uri
+        model_path = train(xtrain_path, ytrain_path, n_estimators, max_depth, random_state, n_jobs, warm_start)
+        validate(model_path, xtest_path, ytest_path, bootstrap_sample_size=bootstrap_sample_size)
 
     # TODO : Dans un second temps, démarrer le run mlflow au début de ce workflow
 
 
 if __name__ == "__main__":
     fire.Fire(workflow)
-    
\ No newline at end of file
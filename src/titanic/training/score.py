@@ -0,0 +1,136 @@
+"""Scoring hors ligne d'un fichier CSV ou Parquet avec un modèle mlflow, prédictions écrites en Parquet.
+
+Le fichier est lu par tranches de chunk_size lignes. Chaque tranche est encodée avec le schéma du fit
+et prédite par un pool de processus (un modèle chargé par processus) ; les prédictions sont écrites
+dans l'ordre du fichier, un row group par tranche. Au plus deux tranches par processus sont en
+cours : la mémoire reste bornée quelle que soit la taille du fichier.
+
+    python -m titanic.training.score --model_uri models:/<model_id> --input_path data/all_titanic.csv \
+        --output_path predictions.parquet
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import fire
+
+from titanic.artifact_cache import download_uri
+from titanic.cgroup import available_cpus
+from titanic.training.feature_schema import SCHEMA_FILENAME, encode_features, schema_path_for
+from titanic.training.steps.split_train_test import ID_COLUMN
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+_worker: dict[str, object] = {}  # Modèle et schéma chargés une fois par processus du pool
+
+
+def fetch_model(model_uri: str) -> tuple[str, dict]:
+    """Modèle (dossier mlflow de models:/... ou fichier joblib d'un run) et son schéma, via le cache local."""
+    local_path = download_uri(model_uri)
+    if Path(local_path).is_dir():  # Modèle loggé par validate : le schéma est dans ses artefacts
+        schema_path = Path(local_path, SCHEMA_FILENAME)
+    else:  # ex: runs:/<run_id>/model_trained/model.joblib, schéma à côté
+        schema_path = download_uri(schema_path_for(model_uri))
+    return local_path, json.loads(Path(schema_path).read_text())
+
+
+def _init_worker(model_path: str, schema: dict) -> None:
+    if Path(model_path).is_dir():
+        import mlflow
+
+        _worker["model"] = mlflow.sklearn.load_model(model_path)
+    else:
+        import joblib
+
+        _worker["model"] = joblib.load(model_path)
+    _worker["schema"] = schema
+
+
+def _predict_chunk(x: pd.DataFrame) -> np.ndarray:
+    return _worker["model"].predict(encode_features(x, _worker["schema"]))
+
+
+def read_chunks(path: str, chunk_size: int, columns: list[str]) -> Iterator[pd.DataFrame]:
+    """Tranches de chunk_size lignes, réduites à columns (celles absentes du fichier sont ignorées)."""
+    import pandas as pd
+
+    if Path(path).suffix.lower() in PARQUET_SUFFIXES:
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        present = [column for column in columns if column in parquet.schema_arrow.names]
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=present):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=lambda column: column in columns, chunksize=chunk_size)
+
+
+def _predictions(
+    chunks: Iterator[pd.DataFrame], features: list[str], model_path: str, schema: dict, n_workers: int
+) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+    """(tranche, prédictions) dans l'ordre du fichier ; sans pool pour un seul worker."""
+    if n_workers == 1:
+        _init_worker(model_path, schema)
+        for chunk in chunks:
+            yield chunk, _predict_chunk(chunk[features])
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(model_path, schema)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.submit(_predict_chunk, chunk[features])))  # Seules les features sont envoyées
+            if len(pending) >= 2 * n_workers:  # Lecture en avance bornée
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def score(
+    model_uri: str, input_path: str, output_path: str, chunk_size: int = 100_000, n_workers: int | None = None
+) -> dict:
+    """Prédit chaque ligne de input_path et écrit output_path (PassengerId si présent, prediction)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n_workers = n_workers or available_cpus()
+    model_path, schema = fetch_model(model_uri)
+    features = [feature["name"] for feature in schema["features"]]
+    logging.warning(f"score {input_path} with {model_uri} ({n_workers} workers, chunks of {chunk_size})")
+
+    start = time.perf_counter()
+    rows, writer = 0, None
+    chunks = read_chunks(input_path, chunk_size, [ID_COLUMN, *features])
+    try:
+        for chunk, predictions in _predictions(chunks, features, model_path, schema, n_workers):
+            columns = {ID_COLUMN: chunk[ID_COLUMN].to_numpy()} if ID_COLUMN in chunk else {}
+            table = pa.table({**columns, "prediction": pa.array(predictions, type=pa.int64())})
+            writer = writer or pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    seconds = time.perf_counter() - start
+    report = {"rows": rows, "seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0}
+    logging.warning(f"scored {rows} rows in {seconds:.2f}s ({report['rows_per_second']:.0f} rows/s) to {output_path}")
+    return report
+
+
+if __name__ == "__main__":
+    fire.Fire(score)
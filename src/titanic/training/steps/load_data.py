@@ -1,40 +1,49 @@
 import logging
 import os
 from pathlib import Path
-import tempfile # Nouvel import pour gérer les fichiers temporaires
+import tempfile  # Nouvel import pour gérer les fichiers temporaires
 
-import boto3
-import mlflow # Nouvel import pour mlflow
-import pandas as pd
-from ydata_profiling import ProfileReport
+from titanic.training.tracking import get_run_logger
 
 
 ARTIFACT_PATH = "path_output"
 PROFILING_PATH = "profiling_reports"
 
 
-def load_data(path: str) -> str:
-  logging.warning(f"load_data on path : {path}")
+def load_data(path: str, chunk_size: int | None = None) -> str:
+    """Télécharge les données brutes et les logge dans mlflow.
 
-  with tempfile.TemporaryDirectory() as tmp_dir: # Utilisation d'un dossier temporaire
-    local_path = Path(tmp_dir, "data.csv") # Fichier temporaire pour stocker les données
-    logging.warning(f"to path : {local_path}")
+    En mode chunké (chunk_size renseigné), le fichier n'est jamais chargé en entier :
+    le profiling ne porte que sur les chunk_size premières lignes.
+    """
+    import boto3
+    import pandas as pd
+    from ydata_profiling import ProfileReport  # Import lourd : seulement quand l'étape s'exécute
 
-    s3_client = boto3.client(
-      "s3",
-      endpoint_url=os.environ.get("MLFLOW_S3_ENDPOINT_URL"),
-      aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
-      aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
-    )
+    logging.warning(f"load_data on path : {path}")
+    run_logger = get_run_logger()  # Uploads asynchrones dans le workflow
 
-    s3_client.download_file("kto-titanic", path, local_path)
-    df = pd.read_csv(local_path)
+    with tempfile.TemporaryDirectory() as tmp_dir:  # Utilisation d'un dossier temporaire
+        local_path = Path(tmp_dir, "data.csv")  # Fichier temporaire pour stocker les données
+        logging.warning(f"to path : {local_path}")
 
-    profile = ProfileReport(df, title=f"Profiling Report - {local_path.stem}")
-    with tempfile.NamedTemporaryFile(suffix=".html", delete=False) as tmp_file: # Fichier temporaire pour le rapport de profiling
-      profile.to_file(tmp_file.name)
-      mlflow.log_artifact(tmp_file.name, PROFILING_PATH) # Log du rapport de profiling dans mlflow
+        s3_client = boto3.client(
+            "s3",
+            endpoint_url=os.environ.get("MLFLOW_S3_ENDPOINT_URL"),
+            aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY"),
+        )
 
-    mlflow.log_artifact(str(local_path), ARTIFACT_PATH) # Log du fichier de données dans mlflow
+        s3_client.download_file("kto-titanic", path, local_path)  # Téléchargement en streaming vers le disque
+        df = pd.read_csv(local_path, nrows=chunk_size)  # nrows=None : lecture complète
 
-  return f"{ARTIFACT_PATH}/{local_path.name}" # Retourne le chemin dans mlflow
+        profile = ProfileReport(df, title=f"Profiling Report - {local_path.stem}")
+        with tempfile.NamedTemporaryFile(
+            suffix=".html", delete=False
+        ) as tmp_file:  # Fichier temporaire pour le rapport de profiling
+            profile.to_file(tmp_file.name)
+            run_logger.log_artifact(tmp_file.name, PROFILING_PATH)  # Log du rapport de profiling dans mlflow
+
+        run_logger.log_artifact(str(local_path), ARTIFACT_PATH)  # Log du fichier de données dans mlflow
+
+    return f"{ARTIFACT_PATH}/{local_path.name}"  # Retourne le chemin dans mlflow
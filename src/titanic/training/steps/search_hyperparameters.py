@@ -0,0 +1,109 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from titanic.cgroup import available_cpus
+from titanic.training.feature_schema import build_feature_schema, encode_features
+from titanic.training.tracking import download_artifact, get_run_logger, start_run
+
+SEARCH_MODES = ("grid", "random")
+
+SEARCH_SPACE = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [3, 5, 8, 10, 15],
+}
+
+CV_FOLDS = 3
+
+# Tableaux partagés, attachés une seule fois par process worker
+_shared: dict = {}
+
+
+def _to_shared(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """Segment de mémoire partagée contenant une copie du tableau, et sa description."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def _attach_shared(x_spec: tuple, y_spec: tuple) -> None:
+    """Attache les données d'entraînement dans chaque worker, sans les copier."""
+    for key, (name, shape, dtype) in (("x", x_spec), ("y", y_spec)):
+        shm = shared_memory.SharedMemory(name=name)
+        _shared[f"{key}_shm"] = shm  # Garde une référence pour que le buffer reste valide
+        _shared[key] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _evaluate(params: dict, random_state: int) -> float:
+    """Score moyen en validation croisée d'un candidat, calculé dans un worker."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import cross_val_score
+
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=1)
+    scores = cross_val_score(model, _shared["x"], _shared["y"], cv=CV_FOLDS, scoring="accuracy")
+    return float(scores.mean())
+
+
+def _candidates(mode: str, n_candidates: int, random_state: int) -> list[dict]:
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    if mode == "grid":
+        return list(ParameterGrid(SEARCH_SPACE))
+    if mode == "random":
+        return list(ParameterSampler(SEARCH_SPACE, n_iter=n_candidates, random_state=random_state))
+    raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+
+def search_hyperparameters(  # noqa: PLR0913
+    x_train_path: str,
+    y_train_path: str,
+    mode: str = "grid",
+    n_candidates: int = 10,
+    random_state: int = 42,
+    n_workers: int | None = None,
+) -> dict:
+    """Évalue les candidats en parallèle et retourne les meilleurs hyperparamètres.
+
+    Le split d'entraînement est chargé une seule fois et placé en mémoire partagée :
+    les workers l'attachent au démarrage au lieu de le recharger pour chaque candidat.
+    Chaque candidat est loggé dans un run mlflow imbriqué.
+    """
+    import pandas as pd
+
+    logging.warning(f"search_hyperparameters ({mode}) {x_train_path} {y_train_path}")
+    candidates = _candidates(mode, n_candidates, random_state)
+    run_logger = get_run_logger()
+
+    x_train = pd.read_csv(download_artifact(x_train_path), index_col=False)  # Téléchargement des données depuis mlflow
+    y_train = pd.read_csv(download_artifact(y_train_path), index_col=False)
+    x = encode_features(x_train, build_feature_schema(x_train)).to_numpy(dtype=np.float64)
+    y = y_train.iloc[:, 0].to_numpy()
+
+    n_workers = min(n_workers or available_cpus(), len(candidates))
+    logging.warning(f"{len(candidates)} candidates on {n_workers} workers")
+
+    x_shm, x_spec = _to_shared(x)
+    y_shm, y_spec = _to_shared(y)
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_attach_shared, initargs=(x_spec, y_spec)) as pool:
+            scores = list(pool.map(_evaluate, candidates, [random_state] * len(candidates)))
+    finally:
+        for shm in (x_shm, y_shm):
+            shm.close()
+            shm.unlink()
+
+    for i, (params, score) in enumerate(zip(candidates, scores, strict=True)):
+        with start_run(run_name=f"candidate-{i}", nested=True):  # Un run imbriqué par candidat
+            candidate_logger = get_run_logger()
+            candidate_logger.log_params(params)
+            candidate_logger.log_metric("cv_accuracy", score)
+
+    best_index = int(np.argmax(scores))
+    best_params = candidates[best_index]
+    run_logger.log_params({f"best_{name}": value for name, value in best_params.items()})
+    run_logger.log_metric("best_cv_accuracy", scores[best_index])
+    logging.warning(f"best params {best_params} (cv accuracy {scores[best_index]:.4f})")
+
+    return best_params
@@ -1,40 +1,157 @@
+from __future__ import annotations
+
 import logging
+from collections import defaultdict
 from pathlib import Path
-import tempfile # Nouvel import pour gérer les fichiers temporaires
+import tempfile  # Nouvel import pour gérer les fichiers temporaires
+from typing import TYPE_CHECKING
+
+import numpy as np
 
-import mlflow # Nouvel import pour mlflow
-import pandas as pd
-import sklearn.model_selection
+from titanic.training.tracking import download_artifact, get_run_logger
 
-client = mlflow.MlflowClient() # Client mlflow pour interagir avec le server de tracking
+if TYPE_CHECKING:
+    import pandas as pd
 
 FEATURES = ["Pclass", "Sex", "SibSp", "Parch"]
 
 TARGET = "Survived"
 
+ID_COLUMN = "PassengerId"
+
+
+SPLIT_STRATEGIES = ("random", "hash")
+
+
+class HashSplitter:
+    """Affectation train/test déterministe, calculable ligne par ligne en une seule passe.
+
+    Une ligne part dans le test si le hash de son PassengerId tombe sous test_size : ajouter des
+    lignes ne change pas l'affectation des lignes existantes, les splits sont réutilisables en
+    réentraînement incrémental.
 
-def split_train_test(data_path: str) -> tuple[str, str, str, str]:
-    logging.warning(f"split on {data_path}")
-    # Téléchargement des données brutes depuis mlflow
-    df = pd.read_csv(client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=data_path), index_col=False) 
+    Avec stratify, un compteur par classe de Survived corrige le hash dès que la proportion de test
+    de la classe s'écarte de plus d'une ligne de test_size. L'affectation reste stable tant que les
+    nouvelles lignes sont ajoutées en fin de fichier.
+    """
+
+    def __init__(self, test_size: float = 0.3, random_state: int = 42, stratify: bool = False) -> None:
+        self.test_size = test_size
+        self.random_state = random_state
+        self.stratify = stratify
+        self._seen: dict = defaultdict(int)  # Lignes vues par classe
+        self._in_test: dict = defaultdict(int)  # Lignes affectées au test par classe
+
+    def is_test(self, ids: pd.Series, labels: pd.Series | None = None) -> np.ndarray:
+        """Masque booléen des lignes du test, pour un chunk pris dans l'ordre du fichier."""
+        mask = hash_fraction(ids, self.random_state) < self.test_size
+        if not self.stratify:
+            return mask
+        if labels is None:
+            raise ValueError("labels are required for a stratified split")
+
+        for i, label in enumerate(labels.to_numpy()):
+            self._seen[label] += 1
+            expected = self._seen[label] * self.test_size
+            if mask[i] and self._in_test[label] + 1 > expected + 1:  # Trop de lignes de test pour cette classe
+                mask[i] = False
+            elif not mask[i] and self._in_test[label] < expected - 1:  # Pas assez
+                mask[i] = True
+            self._in_test[label] += int(mask[i])
+        return mask
+
+
+def split_train_test(
+    data_path: str,
+    test_size: float = 0.3,
+    random_state: int = 42,
+    strategy: str = "random",
+    stratify: bool = False,
+) -> tuple[str, str, str, str]:
+    import pandas as pd
+    import sklearn.model_selection
+
+    logging.warning(f"split on {data_path} ({strategy})")
+    run_logger = get_run_logger()
+    df = pd.read_csv(download_artifact(data_path), index_col=False)  # Téléchargement des données brutes depuis mlflow
 
     y = df[TARGET]
     x = df[FEATURES]
-    x_train, x_test, y_train, y_test = sklearn.model_selection.train_test_split(x, y, test_size=0.3, random_state=42)
+    if strategy == "hash":  # Split stable par hash de PassengerId
+        is_test = HashSplitter(test_size, random_state, stratify).is_test(df[ID_COLUMN], y)
+        x_train, x_test, y_train, y_test = x[~is_test], x[is_test], y[~is_test], y[is_test]
+    elif strategy == "random":
+        x_train, x_test, y_train, y_test = sklearn.model_selection.train_test_split(
+            x, y, test_size=test_size, random_state=random_state, stratify=y if stratify else None
+        )
+    else:
+        raise ValueError(f"Unknown split strategy '{strategy}', expected one of {SPLIT_STRATEGIES}")
 
     datasets = [
-      (x_train, "xtrain", "xtrain.csv"),
-      (x_test, "xtest", "xtest.csv"),
-      (y_train, "ytrain", "ytrain.csv"),
-      (y_test, "ytest", "ytest.csv"),
+        (x_train, "xtrain", "xtrain.csv"),
+        (x_test, "xtest", "xtest.csv"),
+        (y_train, "ytrain", "ytrain.csv"),
+        (y_test, "ytest", "ytest.csv"),
     ]
 
     artifact_paths = []
-    with tempfile.TemporaryDirectory() as tmp_dir: # Utilisation d'un dossier temporaire
+    with tempfile.TemporaryDirectory() as tmp_dir:  # Utilisation d'un dossier temporaire
         for data, artifact_path, filename in datasets:
             file_path = Path(tmp_dir, filename)
             data.to_csv(file_path, index=False)
-            mlflow.log_artifact(str(file_path), artifact_path) # Log du fichier de split dans mlflow
-            artifact_paths.append(f"{artifact_path}/{filename}") # Stockage du chemin dans mlflow
+            run_logger.log_artifact(str(file_path), artifact_path)  # Log du fichier de split dans mlflow
+            artifact_paths.append(f"{artifact_path}/{filename}")  # Stockage du chemin dans mlflow
+
+    return tuple(artifact_paths)
+
+
+def hash_fraction(ids: pd.Series, random_state: int = 42) -> np.ndarray:
+    """Position déterministe de chaque identifiant dans [0, 1), indépendante des autres lignes."""
+    import pandas as pd
+
+    hash_key = f"{random_state:016d}"[-16:]  # hash_pandas_object attend une clé de 16 caractères
+    hashes = pd.util.hash_pandas_object(ids.astype(str), index=False, hash_key=hash_key).to_numpy()
+    return (hashes >> np.uint64(11)) / 2.0**53  # 53 bits : conversion exacte en float, jamais 1.0
+
+
+def split_train_test_chunked(
+    data_path: str, chunk_size: int, test_size: float = 0.3, random_state: int = 42, stratify: bool = False
+) -> tuple[str, str, str, str]:
+    """Split train/test en streaming avec HashSplitter, sans jamais matérialiser le jeu de données complet.
+
+    Le résultat ne dépend pas de chunk_size, qui borne seulement la mémoire.
+    """
+    import pandas as pd
+
+    logging.warning(f"chunked split on {data_path} (chunk_size={chunk_size})")
+    run_logger = get_run_logger()
+    local_path = download_artifact(data_path)  # Attend la fin de l'upload des données brutes
+    splitter = HashSplitter(test_size, random_state, stratify)
+
+    datasets = [
+        ("xtrain", "xtrain.csv"),
+        ("xtest", "xtest.csv"),
+        ("ytrain", "ytrain.csv"),
+        ("ytest", "ytest.csv"),
+    ]
+
+    artifact_paths = []
+    with tempfile.TemporaryDirectory() as tmp_dir:  # Utilisation d'un dossier temporaire
+        files = [Path(tmp_dir, filename) for _, filename in datasets]
+        for i, chunk in enumerate(pd.read_csv(local_path, index_col=False, chunksize=chunk_size)):
+            is_test = splitter.is_test(chunk[ID_COLUMN], chunk[TARGET])
+            parts = [
+                chunk.loc[~is_test, FEATURES],
+                chunk.loc[is_test, FEATURES],
+                chunk.loc[~is_test, [TARGET]],
+                chunk.loc[is_test, [TARGET]],
+            ]
+            for part, file_path in zip(parts, files, strict=True):
+                # Ajout en fin de fichier, en-tête au premier chunk
+                part.to_csv(file_path, mode="a", header=i == 0, index=False)
+
+        for (artifact_path, filename), file_path in zip(datasets, files, strict=True):
+            run_logger.log_artifact(str(file_path), artifact_path)  # Log du fichier de split dans mlflow
+            artifact_paths.append(f"{artifact_path}/{filename}")  # Stockage du chemin dans mlflow
 
     return tuple(artifact_paths)
@@ -1,35 +1,90 @@
+from __future__ import annotations
+
 import logging
 from pathlib import Path
-import tempfile # Nouvel import pour gérer les fichiers temporaires
+import resource
+import tempfile  # Nouvel import pour gérer les fichiers temporaires
+import time
+from typing import TYPE_CHECKING
 
-import joblib
-import mlflow # Nouvel import pour mlflow
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier
+from titanic.artifact_cache import download_uri
+from titanic.cgroup import available_cpus
+from titanic.training.feature_schema import SCHEMA_FILENAME, build_feature_schema, encode_features
+from titanic.training.tracking import download_artifact, get_run_logger
 
-client = mlflow.MlflowClient() # Client mlflow pour interagir avec le server de tracking
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestClassifier
 
 ARTIFACT_PATH = "model_trained"
 
 
-def train(x_train_path: str, y_train_path: str, n_estimators: int, max_depth: int, random_state: int) -> str:
+def _load_warm_start_model(model_uri: str, n_estimators: int, max_depth: int, n_jobs: int) -> RandomForestClassifier:
+    """Recharge une forêt existante pour lui ajouter n_estimators arbres au lieu de tout réentraîner.
+
+    Les nouveaux arbres gardent les hyperparamètres de la forêt existante, max_depth compris.
+    """
+    import joblib
+
+    # ex: runs:/<run_id>/model_trained/model.joblib
+    model = joblib.load(download_uri(model_uri))
+    if model.max_depth != max_depth:
+        logging.warning(f"warm start: max_depth={max_depth} ignored, the existing forest uses {model.max_depth}")
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_estimators, n_jobs=n_jobs)
+    return model
+
+
+def train(  # noqa: PLR0913
+    x_train_path: str,
+    y_train_path: str,
+    n_estimators: int,
+    max_depth: int,
+    random_state: int,
+    n_jobs: int | None = None,
+    warm_start_model_uri: str | None = None,
+) -> str:
+    import joblib
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+
     logging.warning(f"train {x_train_path} {y_train_path}")
-    x_train = pd.read_csv(
-        client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=x_train_path), index_col=False # Téléchargement des données depuis mlflow
-    )
-    y_train = pd.read_csv(
-        client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=y_train_path), index_col=False # Téléchargement des données depuis mlflow
-    )
+    run_logger = get_run_logger()
+    x_train = pd.read_csv(download_artifact(x_train_path), index_col=False)  # Téléchargement des données depuis mlflow
+    y_train = pd.read_csv(download_artifact(y_train_path), index_col=False)
+
+    schema = build_feature_schema(x_train)  # Colonnes, types et modalités vus au fit
+    y_train = y_train.iloc[:, 0]
+
+    n_jobs = n_jobs or available_cpus()  # Par défaut, autant de jobs que le quota CPU du conteneur le permet
+    if warm_start_model_uri:
+        model = _load_warm_start_model(warm_start_model_uri, n_estimators, max_depth, n_jobs)
+        schema["columns"] = model.feature_names_in_.tolist()  # Même disposition que la forêt existante
+    else:
+        model = RandomForestClassifier(
+            n_estimators=n_estimators, max_depth=max_depth, random_state=random_state, n_jobs=n_jobs
+        )
+
+    x_train = encode_features(x_train, schema)
+
+    # ru_maxrss est le pic de toute la vie du process : seul son dépassement pendant le fit est imputable au fit
+    peak_before_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    model.fit(x_train, y_train)  # Chronométré sans traçage des allocations, qui ralentirait le fit
+    fit_time = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Threads du fit compris
 
-    x_train = pd.get_dummies(x_train)
+    run_logger.log_param("n_jobs", n_jobs)
+    run_logger.log_metric("fit_time_seconds", fit_time)  # Suivi du passage à l'échelle
+    run_logger.log_metric("process_peak_rss_mb", peak_rss_kb / 1024)
+    run_logger.log_metric("fit_peak_rss_increase_mb", (peak_rss_kb - peak_before_kb) / 1024)
+    run_logger.log_metric("n_trees", len(model.estimators_))
 
-    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=random_state)
-    model.fit(x_train, y_train)
+    model.set_params(n_jobs=None)  # Le modèle servi prédit ligne par ligne : pas de pool de threads à l'inférence
 
     model_filename = "model.joblib"
-    with tempfile.TemporaryDirectory() as tmp_dir: # Utilisation d'un dossier temporaire
+    with tempfile.TemporaryDirectory() as tmp_dir:  # Utilisation d'un dossier temporaire
         model_path = Path(tmp_dir, model_filename)
         joblib.dump(model, model_path)
-        mlflow.log_artifact(str(model_path), ARTIFACT_PATH) # Log du modèle dans mlflow
+        run_logger.log_artifact(str(model_path), ARTIFACT_PATH)  # Log du modèle dans mlflow
+    run_logger.log_dict(schema, f"{ARTIFACT_PATH}/{SCHEMA_FILENAME}")  # Schéma des features à côté du modèle
 
-    return f"{ARTIFACT_PATH}/{model_filename}" # Retourne le chemin du modèle dans mlflow
+    return f"{ARTIFACT_PATH}/{model_filename}"  # Retourne le chemin du modèle dans mlflow
@@ -0,0 +1,56 @@
+import logging
+from pathlib import Path
+import tempfile
+import time
+
+import numpy as np
+
+from titanic.training.feature_schema import SCHEMA_FILENAME, build_feature_schema, encode_features
+from titanic.training.steps.train import ARTIFACT_PATH
+from titanic.training.tracking import download_artifact, get_run_logger
+
+# Un chunk ne contient pas forcément toutes les modalités : elles sont fixées dans le schéma
+CATEGORIES = {"Sex": ["female", "male"]}
+
+CLASSES = np.array([0, 1])
+
+
+def train_incremental(x_train_path: str, y_train_path: str, chunk_size: int, random_state: int) -> str:
+    """Entraîne un SGDClassifier (régression logistique) chunk par chunk avec partial_fit.
+
+    Seul un chunk de chunk_size lignes est en mémoire à la fois, quelle que soit la taille du split.
+    """
+    import joblib
+    import pandas as pd
+    from sklearn.linear_model import SGDClassifier
+
+    logging.warning(f"train_incremental {x_train_path} {y_train_path} (chunk_size={chunk_size})")
+    run_logger = get_run_logger()
+    x_chunks = pd.read_csv(download_artifact(x_train_path), index_col=False, chunksize=chunk_size)
+    y_chunks = pd.read_csv(download_artifact(y_train_path), index_col=False, chunksize=chunk_size)
+
+    model = SGDClassifier(loss="log_loss", random_state=random_state)
+    schema = None
+    n_rows = 0
+    start = time.perf_counter()
+    for x_chunk, y_chunk in zip(x_chunks, y_chunks, strict=True):
+        if x_chunk.empty:  # Un CSV sans lignes donne un unique chunk vide
+            continue
+        schema = schema or build_feature_schema(x_chunk, CATEGORIES)  # Schéma figé dès le premier chunk
+        model.partial_fit(encode_features(x_chunk, schema), y_chunk.iloc[:, 0], classes=CLASSES)
+        n_rows += len(x_chunk)
+    fit_time = time.perf_counter() - start
+    if not n_rows:  # Ni schéma ni modèle ajusté à logger
+        raise ValueError("empty training input")
+
+    run_logger.log_metric("fit_time_seconds", fit_time)
+    run_logger.log_metric("train_rows", n_rows)
+
+    model_filename = "model.joblib"
+    with tempfile.TemporaryDirectory() as tmp_dir:  # Utilisation d'un dossier temporaire
+        model_path = Path(tmp_dir, model_filename)
+        joblib.dump(model, model_path)
+        run_logger.log_artifact(str(model_path), ARTIFACT_PATH)  # Log du modèle dans mlflow
+    run_logger.log_dict(schema, f"{ARTIFACT_PATH}/{SCHEMA_FILENAME}")  # Schéma des features à côté du modèle
+
+    return f"{ARTIFACT_PATH}/{model_filename}"  # Retourne le chemin du modèle dans mlflow
@@ -1,68 +1,125 @@
+from __future__ import annotations
+
+import json
 import logging
+from typing import TYPE_CHECKING
 
-import joblib
-import pandas as pd
-from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score, median_absolute_error
-import mlflow # Nouvel import pour mlflow
-from mlflow.models import infer_signature # Nouvel import pour inférer la signature du modèle
+import numpy as np
 
-client = mlflow.MlflowClient()
+from titanic.training.evaluation import BOOTSTRAP_SAMPLE_SIZE, StreamingEvaluation, bootstrap_ci
+from titanic.training.feature_schema import encode_features, schema_path_for
+from titanic.training.tracking import download_artifact, get_client, get_run_logger
 
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
-def validate(model_path: str, x_test_path: str, y_test_path: str) -> None:
-    logging.warning(f"validate {model_path}")
-    model = joblib.load(client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=model_path)) # Téléchargement du modèle depuis mlflow
+    import pandas as pd
 
-    x_test = pd.read_csv(
-        client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=x_test_path), index_col=False # Téléchargement des données depuis mlflow
-    )
-    y_test = pd.read_csv(
-        client.download_artifacts(run_id=mlflow.active_run().info.run_id, path=y_test_path), index_col=False # Téléchargement des données depuis mlflow
-    )
 
-    x_test = pd.get_dummies(x_test)
+def _read_csv(path: str, chunk_size: int | None) -> list[pd.DataFrame] | pd.io.parsers.TextFileReader:
+    """Lecture complète, ou itérateur de chunks de chunk_size lignes en mode chunké."""
+    import pandas as pd
 
-    if y_test.shape[1] == 1:
-        y_test = y_test.iloc[:, 0]
+    if chunk_size is None:
+        return [pd.read_csv(path, index_col=False)]
+    return pd.read_csv(path, index_col=False, chunksize=chunk_size)
 
-    y_pred = model.predict(x_test)
 
-    mse = mean_squared_error(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
-    r2 = r2_score(y_test, y_pred)
-    medae = median_absolute_error(y_test, y_pred)
+def _predict_chunks(
+    model: object,
+    schema: dict,
+    x_chunks: Iterable[pd.DataFrame],
+    y_chunks: Iterable[pd.DataFrame],
+    sample_size: int = BOOTSTRAP_SAMPLE_SIZE,
+) -> tuple[StreamingEvaluation, pd.DataFrame, np.ndarray]:
+    """Métriques accumulées chunk par chunk, exemple d'entrée (10 lignes encodées) et ses classes prédites."""
+    # Rien n'est gardé par ligne au-delà de l'échantillon de bootstrap : mémoire en O(chunk_size + sample_size)
+    positive_index = list(model.classes_).index(1)
+    evaluation = StreamingEvaluation(sample_size=sample_size)
+    x_example, y_example = None, None
+    for x_chunk, y_chunk in zip(x_chunks, y_chunks, strict=True):
+        x_encoded = encode_features(x_chunk, schema)  # Mêmes colonnes, dans le même ordre, que lors du fit
+        proba = model.predict_proba(x_encoded)[:, positive_index]  # Un seul predict_proba par chunk
+        evaluation.update(y_chunk.iloc[:, 0].to_numpy(), proba)
+        if x_example is None:
+            x_example = x_encoded.head(10)
+            y_example = (proba[: len(x_example)] >= evaluation.threshold).astype(np.int64)
+    return evaluation, x_example, y_example
 
-    feature_names = x_test.columns.tolist()
 
+def _feature_importance(model: object, feature_names: list[str]) -> dict[str, float]:
+    """Retourne l'importance (forêts) ou le coefficient (modèles linéaires) de chaque feature, 0 à défaut."""
     if hasattr(model, "feature_importances_"):
         importances = model.feature_importances_
-        feature_importance = {
-        name: float(importance) for name, importance in zip(feature_names, importances, strict=False)
-        }
-    elif hasattr(model, "coef_"):
+        return {name: float(importance) for name, importance in zip(feature_names, importances, strict=False)}
+    if hasattr(model, "coef_"):
         coefs = model.coef_
         if hasattr(coefs, "shape") and len(coefs.shape) > 1:
             coefs = coefs[0]
-        feature_importance = {name: float(coef) for name, coef in zip(feature_names, coefs, strict=False)}
-    else:
-        feature_importance = {name: 0.0 for name in feature_names}
-        logging.warning("Model does not have feature importance attributes")
+        return {name: float(coef) for name, coef in zip(feature_names, coefs, strict=False)}
+    logging.warning("Model does not have feature importance attributes")
+    return {name: 0.0 for name in feature_names}
+
+
+def validate(  # noqa: PLR0913
+    model_path: str,
+    x_test_path: str,
+    y_test_path: str,
+    chunk_size: int | None = None,
+    n_bootstrap: int = 200,
+    n_workers: int | None = None,
+    bootstrap_sample_size: int = BOOTSTRAP_SAMPLE_SIZE,
+) -> None:
+    """Évalue le modèle sur le jeu de test et le log dans mlflow.
+
+    La mémoire est bornée par chunk_size lignes plus l'échantillon de bootstrap_sample_size lignes
+    sur lequel portent les intervalles de confiance.
+    """
+    import joblib
+    import mlflow  # Nouvel import pour mlflow
+    from mlflow.models import infer_signature  # Nouvel import pour inférer la signature du modèle
+
+    logging.warning(f"validate {model_path}")
+    run_logger = get_run_logger()
+    model = joblib.load(download_artifact(model_path))  # Téléchargement du modèle depuis mlflow
+    schema_path = download_artifact(schema_path_for(model_path))  # Schéma du fit
+    with open(schema_path) as f:
+        schema = json.load(f)
+
+    x_chunks = _read_csv(download_artifact(x_test_path), chunk_size)  # Téléchargement des données depuis mlflow
+    y_chunks = _read_csv(download_artifact(y_test_path), chunk_size)
+
+    evaluation, x_example, y_example = _predict_chunks(model, schema, x_chunks, y_chunks, bootstrap_sample_size)
+
+    metrics = evaluation.metrics()
+    if n_bootstrap:
+        y_sample, proba_sample = evaluation.sample
+        for name, (lower, upper) in bootstrap_ci(y_sample, proba_sample, n_bootstrap, n_workers=n_workers).items():
+            metrics[f"{name}_ci_lower"] = lower
+            metrics[f"{name}_ci_upper"] = upper
+
+    feature_importance = _feature_importance(model, schema["columns"])
 
-    mlflow.log_metric("mse", mse) # Log des métriques dans mlflow
-    mlflow.log_metric("mae", mae)
-    mlflow.log_metric("r2", r2)
-    mlflow.log_metric("medae", medae)
-    mlflow.log_dict(feature_importance, "feature_importance.json") # Log de la feature importance dans mlflow
+    for name, value in metrics.items():
+        run_logger.log_metric(name, value)  # Log des métriques dans mlflow
+    run_logger.log_dict(evaluation.calibration(), "calibration.json")  # Courbe de calibration par tranche
+    run_logger.log_dict(feature_importance, "feature_importance.json")  # Log de la feature importance dans mlflow
 
     model_info = mlflow.sklearn.log_model(
-        model, name="model_final", signature=infer_signature(x_test, y_pred), input_example=x_test.head(10)
-    ) # Log du modèle validé dans mlflow
-    logging.warning(f"artifact path {model_info.artifact_path}") # Log des informations du modèle
+        model,
+        name="model_final",
+        signature=infer_signature(x_example, y_example),
+        input_example=x_example,
+    )  # Log du modèle validé dans mlflow
+    get_client().log_model_artifact(model_info.model_id, schema_path)  # Le schéma accompagne le modèle servi par l'API
+    logging.warning(f"artifact path {model_info.artifact_path}")  # Log des informations du modèle
     logging.warning(f"model uri {model_info.model_uri}")
     logging.warning(f"model uuid {model_info.model_uuid}")
     logging.warning(f"model metadata {model_info.metadata}")
 
     try:
-        mlflow.register_model(model_info.model_uri, "model_registered") # Enregistrement du modèle dans le modèle registry
+        mlflow.register_model(
+            model_info.model_uri, "model_registered"
+        )  # Enregistrement du modèle dans le modèle registry
     except Exception as e:
-        logging.error(f"Erreur registry: {e}") # Log de l'erreur si l'enregistrement échoue
+        logging.error(f"Erreur registry: {e}")  # Log de l'erreur si l'enregistrement échoue
@@ -0,0 +1,242 @@
+"""Logging mlflow asynchrone et par lots pour les étapes d'entraînement.
+
+Dans un run ouvert avec start_run, les métriques et paramètres sont bufferisés puis envoyés par
+lots avec log_batch, et les artefacts sont uploadés par un pool de threads : le calcul d'une étape
+se poursuit pendant les allers-retours vers le serveur de tracking. Tout est attendu avant la fin
+du run. Hors d'un tel run, get_run_logger retourne un logger synchrone (API fluent de mlflow).
+
+Les artefacts uploadés sont aussi rangés dans le cache local (titanic.artifact_cache) : download_artifact
+les relit sans les retélécharger.
+
+mlflow n'est importé qu'au premier usage : importer le package d'entraînement (tests, --help)
+ne coûte pas l'import de mlflow et ne demande aucune configuration de tracking.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from titanic.artifact_cache import get_cache
+
+if TYPE_CHECKING:
+    import mlflow
+    from mlflow.entities import Metric, Param
+
+UPLOAD_WORKERS = 4
+
+MAX_METRICS_PER_BATCH = 1000  # Limites de log_batch (mlflow.utils.validation)
+
+MAX_PARAMS_TAGS_PER_BATCH = 100
+
+MAX_ENTITIES_PER_BATCH = 1000  # Métriques et paramètres ensemble
+
+
+@functools.cache
+def get_client() -> mlflow.MlflowClient:
+    """Client mlflow partagé, créé au premier appel (et non à l'import des modules)."""
+    import mlflow
+
+    return mlflow.MlflowClient()
+
+
+def download_artifact(path: str) -> str:
+    """Chemin local d'un artefact du run courant, une fois uploadé : copie en cache, sinon téléchargement."""
+    import mlflow
+
+    run_id = mlflow.active_run().info.run_id
+    get_run_logger().wait_for(path)  # Mis en cache seulement une fois uploadé : attendre, et remonter son échec
+
+    def download(dst_path: str) -> str:
+        return get_client().download_artifacts(run_id=run_id, path=path, dst_path=dst_path)
+
+    return get_cache().fetch(f"runs:/{run_id}/{path}", download)
+
+
+class RunLogger:
+    """Logger synchrone : délègue directement à l'API fluent de mlflow."""
+
+    def log_metric(self, key: str, value: float, step: int = 0) -> None:
+        import mlflow
+
+        mlflow.log_metric(key, value, step=step)
+
+    def log_metrics(self, metrics: dict[str, float]) -> None:
+        for key, value in metrics.items():
+            self.log_metric(key, value)
+
+    def log_param(self, key: str, value: object) -> None:
+        import mlflow
+
+        mlflow.log_param(key, value)
+
+    def log_params(self, params: dict[str, object]) -> None:
+        import mlflow
+
+        mlflow.log_params(params)
+
+    def log_artifact(self, local_path: str, artifact_path: str | None = None) -> None:
+        import mlflow
+
+        mlflow.log_artifact(local_path, artifact_path)
+
+    def log_dict(self, dictionary: dict, artifact_file: str) -> None:
+        import mlflow
+
+        mlflow.log_dict(dictionary, artifact_file)
+
+    def wait_for(self, artifact_path: str) -> None:
+        """Attend que l'artefact soit disponible sur le serveur (immédiat en synchrone)."""
+
+    def flush(self) -> None:
+        """Envoie tout ce qui est en attente (rien en synchrone)."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class AsyncRunLogger(RunLogger):
+    """Logger d'un run : métriques et paramètres par lots, artefacts uploadés en arrière-plan."""
+
+    def __init__(
+        self, run_id: str, client: mlflow.MlflowClient | None = None, max_workers: int = UPLOAD_WORKERS
+    ) -> None:
+        self.run_id = run_id
+        self._client = client or get_client()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mlflow-upload")
+        self._lock = threading.Lock()
+        self._metrics: list[Metric] = []
+        self._params: list[Param] = []
+        self._uploads: dict[str, Future] = {}  # Chemin de l'artefact dans le run -> upload en cours
+        # Les appelants suppriment souvent leur fichier juste après log_artifact : copie locale le temps de l'upload
+        self._staging = Path(tempfile.mkdtemp(prefix="mlflow-staging-"))
+
+    def log_metric(self, key: str, value: float, step: int = 0) -> None:
+        from mlflow.entities import Metric
+
+        metric = Metric(key, float(value), int(time.time() * 1000), step)
+        with self._lock:
+            self._metrics.append(metric)
+            full = self._full()
+        if full:
+            self._send_batch()
+
+    def log_param(self, key: str, value: object) -> None:
+        from mlflow.entities import Param
+
+        with self._lock:
+            self._params.append(Param(key, str(value)))
+            full = self._full()
+        if full:
+            self._send_batch()
+
+    def _full(self) -> bool:
+        """Vrai si le lot en attente atteint une limite de log_batch (appelé sous le verrou)."""
+        return (
+            len(self._metrics) >= MAX_METRICS_PER_BATCH
+            or len(self._params) >= MAX_PARAMS_TAGS_PER_BATCH
+            or len(self._metrics) + len(self._params) >= MAX_ENTITIES_PER_BATCH
+        )
+
+    def log_params(self, params: dict[str, object]) -> None:
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def log_artifact(self, local_path: str, artifact_path: str | None = None) -> None:
+        staged_dir = self._staging / (artifact_path or "")
+        staged_dir.mkdir(parents=True, exist_ok=True)
+        staged = staged_dir / Path(local_path).name
+        staged.unlink(missing_ok=True)  # Nouveau fichier : un upload en cours lit encore l'ancien
+        shutil.copy2(local_path, staged)  # Copie : l'appelant peut réécrire ou supprimer son fichier
+        self._upload(str(staged), artifact_path)
+
+    def log_dict(self, dictionary: dict, artifact_file: str) -> None:
+        staged = self._staging / artifact_file
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        staged.unlink(missing_ok=True)
+        staged.write_text(json.dumps(dictionary, indent=2))
+        parent = str(Path(artifact_file).parent)
+        self._upload(str(staged), None if parent == "." else parent)
+
+    def _upload(self, staged: str, artifact_path: str | None) -> None:
+        key = f"{artifact_path}/{Path(staged).name}" if artifact_path else Path(staged).name
+        future = self._pool.submit(self._upload_and_cache, staged, artifact_path, key)
+        with self._lock:
+            self._uploads[key] = future
+
+    def _upload_and_cache(self, staged: str, artifact_path: str | None, key: str) -> None:
+        """Upload, puis copie en cache : le cache ne sert que des artefacts que le serveur a reçus."""
+        self._client.log_artifact(self.run_id, staged, artifact_path)
+        try:
+            get_cache().put(f"runs:/{self.run_id}/{key}", staged)  # Relu par download_artifact sans aller-retour
+        except OSError as e:
+            logging.warning(f"artifact cache unavailable for {key}: {e}")
+
+    def wait_for(self, artifact_path: str) -> None:
+        """Bloque jusqu'à la fin de l'upload de cet artefact (les autres continuent en arrière-plan)."""
+        with self._lock:
+            future = self._uploads.get(artifact_path)
+        if future is not None:
+            future.result()
+
+    def _send_batch(self) -> Future | None:
+        with self._lock:
+            metrics, self._metrics = self._metrics, []
+            params, self._params = self._params, []
+        if not metrics and not params:
+            return None
+        future = self._pool.submit(self._client.log_batch, self.run_id, metrics=metrics, params=params)
+        with self._lock:
+            self._uploads[f"batch-{id(future)}"] = future
+        return future
+
+    def flush(self) -> None:
+        """Envoie les métriques en attente et attend tous les uploads, en remontant la première erreur."""
+        self._send_batch()
+        with self._lock:
+            pending = list(self._uploads.values())
+        wait(pending)
+        for future in pending:
+            future.result()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True)
+            shutil.rmtree(self._staging, ignore_errors=True)
+
+
+_loggers: list[AsyncRunLogger] = []  # Pile des runs ouverts avec start_run (runs imbriqués)
+_sync_logger = RunLogger()
+
+
+def get_run_logger() -> RunLogger:
+    """Logger du run courant : asynchrone dans start_run, synchrone sinon."""
+    return _loggers[-1] if _loggers else _sync_logger
+
+
+@contextmanager
+def start_run(**kwargs: object) -> Iterator[mlflow.ActiveRun]:
+    """mlflow.start_run avec logging asynchrone ; les uploads sont attendus avant la fin du run."""
+    import mlflow
+
+    with mlflow.start_run(**kwargs) as run:
+        run_logger = AsyncRunLogger(run.info.run_id)
+        _loggers.append(run_logger)
+        try:
+            yield run
+        finally:
+            _loggers.pop()
+            logging.warning(f"waiting for pending mlflow uploads of run {run.info.run_id}")
+            run_logger.close()
@@ -0,0 +1,64 @@
+import os
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from titanic.api.benchmark import JwksStub, auth_env, stub_jwks
+from titanic.api.infer import create_app
+
+
+@pytest.fixture(scope="module")
+def jwks_stub():
+    return JwksStub()
+
+
+@pytest.fixture
+def admin_client(jwks_stub):
+    """API avec le profilage activé et la vraie vérification des tokens (JWKS local)."""
+    model = Mock()
+    model.predict.return_value = np.array([1])
+    with (
+        patch.dict(os.environ, {**auth_env(True), "PROFILING_ENABLED": "true"}),
+        patch("titanic.api.infer.load_model", return_value=model),
+        stub_jwks(jwks_stub.jwks),
+        TestClient(create_app(tracing=False)) as client,
+    ):
+        yield client
+
+
+def test_profiling_routes_are_not_mounted_by_default():
+    """Test que sans PROFILING_ENABLED les routes d'administration n'existent pas."""
+    with patch.dict(os.environ, {"PROFILING_ENABLED": ""}):
+        client = TestClient(create_app(tracing=False))
+    assert client.get("/admin/profile/cpu").status_code == 404
+
+
+def test_profiling_requires_admin_scope(admin_client, jwks_stub):
+    """Test qu'un token sans le scope api:admin est refusé."""
+    headers = {"Authorization": f"Bearer {jwks_stub.token('api:read')}"}
+    response = admin_client.get("/admin/profile/cpu", params={"seconds": 0.05}, headers=headers)
+    assert response.status_code == 403
+
+
+def test_cpu_profile_is_downloaded(admin_client, jwks_stub):
+    """Test que le profil CPU est renvoyé en fichier folded à télécharger."""
+    headers = {"Authorization": f"Bearer {jwks_stub.token('api:admin')}"}
+    response = admin_client.get("/admin/profile/cpu", params={"seconds": 0.1}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].startswith('attachment; filename="cpu-')
+    assert response.headers["content-disposition"].endswith('.folded"')
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+
+def test_memory_profile_is_downloaded_and_duration_is_bounded(admin_client, jwks_stub):
+    """Test que le rapport tracemalloc est téléchargeable et que la durée est bornée."""
+    headers = {"Authorization": f"Bearer {jwks_stub.token('api:admin')}"}
+    response = admin_client.get("/admin/profile/memory", params={"seconds": 0.1}, headers=headers)
+    assert response.status_code == 200
+    assert response.text.startswith("# 0.1s")
+
+    too_long = admin_client.get("/admin/profile/memory", params={"seconds": 3600}, headers=headers)
+    assert too_long.status_code == 422
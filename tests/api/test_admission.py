@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from titanic.api.admission import AdmissionMiddleware
+from titanic.api.metrics import SHED_REQUESTS
+
+
+def _middleware(app, concurrency=1, queue=1, timeout=1.0):
+    env = {
+        "ADMISSION_MAX_CONCURRENCY": str(concurrency),
+        "ADMISSION_MAX_QUEUE": str(queue),
+        "ADMISSION_QUEUE_TIMEOUT": str(timeout),
+    }
+    with patch.dict(os.environ, env):
+        return AdmissionMiddleware(app)
+
+
+def _blocking_app():
+    """Application ASGI qui répond 200 quand release est posé, en notant les requêtes exécutées."""
+    release, started = asyncio.Event(), []
+
+    async def app(scope, receive, send):
+        started.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[1]"})
+
+    return app, release, started
+
+
+async def _call(middleware, path="/infer", headers=()):
+    """Status et headers de la réponse envoyée par le middleware."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": path, "method": "POST", "headers": list(headers)}
+    await middleware(scope, receive, send)
+    return sent[0]["status"], dict(sent[0]["headers"])
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_shed_immediately_with_retry_after():
+    """Test qu'au-delà de la concurrence et de la file, la requête reçoit aussitôt un 503 avec Retry-After."""
+    app, release, started = _blocking_app()
+    middleware = _middleware(app, concurrency=1, queue=1)
+    before = SHED_REQUESTS.value(reason="queue_full")
+
+    running = asyncio.create_task(_call(middleware))
+    queued = asyncio.create_task(_call(middleware))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    status, headers = await _call(middleware)
+
+    assert status == 503 and headers[b"retry-after"] == b"1"
+    assert time.perf_counter() - start < 0.05
+    assert started == ["/infer"]  # La requête en file attend sa place
+    release.set()
+    assert [(await running)[0], (await queued)[0]] == [200, 200]
+    assert started == ["/infer", "/infer"]
+    assert SHED_REQUESTS.value(reason="queue_full") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_queued_request_times_out_and_releases_nothing():
+    """Test qu'une requête en file trop longtemps est délestée, sans prendre de place ensuite."""
+    app, release, _ = _blocking_app()
+    middleware = _middleware(app, concurrency=1, queue=4, timeout=0.05)
+
+    running = asyncio.create_task(_call(middleware))
+    await asyncio.sleep(0.01)
+    status, _ = await _call(middleware)
+    release.set()
+    await running
+
+    assert status == 503
+    assert middleware._active == 0 and not middleware._waiters
+
+
+@pytest.mark.asyncio
+async def test_expired_deadline_is_dropped_without_running():
+    """Test qu'une requête dont l'échéance du client est passée n'est pas exécutée."""
+    app, release, started = _blocking_app()
+    release.set()
+    middleware = _middleware(app)
+    deadline = str(time.time() - 1).encode()
+
+    status, _ = await _call(middleware, headers=[(b"x-request-deadline", deadline)])
+
+    assert status == 503 and started == []
+    assert (await _call(middleware, headers=[(b"x-request-deadline", str(time.time() + 5).encode())]))[0] == 200
+
+
+@pytest.mark.asyncio
+async def test_probes_bypass_admission_and_cancelled_waiter_does_not_leak():
+    """Test que /health passe même à saturation, et qu'un client parti de la file ne garde pas de place."""
+    app, release, started = _blocking_app()
+    middleware = _middleware(app, concurrency=1, queue=1)
+
+    running = asyncio.create_task(_call(middleware))
+    queued = asyncio.create_task(_call(middleware))
+    health = asyncio.create_task(_call(middleware, path="/health"))
+    await asyncio.sleep(0.01)
+    assert started == ["/infer", "/health"]  # File pleine, la sonde passe quand même
+    queued.cancel()
+    release.set()
+    assert (await health)[0] == 200
+    await running
+
+    assert middleware._active == 0 and not middleware._waiters
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/infer/stream", "/infer/arrow"])
+async def test_streams_are_shed_when_saturated(path):
+    """Test qu'un flux sous /infer est délesté avec un 503 quand le limiteur est saturé."""
+    app, release, started = _blocking_app()
+    middleware = _middleware(app, concurrency=1, queue=0)
+
+    running = asyncio.create_task(_call(middleware, path=path))
+    await asyncio.sleep(0.01)
+    status, headers = await _call(middleware, path=path)
+    outside = asyncio.create_task(_call(middleware, path="/inference"))
+    await asyncio.sleep(0.01)
+    release.set()
+    await running
+
+    assert status == 503 and b"retry-after" in headers
+    assert started == [path, "/inference"]  # Hors du préfixe /infer : pas limité
+    assert (await outside)[0] == 200
@@ -1,10 +1,15 @@
-from unittest.mock import patch, Mock
-import numpy as np
-import builtins
+import os
+import pickle
+import signal
+import subprocess
+import sys
+from unittest.mock import patch
 
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
 
-mock_model = Mock()
-mock_model.predict.return_value = np.array([1])
+from titanic.api.loadtest import _free_port, run_load, wait_until_ready
 
 
 def mock_verify_factory(scope):
@@ -14,31 +19,15 @@ def mock_verify_factory(scope):
     return _verify
 
 
-original_open = builtins.open
-
-
-def selective_mock_open(file, *args, **kwargs):
-    if "model.pkl" in str(file):
-        mock_file = Mock()
-        mock_file.__enter__ = Mock(return_value=mock_file)
-        mock_file.__exit__ = Mock(return_value=False)
-        return mock_file
-    return original_open(file, *args, **kwargs)
-
-
-with (
-    patch("builtins.open", side_effect=selective_mock_open),
-    patch("pickle.load", return_value=mock_model),
-    patch("titanic.api.infer.verify_token", mock_verify_factory),
-):
+with patch("titanic.api.infer.verify_token", mock_verify_factory):
     from titanic.api.infer import Pclass, Sex, Passenger
-    from titanic.api.main import main
+    from titanic.api.main import default_workers, main
     from titanic.api import infer
 
 
 def test_api_main_is_runnable():
     """Test que main peut être appelé (sans vraiment démarrer le serveur)."""
-    with patch("uvicorn.run") as mock_run:
+    with patch("uvicorn.run") as mock_run, patch.dict(os.environ, {"API_WORKERS": "1"}):
         main()
 
         mock_run.assert_called_once()
@@ -80,3 +69,51 @@ def test_api_passenger_dataclass():
     assert passenger_dict["Sex"] == "female"
     assert passenger_dict["SibSp"] == 1
     assert passenger_dict["Parch"] == 2
+
+
+def test_default_workers_follows_cpu_quota():
+    """Test que le nombre de workers vient du quota CPU, sauf si API_WORKERS est renseigné."""
+    with patch.dict(os.environ, {"API_WORKERS": ""}), patch("titanic.api.main.available_cpus", return_value=3):
+        assert default_workers() == 3
+        with patch.dict(os.environ, {"API_WORKERS": "2"}):
+            assert default_workers() == 2
+
+
+def test_main_uses_prefork_with_several_workers():
+    """Test qu'avec plusieurs workers, main passe par le serveur pré-forké."""
+    with (
+        patch("titanic.api.main.serve_prefork", return_value=0) as mock_serve,
+        patch("uvicorn.run") as mock_run,
+        patch.dict(os.environ, {"API_WORKERS": "2"}),
+    ):
+        try:
+            main()
+        except SystemExit as e:
+            assert e.code == 0
+    mock_serve.assert_called_once_with("0.0.0.0", 8080, 2)
+    mock_run.assert_not_called()
+
+
+def test_prefork_workers_serve_requests(tmp_path):
+    """Test de bout en bout : le parent charge le modèle, deux workers répondent, SIGTERM arrête tout."""
+    x = pd.DataFrame(np.zeros((4, 5)), columns=["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"])
+    model_path = tmp_path / "model.pkl"
+    model_path.write_bytes(pickle.dumps(DummyClassifier(strategy="constant", constant=1).fit(x, [0, 1, 1, 1])))
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        "API_WORKERS": "2",
+        "PORT": str(port),
+        "MODEL_PATH": str(model_path),
+        "OTEL_SDK_DISABLED": "true",
+    }
+    server = subprocess.Popen([sys.executable, "-m", "titanic.api.main"], env=env)  # noqa: S603
+    try:
+        wait_until_ready(port)
+        result = run_load(port, concurrency=2, duration=0.5)
+        assert result["requests"] > 0
+        assert result["errors"] == 0
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
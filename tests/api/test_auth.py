@@ -1,7 +1,13 @@
+import io
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 import pytest
 import jwt
 from datetime import datetime, timedelta, UTC
 from unittest.mock import Mock, patch, MagicMock
+from jwt.algorithms import RSAAlgorithm
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 from cryptography.hazmat.primitives import serialization
@@ -9,6 +15,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.backends import default_backend
 
 from titanic.api.auth import verify_token
+from titanic.api.metrics import CACHE_REQUESTS
 
 
 private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
@@ -25,6 +32,13 @@ public_pem = public_key.public_bytes(
 )
 
 
+@pytest.fixture(autouse=True)
+def empty_jwks_cache():
+    """Chaque test part d'un cache de clients JWKS vide (les clients sont mockés par test)."""
+    with patch("titanic.api.auth._jwks_clients", {}):
+        yield
+
+
 def create_jwt(payload: dict, private_key_pem: bytes = private_pem, algorithm: str = "RS256") -> str:
     """Helper pour créer un JWT de test avec RSA."""
     return jwt.encode(payload, private_key_pem, algorithm=algorithm)
@@ -269,3 +283,95 @@ async def test_verify_token_with_multiple_scopes():
 
         result = await validator(credentials)
         assert result == token
+
+
+@pytest.mark.asyncio
+async def test_jwks_client_is_reused_between_requests():
+    """Test que le client JWKS (et son cache de clés) est créé une fois par domaine."""
+    payload = {
+        "scope": "api:read",
+        "aud": "titanic-api",
+        "iss": "https://test-tenant.eu.auth0.com/",
+        "exp": datetime.now(UTC) + timedelta(hours=1),
+    }
+    token = create_jwt(payload)
+    env = {"OAUTH2_DOMAIN": "test-tenant.eu.auth0.com", "OAUTH2_JWT_AUDIENCE": "titanic-api"}
+    hits = CACHE_REQUESTS.value(cache="jwks_client", result="hit")
+
+    with (
+        patch("os.getenv", side_effect=lambda key, default=None: env.get(key, default)),
+        patch("titanic.api.auth.PyJWKClient") as mock_jwks_client,
+    ):
+        mock_jwks_client.return_value.get_signing_key_from_jwt.return_value.key = public_pem
+        validator = verify_token("api:read")
+        credentials = Mock(spec=HTTPAuthorizationCredentials)
+        credentials.credentials = token
+        for _ in range(3):
+            assert await validator(credentials) == token
+
+    mock_jwks_client.assert_called_once_with("https://test-tenant.eu.auth0.com/.well-known/jwks.json", lifespan=300.0)
+    assert CACHE_REQUESTS.value(cache="jwks_client", result="hit") == hits + 2
+
+
+def _jwks_response(*keys: tuple) -> io.BytesIO:
+    """Réponse HTTP d'un endpoint JWKS publiant les clés publiques (kid, clé privée) données."""
+    jwks = [
+        {**RSAAlgorithm.to_jwk(key.public_key(), as_dict=True), "kid": kid, "use": "sig", "alg": "RS256"}
+        for kid, key in keys
+    ]
+    return io.BytesIO(json.dumps({"keys": jwks}).encode())
+
+
+def _credentials(key: rsa.RSAPrivateKey, kid: str) -> HTTPAuthorizationCredentials:
+    payload = {
+        "scope": "api:read",
+        "aud": "titanic-api",
+        "iss": "https://test-tenant.eu.auth0.com/",
+        "exp": datetime.now(UTC) + timedelta(hours=1),
+    }
+    token = jwt.encode(payload, key, algorithm="RS256", headers={"kid": kid})
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@contextmanager
+def _jwks_endpoint(*responses: io.BytesIO) -> Iterator[Mock]:
+    """Sert les réponses JWKS données, dans l'ordre, au vrai PyJWKClient."""
+    env = {"OAUTH2_DOMAIN": "test-tenant.eu.auth0.com", "OAUTH2_JWT_AUDIENCE": "titanic-api"}
+    with (
+        patch("os.getenv", side_effect=lambda key, default=None: env.get(key, default)),
+        patch("jwt.jwks_client.urllib.request.urlopen", side_effect=list(responses)) as urlopen,
+    ):
+        yield urlopen
+
+
+@pytest.mark.asyncio
+async def test_jwks_client_reloads_keys_after_rotation():
+    """Test que les clés en cache servent tant que le kid est connu, et qu'une rotation force un rechargement."""
+    new_key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    validator = verify_token("api:read")
+
+    with _jwks_endpoint(
+        _jwks_response(("key-1", private_key)), _jwks_response(("key-1", private_key), ("key-2", new_key))
+    ) as urlopen:
+        await validator(_credentials(private_key, "key-1"))
+        await validator(_credentials(private_key, "key-1"))
+        assert urlopen.call_count == 1
+
+        await validator(_credentials(new_key, "key-2"))
+        await validator(_credentials(new_key, "key-2"))
+        assert urlopen.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_jwks_cache_expires():
+    """Test que le jeu de clés est retéléchargé une fois OAUTH2_JWKS_CACHE_SECONDS écoulé."""
+    validator = verify_token("api:read")
+    responses = [_jwks_response(("key-1", private_key)) for _ in range(2)]
+
+    with _jwks_endpoint(*responses) as urlopen, patch("titanic.api.auth.JWKS_CACHE_SECONDS", 0.05):
+        await validator(_credentials(private_key, "key-1"))
+        await validator(_credentials(private_key, "key-1"))
+        time.sleep(0.1)
+        await validator(_credentials(private_key, "key-1"))
+
+    assert urlopen.call_count == 2
@@ -0,0 +1,74 @@
+import json
+import pickle
+
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyClassifier
+
+from titanic.api.benchmark import compare, payload_mix, run
+
+
+def _model_file(tmp_path):
+    x = pd.DataFrame(np.zeros((4, 5)), columns=["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"])
+    path = tmp_path / "model.pkl"
+    path.write_bytes(pickle.dumps(DummyClassifier(strategy="constant", constant=1).fit(x, [0, 1, 1, 1])))
+    return str(path)
+
+
+def test_payload_mix_targets_single_or_batch_endpoint():
+    """Test que la taille de requête choisit /infer ou /infer/batch."""
+    single = payload_mix("random", 1, n_payloads=3)
+    batch = payload_mix("random", 5, n_payloads=3)
+    assert {path for path, _ in single} == {"/infer"}
+    assert {path for path, _ in batch} == {"/infer/batch"}
+    assert all(len(json.loads(body)) == 5 for _, body in batch)
+    assert payload_mix("random", 1, n_payloads=3) == single, "Le mélange devrait être reproductible"
+
+
+def test_inprocess_benchmark_with_jwks_stub(tmp_path):
+    """Test que le benchmark en process vérifie de vrais tokens signés par le JWKS local."""
+    report = run(_model_file(tmp_path), ["inprocess"], ["off", "on"], [1, 4], [2], duration=0.2)
+
+    assert len(report["results"]) == 4
+    for result in report["results"]:
+        assert result["requests"] > 0
+        assert result["errors"] == 0, f"Requêtes en échec pour {result}"
+        assert result["latency_p99_ms"] >= result["latency_p50_ms"]
+    batch = next(r for r in report["results"] if r["batch_size"] == 4)
+    assert batch["rows_per_second"] == batch["throughput_rps"] * 4
+
+    rows = compare(report, report)
+    assert all(row["throughput_rps_change"] == 0 for row in rows)
+
+
+def test_socket_benchmark_measures_tracing_export(tmp_path):
+    """Test que les modes de tracing exportent vers le collecteur local, et rien sans tracing."""
+    modes = ["inprocess", "socket"]
+    report = run(_model_file(tmp_path), modes, ["off"], [1], [2], duration=0.3, tracing=("off", "full"))
+
+    assert [(r["mode"], r["tracing"]) for r in report["results"]] == [
+        ("inprocess", "off"),
+        ("socket", "off"),
+        ("socket", "full"),
+    ], "Le tracing en process devrait être ignoré (un seul provider OTEL par process)"
+    off, full = report["results"][1:]
+    assert off["errors"] == full["errors"] == 0
+    assert off["exported_kb"] == 0
+    assert full["exported_kb"] > 0, "Les spans vidés à l'arrêt devraient atteindre le collecteur"
+
+
+def test_encodings_report_cpu_per_request(tmp_path):
+    """Test que chaque encodage est mesuré sans erreur, avec le temps CPU par requête."""
+    report = run(
+        _model_file(tmp_path), ["inprocess"], ["off"], [1, 3], [1], duration=0.2, encodings=("json", "msgpack")
+    )
+
+    assert {(r["encoding"], r["batch_size"]) for r in report["results"]} == {
+        ("json", 1),
+        ("json", 3),
+        ("msgpack", 1),
+        ("msgpack", 3),
+    }
+    for result in report["results"]:
+        assert result["errors"] == 0, f"Requêtes en échec pour {result}"
+        assert result["cpu_ms_per_request"] > 0
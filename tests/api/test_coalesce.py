@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from titanic.api.coalesce import SingleFlight
+
+
+def test_concurrent_calls_with_same_key_share_one_evaluation():
+    """Test que les appels concurrents de même clé attendent l'évaluation en cours au lieu de la refaire."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def evaluate():
+        calls.append(1)
+        release.wait(5)
+        return [1]
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flight.do, ("v1", 1, "female"), evaluate) for _ in range(4)]
+        while len(calls) == 0 or any(future.done() for future in futures):
+            time.sleep(0.01)
+        time.sleep(0.1)  # Les autres appels sont en attente du premier
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert sorted(coalesced for _, coalesced in results) == [False, True, True, True]
+    assert all(result == [1] for result, _ in results)
+    assert len(flight) == 0  # Rien n'est gardé après l'évaluation
+
+
+def test_different_keys_and_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("a", lambda: 2) == (2, False)
+    assert flight.do("b", lambda: 3) == (3, False)
+
+
+def test_error_is_raised_for_waiting_calls():
+    """Test qu'une erreur de l'évaluation est levée pour l'appel qui l'a faite comme pour ceux qui l'attendaient."""
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("model failure")
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, "k", failing)
+        started.wait(5)
+        follower = pool.submit(flight.do, "k", lambda: pytest.fail("the evaluation must not run twice"))
+        time.sleep(0.1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="model failure"):
+                future.result()
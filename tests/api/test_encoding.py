@@ -0,0 +1,70 @@
+import os
+from unittest.mock import Mock, patch
+
+import numpy as np
+import ormsgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from titanic.api.infer import create_app
+
+MSGPACK_HEADERS = {"Content-Type": "application/msgpack", "Accept": "application/msgpack", "Authorization": "Bearer t"}
+
+
+@pytest.fixture
+def model():
+    model = Mock()
+    model.predict.side_effect = lambda features: np.ones(len(features), dtype=np.int64)
+    return model
+
+
+@pytest.fixture
+def client(model):
+    with (
+        patch.dict(os.environ, {"OAUTH2_DOMAIN": ""}),
+        patch("titanic.api.infer.load_model", return_value=model),
+        TestClient(create_app(tracing=False)) as client,
+    ):
+        yield client
+
+
+def test_msgpack_request_and_response(client):
+    """Test qu'un passager envoyé en MessagePack est prédit et la réponse renvoyée en MessagePack."""
+    body = ormsgpack.packb({"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0})
+    response = client.post("/infer", content=body, headers=MSGPACK_HEADERS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert ormsgpack.unpackb(response.content) == [1]
+
+
+def test_msgpack_batch(client, model):
+    """Test que /infer/batch accepte et renvoie du MessagePack, en un seul appel au modèle."""
+    passengers = [{"pclass": 3, "sex": "male", "sibSp": i, "parch": 0} for i in range(3)]
+    response = client.post("/infer/batch", content=ormsgpack.packb(passengers), headers=MSGPACK_HEADERS)
+
+    assert response.status_code == 200
+    assert ormsgpack.unpackb(response.content) == [1, 1, 1]
+    model.predict.assert_called_once()
+
+
+def test_msgpack_body_is_validated_like_json(client):
+    """Test qu'un corps MessagePack invalide est refusé comme un corps JSON invalide."""
+    invalid = ormsgpack.packb({"pclass": 4, "sex": "female", "sibSp": 0, "parch": 0})
+    assert client.post("/infer", content=invalid, headers=MSGPACK_HEADERS).status_code == 422
+    assert client.post("/infer", content=b"\xc1", headers=MSGPACK_HEADERS).status_code == 400
+
+
+@pytest.mark.parametrize(
+    "accept",
+    [None, "*/*", "application/json", "application/msgpack;q=0, application/json"],
+)
+def test_json_stays_the_default(client, accept):
+    """Test que JSON est renvoyé sans demande explicite de MessagePack."""
+    headers = {"Authorization": "Bearer t", **({"Accept": accept} if accept else {})}
+    payload = {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
+    response = client.post("/infer", json=payload, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == [1]
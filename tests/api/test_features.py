@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from titanic.api.features import DEFAULT_SCHEMA, FeatureEncoder, load_feature_schema
+
+
+def test_encoder_matches_training_layout():
+    """Test que l'encodeur produit la même matrice que get_dummies à l'entraînement."""
+    rows = [
+        {"Pclass": 1, "Sex": "female", "SibSp": 1, "Parch": 0},
+        {"Pclass": 3, "Sex": "male", "SibSp": 0, "Parch": 2},
+    ]
+
+    encoded = FeatureEncoder(DEFAULT_SCHEMA).encode(rows)
+
+    expected = pd.get_dummies(pd.DataFrame(rows))
+    assert list(encoded.columns) == list(expected.columns)
+    assert encoded.to_numpy().tolist() == expected.astype(float).to_numpy().tolist()
+
+
+def test_encoder_follows_schema_column_order():
+    schema = {
+        "features": [
+            {"name": "Sex", "dtype": "category", "categories": ["female", "male"]},
+            {"name": "Pclass", "dtype": "int64"},
+        ],
+        "columns": ["Sex_male", "Pclass", "Sex_female"],
+    }
+
+    encoded = FeatureEncoder(schema).encode([{"Pclass": 2, "Sex": "male"}])
+
+    assert encoded.iloc[0].tolist() == [1.0, 2.0, 0.0]
+
+
+def test_load_feature_schema_from_file(tmp_path):
+    schema_file = tmp_path / "feature_schema.json"
+    schema_file.write_text(json.dumps({"features": [], "columns": ["a"]}))
+
+    assert load_feature_schema(schema_file)["columns"] == ["a"]
+    assert load_feature_schema(tmp_path / "missing.json") == DEFAULT_SCHEMA
+
+
+def test_encode_columns_matches_row_encoding():
+    """Test que l'encodage par colonnes donne la même matrice que l'encodage ligne à ligne."""
+    rows = [
+        {"Pclass": 1, "Sex": "female", "SibSp": 1, "Parch": 0},
+        {"Pclass": 3, "Sex": "male", "SibSp": 0, "Parch": 2},
+        {"Pclass": 2, "Sex": "unknown", "SibSp": 4, "Parch": 1},
+    ]
+    encoder = FeatureEncoder(DEFAULT_SCHEMA)
+    columns = {name: np.array([row[name] for row in rows]) for name in encoder.inputs}
+
+    encoded = encoder.encode_columns(columns, len(rows))
+
+    pd.testing.assert_frame_equal(encoded, encoder.encode(rows))
@@ -1,12 +1,13 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from fastapi.testclient import TestClient
-import builtins
-
-
-mock_model = Mock()
-mock_model.predict.return_value = np.array([1])
 
 
 def mock_verify_factory(scope):
@@ -16,46 +17,33 @@ def mock_verify_factory(scope):
     return _verify
 
 
-original_open = builtins.open
-
-
-def selective_mock_open(file, *args, **kwargs):
-    if "model.pkl" in str(file):
-        mock_file = Mock()
-        mock_file.__enter__ = Mock(return_value=mock_file)
-        mock_file.__exit__ = Mock(return_value=False)
-        return mock_file
-    return original_open(file, *args, **kwargs)
+with patch("titanic.api.infer.verify_token", mock_verify_factory):
+    from titanic.api.infer import create_app
+    from titanic.api.metrics import COALESCED_REQUESTS
 
 
-with (
-    patch("builtins.open", side_effect=selective_mock_open),
-    patch("pickle.load", return_value=mock_model),
-    patch("titanic.api.infer.verify_token", mock_verify_factory),
-):
-    from titanic.api.infer import app
-
 @pytest.fixture(autouse=True)
 def reset_oauth_env():
-    import os
     """Force OAUTH2_DOMAIN à vide pour tous les tests."""
     with patch.dict(os.environ, {"OAUTH2_DOMAIN": ""}, clear=False):
         yield
 
+
 @pytest.fixture
 def mock_infer_model():
-    """Mock du modèle ML pour les tests."""
+    """Mock du modèle ML, chargé par le lifespan à la place du pickle."""
     model = Mock()
     model.predict.return_value = np.array([1])
 
-    with patch("titanic.api.infer.model", model):
+    with patch("titanic.api.infer.load_model", return_value=model):
         yield model
 
 
 @pytest.fixture
-def client():
-    """Client de test."""
-    return TestClient(app)
+def client(mock_infer_model):
+    """Client de test : le context manager exécute le lifespan (chargement du modèle)."""
+    with TestClient(create_app(tracing=False)) as client:
+        yield client
 
 
 def test_health_endpoint(client):
@@ -126,3 +114,280 @@ def test_infer_without_token(client):
     payload = {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
     response = client.post("/infer", json=payload)
     assert response.status_code == 401
+
+
+def test_infer_encodes_with_training_layout(client, mock_infer_model):
+    """Test que le modèle reçoit les colonnes du fit, dans le même ordre."""
+    mock_infer_model.reset_mock()
+    payload = {"pclass": 2, "sex": "male", "sibSp": 1, "parch": 0}
+    response = client.post("/infer", json=payload, headers={"Authorization": "Bearer test-token"})
+    assert response.status_code == 200
+    features = mock_infer_model.predict.call_args.args[0]
+    assert list(features.columns) == ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"]
+    assert features.iloc[0].tolist() == [2.0, 1.0, 0.0, 0.0, 1.0]
+
+
+def test_readiness_reports_startup_time(client):
+    """Test que la readiness est exposée séparément de la liveness, avec le temps de démarrage."""
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["startup_seconds"] >= 0
+
+
+def test_not_ready_before_startup(mock_infer_model):
+    """Test qu'avant le lifespan, le worker est vivant mais pas prêt et refuse l'inférence."""
+    client = TestClient(create_app(tracing=False))  # Sans context manager : le lifespan ne s'exécute pas
+    assert client.get("/health").status_code == 200
+    assert client.get("/health/ready").status_code == 503
+    payload = {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
+    response = client.post("/infer", json=payload, headers={"Authorization": "Bearer test-token"})
+    assert response.status_code == 503
+    mock_infer_model.predict.assert_not_called()
+
+
+def test_import_does_not_load_the_model():
+    """Test que l'import du module ne charge ni le modèle ni la télémétrie."""
+    with patch("titanic.api.infer.load_model") as mock_load, patch("titanic.telemetry.configure") as mock_tracing:
+        create_app()
+    mock_load.assert_not_called()
+    mock_tracing.assert_not_called()
+
+
+def test_lifespan_configures_and_flushes_telemetry(mock_infer_model):
+    """Test que la télémétrie est installée au démarrage du worker et vidée à son arrêt."""
+    with (
+        patch("titanic.telemetry.configure") as mock_configure,
+        patch("titanic.telemetry.shutdown") as mock_shutdown,
+        TestClient(create_app()) as client,
+    ):
+        assert client.get("/health/ready").status_code == 200
+        mock_configure.assert_called_once_with("titanic-inference-api")
+        mock_shutdown.assert_not_called()
+    mock_shutdown.assert_called_once()
+
+
+def test_infer_batch_predicts_in_one_call(client, mock_infer_model):
+    """Test que /infer/batch encode tous les passagers et appelle le modèle une seule fois."""
+    mock_infer_model.reset_mock()
+    mock_infer_model.predict.return_value = np.array([1, 0])
+    payload = [
+        {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0},
+        {"pclass": 3, "sex": "male", "sibSp": 1, "parch": 2},
+    ]
+    response = client.post("/infer/batch", json=payload, headers={"Authorization": "Bearer test-token"})
+    assert response.status_code == 200
+    assert response.json() == [1, 0]
+    mock_infer_model.predict.assert_called_once()
+    features = mock_infer_model.predict.call_args.args[0]
+    assert features.values.tolist() == [[1.0, 0.0, 0.0, 1.0, 0.0], [3.0, 1.0, 2.0, 0.0, 1.0]]
+
+
+def test_metrics_cover_the_inference_hot_path(client, mock_infer_model):
+    """Test que /metrics expose les étapes de l'inférence, la taille des lots et la version du modèle."""
+    payload = [{"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}] * 3
+    client.post("/infer/batch", json=payload, headers={"Authorization": "Bearer test-token"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    for name in (
+        "titanic_api_decode_auth_seconds_count",
+        "titanic_api_encode_seconds_count",
+        "titanic_api_predict_seconds_count",
+        "titanic_api_request_seconds_count",
+    ):
+        assert f'{name}{{worker="' in text and 'path="/infer/batch"' in text, name
+    assert 'titanic_api_batch_size_bucket{worker="' in text
+    assert 'titanic_api_model_info{worker="' in text and 'version="unknown"} 1' in text
+    assert 'titanic_api_requests_total{worker="' in text and 'status="200"' in text
+
+
+@pytest.mark.parametrize(
+    ("lean", "recording", "expected_attributes"),
+    [(False, True, 6), (True, True, 0), (False, False, 0)],
+)
+def test_lean_or_unsampled_span_skips_passenger_attributes(client, lean, recording, expected_attributes):
+    """Test qu'en mode lean, ou pour un span non échantillonné, aucun attribut par passager n'est posé."""
+    span = Mock()
+    span.is_recording.return_value = recording
+    tracer = Mock()
+    tracer.start_as_current_span.return_value.__enter__ = Mock(return_value=span)
+    tracer.start_as_current_span.return_value.__exit__ = Mock(return_value=None)
+    payload = {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
+
+    with patch("titanic.api.infer.tracer", tracer), patch("titanic.api.infer.TRACING_LEAN", lean):
+        response = client.post("/infer", json=payload, headers={"Authorization": "Bearer test-token"})
+
+    assert response.status_code == 200
+    tracer.start_as_current_span.assert_called_once_with("model_inference")
+    assert span.set_attribute.call_count == expected_attributes
+    assert span.add_event.call_count == (1 if expected_attributes else 0)
+
+
+def _arrow_body(content_type, n_rows):
+    """Corps Arrow stream, Arrow file ou Parquet de n_rows passagers."""
+    table = pa.table(
+        {
+            "Pclass": pa.array([1, 2, 3] * n_rows, type=pa.int64())[:n_rows],
+            "Sex": pa.array(["female", "male"] * n_rows)[:n_rows].dictionary_encode(),
+            "SibSp": pa.array(range(n_rows), type=pa.int64()),
+            "Parch": pa.array([0] * n_rows, type=pa.int8()),
+        }
+    )
+    sink = io.BytesIO()
+    if content_type == "application/vnd.apache.parquet":
+        pq.write_table(table, sink, row_group_size=4)
+    else:
+        new = pa.ipc.new_stream if content_type.endswith("stream") else pa.ipc.new_file
+        with new(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=4)
+    return sink.getvalue()
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    ["application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file", "application/vnd.apache.parquet"],
+)
+def test_infer_arrow_scores_columns_in_chunks(client, mock_infer_model, content_type):
+    """Test que /infer/arrow encode les colonnes par tranches et renvoie une colonne prediction Arrow."""
+    mock_infer_model.predict.side_effect = lambda features: features["Sex_female"].to_numpy().astype(int)
+    headers = {"Authorization": "Bearer test-token", "Content-Type": content_type}
+
+    with patch("titanic.api.columnar.CHUNK_ROWS", 3):
+        response = client.post("/infer/arrow", content=_arrow_body(content_type, 10), headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    predictions = pa.ipc.open_stream(response.content).read_all()
+    assert predictions.column_names == ["prediction"]
+    assert predictions["prediction"].to_pylist() == [1, 0] * 5
+    assert max(len(call.args[0]) for call in mock_infer_model.predict.call_args_list) <= 3
+
+
+def test_infer_arrow_rejects_invalid_bodies(client):
+    """Test les refus de /infer/arrow : type non supporté, colonne manquante, corps illisible, corps trop gros."""
+    auth = {"Authorization": "Bearer test-token"}
+    stream = {**auth, "Content-Type": "application/vnd.apache.arrow.stream"}
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, pa.schema([("Pclass", pa.int64())])) as writer:
+        writer.write_table(pa.table({"Pclass": [1]}))
+
+    json_body = client.post("/infer/arrow", content=b"{}", headers={**auth, "Content-Type": "application/json"})
+    assert json_body.status_code == 415
+    missing = client.post("/infer/arrow", content=sink.getvalue(), headers=stream)
+    assert missing.status_code == 422
+    assert "Sex" in missing.json()["detail"]
+    assert client.post("/infer/arrow", content=b"not arrow", headers=stream).status_code == 400
+    with patch("titanic.api.columnar.MAX_UPLOAD_BYTES", 4):
+        assert client.post("/infer/arrow", content=b"0123456789", headers=stream).status_code == 413
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    ["application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file", "application/vnd.apache.parquet"],
+)
+def test_infer_arrow_rejects_null_and_non_numeric_columns_before_streaming(client, mock_infer_model, content_type):
+    """Test qu'un Pclass nul dans un lot tardif ou un SibSp texte donne un 422, sans prédiction ni 200 tronqué."""
+    mock_infer_model.reset_mock()
+    headers = {"Authorization": "Bearer test-token", "Content-Type": content_type}
+    table = pa.table(
+        {
+            "Pclass": pa.array([1, 2, 3, 1, 2, None], type=pa.int64()),
+            "Sex": ["female", "male"] * 3,
+            "SibSp": pa.array([0] * 6, type=pa.int64()),
+            "Parch": pa.array([0] * 6, type=pa.int64()),
+        }
+    )
+    text_sibsp = table.set_column(2, "SibSp", pa.array(["0"] * 6)).set_column(0, "Pclass", pa.array([1] * 6))
+
+    for body, detail in ((table, "Pclass contains 1 null"), (text_sibsp, "SibSp has type string")):
+        sink = io.BytesIO()
+        if content_type == "application/vnd.apache.parquet":
+            pq.write_table(body, sink, row_group_size=4)
+        else:
+            new = pa.ipc.new_stream if content_type.endswith("stream") else pa.ipc.new_file
+            with new(sink, body.schema) as writer:
+                writer.write_table(body, max_chunksize=4)  # Le null est dans le second lot
+        response = client.post("/infer/arrow", content=sink.getvalue(), headers=headers)
+
+        assert response.status_code == 422
+        assert detail in response.json()["detail"]
+    mock_infer_model.predict.assert_not_called()
+
+
+def test_infer_probability_uses_one_predict_proba(client, mock_infer_model):
+    """Test que ?probability=true renvoie classe et probabilité issues d'un seul predict_proba, seul ou en batch."""
+    mock_infer_model.reset_mock()
+    mock_infer_model.classes_ = np.array([0, 1])
+    mock_infer_model.predict_proba.side_effect = lambda features: np.array([[0.2, 0.8], [0.7, 0.3]])[: len(features)]
+    passenger = {"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}
+    headers = {"Authorization": "Bearer test-token"}
+
+    single = client.post("/infer?probability=true", json=passenger, headers=headers)
+    batch = client.post("/infer/batch?probability=true", json=[passenger, passenger], headers=headers)
+
+    assert single.json() == [{"prediction": 1, "probability": 0.8}]
+    assert batch.json() == [{"prediction": 1, "probability": 0.8}, {"prediction": 0, "probability": 0.3}]
+    assert mock_infer_model.predict_proba.call_count == 2
+    mock_infer_model.predict.assert_not_called()
+
+
+def test_identical_concurrent_requests_share_one_model_call(client, mock_infer_model):
+    """Test que des requêtes /infer identiques et simultanées n'évaluent le modèle qu'une fois."""
+
+    def slow_predict(features):
+        time.sleep(0.3)
+        return np.array([1])
+
+    mock_infer_model.reset_mock()
+    mock_infer_model.predict.side_effect = slow_predict
+    before = COALESCED_REQUESTS.value(path="/infer")
+    payload = {"pclass": 3, "sex": "male", "sibSp": 1, "parch": 1}
+
+    with ThreadPoolExecutor(4) as pool:
+        responses = list(
+            pool.map(
+                lambda _: client.post("/infer", json=payload, headers={"Authorization": "Bearer test-token"}), range(4)
+            )
+        )
+
+    assert [response.json() for response in responses] == [[1]] * 4
+    calls = mock_infer_model.predict.call_count
+    assert calls < 4
+    assert COALESCED_REQUESTS.value(path="/infer") - before == 4 - calls
+
+
+def test_get_infer_is_cacheable_and_revalidated_with_etag(client, mock_infer_model):
+    """Test que GET /infer pose ETag et Cache-Control, puis répond 304 sans appeler le modèle si l'ETag correspond."""
+    mock_infer_model.reset_mock()
+    mock_infer_model.predict.return_value = np.array([1])
+    url = "/infer?pclass=1&sex=female&sibSp=0&parch=0"
+    headers = {"Authorization": "Bearer test-token"}
+
+    first = client.get(url, headers=headers)
+    etag = first.headers["etag"]
+    revalidated = client.get(url, headers={**headers, "If-None-Match": f'"other", W/{etag}'})
+    msgpack = client.get(url, headers={**headers, "Accept": "application/msgpack"})
+
+    assert first.status_code == 200 and first.json() == [1]
+    assert first.headers["cache-control"] == "private, max-age=300"  # Jamais servie par un cache partagé
+    assert first.headers["vary"] == "Accept, Authorization"
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == etag
+    assert revalidated.headers["cache-control"] == "private, max-age=300"
+    assert msgpack.headers["etag"] != etag  # Autre représentation, autre ETag
+    assert mock_infer_model.predict.call_count == 2
+    assert client.get("/infer?pclass=4&sex=female&sibSp=0&parch=0", headers=headers).status_code == 422
+
+
+def test_get_infer_etag_changes_with_model_version(mock_infer_model):
+    """Test qu'un nouveau modèle invalide les réponses en cache (ETag différent)."""
+    etags = []
+    for version in ("v1", "v2"):
+        with patch.dict(os.environ, {"MODEL_VERSION": version}), TestClient(create_app(tracing=False)) as client:
+            response = client.get("/infer?pclass=2&sex=male&sibSp=1&parch=0", headers={"Authorization": "Bearer t"})
+            etags.append(response.headers["etag"])
+
+    assert etags == ['"v1-json"', '"v2-json"']
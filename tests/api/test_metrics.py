@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+
+import pytest
+
+from titanic.api.metrics import Counter, Gauge, Histogram, Registry, _Metric
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Durée", ("path",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, path="/infer")
+
+    registry = Registry()
+    registry.register(histogram)
+    text = registry.render()
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'le="0.1"} 2' in text
+    assert 'le="1.0"} 3' in text
+    assert 'le="+Inf"} 4' in text
+    assert 'test_seconds_count{worker="' in text
+    assert histogram.count(path="/infer") == 4
+
+
+def test_counter_and_gauge_render_with_worker_label():
+    """Test du format texte : suffixe _total des compteurs et label worker ajouté à chaque série."""
+    counter = Counter("test_requests", "Requêtes", ("status",))
+    counter.inc(status="200")
+    counter.inc(2, status="200")
+    gauge = Gauge("test_model_info", "Version", ("version",))
+    gauge.set(1, version='v"1')
+
+    registry = Registry()
+    registry.register(counter)
+    registry.register(gauge)
+    text = registry.render()
+
+    assert 'test_requests_total{worker="' in text
+    assert 'status="200"} 3.0' in text
+    assert 'version="v\\"1"} 1' in text
+
+
+def test_labels_must_match_declaration():
+    counter = Counter("test_labels", "Labels", ("cache", "result"))
+    with pytest.raises(ValueError):
+        counter.inc(cache="jwks")
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("test_abstract", "Sans échantillons")
+
+
+def _serve_requests(registry, counter, n):
+    """Worker forké : compte ses requêtes puis écrit ses échantillons, comme son thread de snapshot."""
+    counter.inc(n, status="200")
+    registry.write_snapshot()
+
+
+def test_shared_directory_renders_every_worker(tmp_path):
+    """Test qu'avec un dossier partagé, /metrics rend les séries de tous les workers sous un seul HELP/TYPE."""
+    counter = Counter("test_worker_requests", "Requêtes", ("status",))
+    registry = Registry(str(tmp_path))
+    registry.register(counter)
+    counter.inc(status="200")
+
+    fork = multiprocessing.get_context("fork")
+    workers = [fork.Process(target=_serve_requests, args=(registry, counter, n)) for n in (2, 3)]
+    for worker in workers:
+        worker.start()
+        worker.join()
+    text = registry.render()
+
+    assert text.count("# TYPE test_worker_requests counter") == 1
+    assert f'test_worker_requests_total{{worker="{os.getpid()}",status="200"}} 1.0' in text
+    assert f'test_worker_requests_total{{worker="{workers[0].pid}",status="200"}} 3.0' in text  # 1 hérité + 2
+    assert f'test_worker_requests_total{{worker="{workers[1].pid}",status="200"}} 4.0' in text
+
+    registry.remove_snapshot(workers[0].pid)  # Worker arrêté, oublié par le parent
+    assert f'worker="{workers[0].pid}"' not in registry.render()
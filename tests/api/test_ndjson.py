@@ -0,0 +1,93 @@
+import json
+import os
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from titanic.api import ndjson
+from titanic.api.infer import create_app
+
+NDJSON_HEADERS = {"Content-Type": "application/x-ndjson", "Authorization": "Bearer t"}
+
+
+@pytest.fixture
+def model():
+    model = Mock()
+    model.predict.side_effect = lambda features: features["Sex_female"].to_numpy().astype(np.int64)
+    return model
+
+
+@pytest.fixture
+def client(model):
+    with (
+        patch.dict(os.environ, {"OAUTH2_DOMAIN": ""}),
+        patch("titanic.api.infer.load_model", return_value=model),
+        TestClient(create_app(tracing=False)) as client,
+    ):
+        yield client
+
+
+def _lines(passengers):
+    return "".join(json.dumps(passenger) + "\n" for passenger in passengers).encode()
+
+
+def test_stream_scores_lines_in_chunks(client, model):
+    """Test que /infer/stream renvoie une prédiction par ligne, dans l'ordre, avec un appel au modèle par tranche."""
+    passengers = [{"pclass": 1, "sex": sex, "sibSp": 0, "parch": 0} for sex in ["female", "male"] * 5]
+
+    with patch("titanic.api.ndjson.CHUNK_ROWS", 4):
+        response = client.post("/infer/stream", content=_lines(passengers), headers=NDJSON_HEADERS)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [{"prediction": 1}, {"prediction": 0}] * 5
+    assert [len(call.args[0]) for call in model.predict.call_args_list] == [4, 4, 2]
+
+
+def test_stream_reports_invalid_lines_and_continues(client):
+    """Test qu'une ligne invalide donne une ligne d'erreur à sa place sans interrompre le flux."""
+    body = b'{"pclass": 1, "sex": "female", "sibSp": 0, "parch": 0}\nnot json\n\n{"pclass": 9}\n'
+
+    response = client.post("/infer/stream", content=body, headers=NDJSON_HEADERS)
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert results[0] == {"prediction": 1}
+    assert [set(result) for result in results[1:]] == [{"error"}, {"error"}]
+
+
+def test_stream_rejects_other_content_types(client):
+    headers = {**NDJSON_HEADERS, "Content-Type": "application/json"}
+    response = client.post("/infer/stream", content=b"[]", headers=headers)
+
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_line_chunks_joins_lines_split_across_pieces():
+    """Test que les lignes coupées entre deux morceaux sont recollées, y compris la dernière sans retour à la ligne."""
+
+    async def body():
+        for piece in [b'{"a": 1}\n{"a"', b": 2}\n\n", b'{"a": 3}']:
+            yield piece
+
+    chunks = [chunk async for chunk in ndjson.line_chunks(body(), 10)]
+
+    assert chunks == [[b'{"a": 1}'], [b'{"a": 2}'], [b'{"a": 3}']]
+
+
+@pytest.mark.asyncio
+async def test_stream_predictions_stops_on_too_long_line():
+    """Test qu'une ligne sans fin au-delà de MAX_LINE_BYTES termine le flux par une ligne d'erreur."""
+
+    async def body():
+        yield b"x" * (ndjson.MAX_LINE_BYTES + 1)
+
+    async def score(lines):
+        return b"unused\n"
+
+    out = [chunk async for chunk in ndjson.stream_predictions(body(), score)]
+
+    assert len(out) == 1
+    assert "error" in json.loads(out[0])
@@ -1,23 +1,82 @@
+from pathlib import Path
 from unittest.mock import patch, Mock
 
-from titanic.ci.search_mlflow import get_last_model_uri
+import pytest
+from mlflow.store.entities.paged_list import PagedList
+
+from titanic.ci import search_mlflow
+from titanic.ci.search_mlflow import get_last_model_uri, prefetch
+
+
+def _run(*model_ids):
+    run = Mock()
+    run.outputs.model_outputs = [Mock(model_id=model_id) for model_id in model_ids]
+    return run
 
 
 def test_get_last_model_uri_returns_uri():
     with patch("titanic.ci.search_mlflow.mlflow") as mock_mlflow:
         mock_experiment = {"experiment_id": "exp-123"}
         mock_mlflow.get_experiment_by_name.return_value = mock_experiment
-
-        mock_run_info = Mock()
-        mock_run_info.info.run_id = "run-456"
-        mock_mlflow.search_runs.return_value = [mock_run_info]
-
-        mock_run = Mock()
-        mock_model_output = Mock()
-        mock_model_output.model_id = "model-789"
-        mock_run.outputs.model_outputs = [mock_model_output]
-        mock_mlflow.get_run.return_value = mock_run
+        mock_mlflow.MlflowClient.return_value.search_runs.return_value = PagedList([_run("model-789")], None)
 
         result = get_last_model_uri("test-exp")
 
         assert result == "models:/model-789"
+        mock_mlflow.get_run.assert_not_called()  # Les outputs sont déjà dans le résultat de search_runs
+
+
+def test_get_last_model_uri_skips_runs_without_model():
+    """Test du tri par métrique et du saut des runs sans modèle."""
+    with patch("titanic.ci.search_mlflow.mlflow") as mock_mlflow:
+        search_runs = mock_mlflow.MlflowClient.return_value.search_runs
+        mock_mlflow.get_experiment_by_name.return_value = {"experiment_id": "exp-123"}
+        search_runs.return_value = PagedList([_run(), _run("model-best")], None)
+
+        assert get_last_model_uri("test-exp", metric="roc_auc") == "models:/model-best"
+        assert get_last_model_uri("test-exp") == "models:/model-best"
+
+        mock_mlflow.get_experiment_by_name.assert_called_with("test-exp")
+        first_order = search_runs.call_args_list[0].kwargs["order_by"]
+        assert first_order == ["metrics.roc_auc DESC", "attributes.end_time DESC"]
+
+        search_runs.return_value = PagedList([_run()], None)
+        with pytest.raises(ValueError, match="No finished run"):
+            get_last_model_uri("test-exp")
+
+
+def test_get_last_model_uri_reads_next_pages_until_a_model():
+    """Test qu'une page entière de runs sans modèle ne masque pas le modèle de la page suivante."""
+    with patch("titanic.ci.search_mlflow.mlflow") as mock_mlflow:
+        search_runs = mock_mlflow.MlflowClient.return_value.search_runs
+        mock_mlflow.get_experiment_by_name.return_value = {"experiment_id": "exp-123"}
+        search_runs.side_effect = [
+            PagedList([_run()] * search_mlflow.SEARCH_PAGE, "page-2"),
+            PagedList([_run(), _run("model-late")], "page-3"),
+        ]
+
+        assert get_last_model_uri("test-exp", metric="roc_auc") == "models:/model-late"
+        assert [call.kwargs["page_token"] for call in search_runs.call_args_list] == [None, "page-2"]
+
+
+def test_prefetch_downloads_once_into_content_addressed_dir(tmp_path):
+    """Test que prefetch range le modèle en cache sous son sha256, une seule fois, et le copie dans output_dir."""
+
+    def download(artifact_uri, dst_path):
+        Path(dst_path, "model.pkl").write_bytes(b"model")
+        Path(dst_path, "feature_schema.json").write_text("{}")
+        return dst_path
+
+    with patch("titanic.ci.search_mlflow.mlflow") as mock_mlflow:
+        mock_mlflow.artifacts.download_artifacts.side_effect = download
+        first = prefetch(model_uri="models:/m-1", cache_dir=str(tmp_path / "cache"), output_dir=str(tmp_path / "out"))
+        second = prefetch(model_uri="models:/m-1", cache_dir=str(tmp_path / "cache"))
+        same_content = prefetch(model_uri="models:/m-2", cache_dir=str(tmp_path / "cache"))
+
+    assert first == second == same_content
+    assert Path(first).parent == tmp_path / "cache" / "objects" and len(Path(first).name) == 64
+    assert mock_mlflow.artifacts.download_artifacts.call_count == 2  # m-1 une seule fois
+    assert (tmp_path / "out" / "model.pkl").read_bytes() == b"model"
+    (tmp_path / "out" / "model.pkl").write_bytes(b"edited")  # Copie modifiable, sans effet sur le cache
+    assert Path(first, "model.pkl").read_bytes() == b"model"
+    assert list((tmp_path / "cache" / "tmp").iterdir()) == []  # Pas de dossier temporaire laissé
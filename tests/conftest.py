@@ -2,7 +2,7 @@ import os
 import tempfile
 import shutil
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch, MagicMock
 
 import pytest
 
@@ -56,37 +56,25 @@ def cleanup_mlflow_artifacts() -> None:
         mlflow_db.unlink()
 
 
+@pytest.fixture(autouse=True)
+def isolated_artifact_cache(tmp_path_factory: pytest.TempPathFactory) -> None:
+    """Cache d'artefacts propre à chaque test : les mêmes clés (run de test, chemin) reviennent d'un test à l'autre."""
+    with patch.dict(os.environ, {"ARTIFACT_CACHE_DIR": str(tmp_path_factory.mktemp("artifact-cache"))}):
+        yield
+
+
 @pytest.fixture(scope="session", autouse=True)
 def mock_opentelemetry() -> None:
-    """Mock OpenTelemetry pour éviter les connexions réseau dans les tests."""
+    """Évite les connexions réseau dans les tests.
+
+    La télémétrie est désactivée par OTEL_SDK_DISABLED : titanic.telemetry n'installe aucun provider ni
+    exporteur. Les tests qui vérifient des spans passent un InMemorySpanExporter à telemetry.configure.
+    """
     if not HAS_OPENTELEMETRY:
         yield
         return
 
-    mock_processor = MagicMock()
-    mock_processor.force_flush = Mock(return_value=True)
-    mock_processor.shutdown = Mock(return_value=True)
-
-    mock_exporter = MagicMock()
-    mock_exporter.export = Mock(return_value=MagicMock())
-    mock_exporter.shutdown = Mock(return_value=True)
-
-    mock_tracer_provider = MagicMock()
-    mock_tracer = MagicMock()
-    mock_span = MagicMock()
-
-    mock_span.__enter__ = Mock(return_value=mock_span)
-    mock_span.__exit__ = Mock(return_value=None)
-    mock_tracer.start_as_current_span = Mock(return_value=mock_span)
-    mock_tracer_provider.get_tracer = Mock(return_value=mock_tracer)
-
     with (
-        patch("opentelemetry.sdk.trace.export.BatchSpanProcessor", return_value=mock_processor),
-        patch("opentelemetry.exporter.otlp.proto.http.trace_exporter.OTLPSpanExporter", return_value=mock_exporter),
-        patch("opentelemetry.sdk.trace.TracerProvider", return_value=mock_tracer_provider),
-        patch("opentelemetry.trace.set_tracer_provider"),
-        patch("opentelemetry.trace.get_tracer_provider", return_value=mock_tracer_provider),
-        patch("opentelemetry.trace.get_tracer", return_value=mock_tracer),
         patch("requests.post", return_value=MagicMock(status_code=200)),
         patch("httpx.post", return_value=MagicMock(status_code=200)),
     ):
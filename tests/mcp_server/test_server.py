@@ -1,5 +1,5 @@
 from unittest.mock import patch, Mock, AsyncMock
-from titanic.mcp_server.server import mcp, predict_survival, health_check
+from titanic.mcp_server.server import mcp, predict_survival, health_check, profile_cpu, profile_memory
 import pytest
 from starlette.requests import Request
 
@@ -96,3 +96,21 @@ async def test_health_check_returns_healthy():
 
     assert response.status_code == 200
     assert b"healthy" in response.body
+
+
+def _admin_request(query: str, authorization: str | None) -> Request:
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "query_string": query.encode(), "headers": headers})
+
+
+@pytest.mark.asyncio
+async def test_profile_routes_require_profiling_token():
+    """Test que les profils du serveur MCP sont réservés au porteur de PROFILING_TOKEN."""
+    with patch.dict("os.environ", {"PROFILING_TOKEN": "s3cret"}):
+        assert (await profile_cpu(_admin_request("seconds=0.05", None))).status_code == 403
+        assert (await profile_cpu(_admin_request("seconds=0.05", "Bearer wrong"))).status_code == 403
+        assert (await profile_memory(_admin_request("seconds=999", "Bearer s3cret"))).status_code == 400
+
+        response = await profile_cpu(_admin_request("seconds=0.05", "Bearer s3cret"))
+    assert response.status_code == 200
+    assert b'filename="cpu-' in dict(response.raw_headers)[b"content-disposition"]
@@ -0,0 +1,125 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+from titanic import artifact_cache
+from titanic.artifact_cache import ArtifactCache
+
+
+def _download_to(content: bytes, name: str = "model.joblib"):
+    """Faux téléchargement qui écrit content et compte ses appels."""
+    calls = []
+
+    def download(dst_path):
+        calls.append(dst_path)
+        Path(dst_path, name).write_bytes(content)
+        return str(Path(dst_path, name))
+
+    return download, calls
+
+
+def test_fetch_downloads_once_and_shares_identical_content(tmp_path):
+    """Test que fetch ne télécharge qu'au premier appel et qu'un même contenu n'est stocké qu'une fois."""
+    cache = ArtifactCache(tmp_path)
+    download, calls = _download_to(b"model")
+
+    first = cache.fetch("runs:/r1/model_trained/model.joblib", download)
+    second = cache.fetch("runs:/r1/model_trained/model.joblib", download)
+    other_key = cache.fetch("runs:/r2/model_trained/model.joblib", download)
+
+    assert first == second == other_key and Path(first).read_bytes() == b"model"
+    assert len(calls) == 2
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+    assert list((tmp_path / "tmp").iterdir()) == []
+
+
+def test_put_makes_uploaded_file_readable_without_download(tmp_path):
+    """Test qu'un fichier ajouté par put est relu par fetch sans téléchargement, même après sa suppression."""
+    cache = ArtifactCache(tmp_path / "cache")
+    source = tmp_path / "xtrain.csv"
+    source.write_text("a,b\n1,2\n")
+    download, calls = _download_to(b"unused")
+
+    cache.put("runs:/r1/xtrain/xtrain.csv", str(source))
+    source.unlink()
+
+    assert Path(cache.fetch("runs:/r1/xtrain/xtrain.csv", download)).read_text() == "a,b\n1,2\n"
+    assert calls == []
+
+
+def test_put_copies_the_file_and_stores_it_read_only(tmp_path):
+    """Test que réécrire le fichier ajouté par put ne modifie pas l'objet en cache, en lecture seule."""
+    cache = ArtifactCache(tmp_path / "cache")
+    source = tmp_path / "model.joblib"
+    source.write_bytes(b"v1")
+
+    cached = Path(cache.put("runs:/r1/model_trained/model.joblib", str(source)))
+    source.write_bytes(b"v2")  # Réécriture sur place, même inode
+
+    assert cached.read_bytes() == b"v1"
+    assert not os.path.samefile(cached, source)
+    assert cached.stat().st_mode & 0o777 == 0o444
+
+
+def test_least_recently_used_objects_are_evicted(tmp_path):
+    """Test qu'au-delà de max_bytes, l'objet le moins récemment lu est supprimé et redevient un miss."""
+    cache = ArtifactCache(tmp_path, max_bytes=25)
+    old = Path(cache.fetch("runs:/r1/old", _download_to(b"o" * 10)[0])).parent
+    used = Path(cache.fetch("runs:/r1/used", _download_to(b"u" * 10)[0])).parent
+    os.utime(old, (1000, 1000))
+    os.utime(used, (1000, 1000))
+    cache.lookup("runs:/r1/used")  # Lecture : "used" devient le plus récent
+
+    with patch.object(artifact_cache, "EVICTION_GRACE_SECONDS", 0):
+        cache.fetch("runs:/r1/new", _download_to(b"n" * 10)[0])
+
+    assert cache.lookup("runs:/r1/old") is None and not old.exists()
+    assert cache.lookup("runs:/r1/used") is not None and cache.lookup("runs:/r1/new") is not None
+
+
+def test_max_bytes_zero_disables_the_cache(tmp_path):
+    cache = ArtifactCache(tmp_path / "cache", max_bytes=0)
+    download, calls = _download_to(b"model")
+
+    cache.fetch("models:/m-1", download)
+    cache.fetch("models:/m-1", download)
+
+    assert len(calls) == 2 and not (tmp_path / "cache").exists()
+    assert calls[0] == calls[1]  # Même dossier, vidé avant le second téléchargement : pas de fuite
+
+
+def test_mutable_model_uris_are_always_downloaded(tmp_path):
+    """Test qu'un alias ou latest, dont la cible change, n'est jamais servi depuis le cache."""
+    cache = ArtifactCache(tmp_path / "cache")
+    source = tmp_path / "model.joblib"
+    source.write_bytes(b"uploaded")
+    for uri in ("models:/titanic@champion", "models:/titanic/latest"):
+        cache.put(uri, str(source))
+        first = cache.fetch(uri, _download_to(b"v1")[0])
+        assert Path(first).read_bytes() == b"v1"
+        assert Path(cache.fetch(uri, _download_to(b"v2")[0])).read_bytes() == b"v2"
+        assert cache.lookup(uri) is None
+    assert not (tmp_path / "cache" / "refs").exists()
+
+
+def _slow_fetch(root: str) -> str:
+    def download(dst_path):
+        with open(Path(root, "downloads.log"), "a") as log:
+            log.write("x")
+        time.sleep(0.2)
+        Path(dst_path, "model.pkl").write_bytes(b"model")
+        return dst_path
+
+    return ArtifactCache(Path(root, "cache")).fetch("models:/m-1", download)
+
+
+def test_concurrent_processes_download_once(tmp_path):
+    """Test que des process qui demandent la même clé en même temps n'en font qu'un téléchargement."""
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("fork")) as pool:
+        paths = list(pool.map(_slow_fetch, [str(tmp_path)] * 4))
+
+    assert len(set(paths)) == 1 and Path(paths[0], "model.pkl").read_bytes() == b"model"
+    assert (tmp_path / "downloads.log").read_text() == "x"
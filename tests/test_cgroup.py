@@ -0,0 +1,25 @@
+from unittest.mock import patch
+
+from titanic import cgroup
+
+
+def test_cpu_quota_reads_cgroup_v2(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("60000 100000\n")
+    with patch.object(cgroup, "CGROUP_V2_CPU_MAX", cpu_max):
+        assert cgroup.cpu_quota() == 0.6
+
+
+def test_cpu_quota_unlimited(tmp_path):
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("max 100000\n")
+    with patch.object(cgroup, "CGROUP_V2_CPU_MAX", cpu_max):
+        assert cgroup.cpu_quota() is None
+
+
+def test_available_cpus_is_bounded_by_quota():
+    with patch.object(cgroup, "cpu_quota", return_value=1.5), patch("os.sched_getaffinity", return_value=set(range(8))):
+        assert cgroup.available_cpus() == 2
+
+    with patch.object(cgroup, "cpu_quota", return_value=0.2), patch("os.sched_getaffinity", return_value=set(range(8))):
+        assert cgroup.available_cpus() == 1
@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from titanic import profiling
+
+
+def _busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_cpu_profile_samples_other_threads():
+    """Test que le profil folded contient la pile d'un thread actif, nommé à la racine."""
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    try:
+        folded = profiling.cpu_profile(0.2, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = [line for line in folded.splitlines() if line.startswith("busy-worker;")]
+    assert busy, folded
+    stack, count = busy[0].rsplit(" ", 1)
+    assert "test_profiling._busy_loop" in stack
+    assert int(count) > 0
+
+
+def test_allocation_profile_reports_allocations_made_during_capture():
+    """Test que le rapport tracemalloc montre les allocations retenues pendant la capture."""
+    retained = []
+
+    def allocate():
+        time.sleep(0.05)
+        retained.append(bytearray(2 * 2**20))
+
+    thread = threading.Thread(target=allocate)
+    thread.start()
+    report = profiling.allocation_profile(0.3)
+    thread.join()
+
+    assert report.startswith("# 0.3s")
+    assert "test_profiling.py" in report
+    assert not profiling.tracemalloc.is_tracing(), "tracemalloc devrait être arrêté après la capture"
+
+
+def test_one_capture_at_a_time_and_bounded_duration():
+    """Test qu'une seule capture tourne à la fois et que la durée est bornée."""
+    with profiling._exclusive(), pytest.raises(profiling.ProfilingBusyError):
+        profiling.cpu_profile(0.1)
+    with pytest.raises(ValueError):
+        profiling.allocation_profile(profiling.MAX_SECONDS + 1)
+
+
+def test_authorized_requires_configured_token():
+    """Test que sans PROFILING_TOKEN l'accès est refusé, et accordé avec le bon Bearer."""
+    with patch.dict(os.environ, {"PROFILING_TOKEN": ""}):
+        assert not profiling.authorized("Bearer ")
+    with patch.dict(os.environ, {"PROFILING_TOKEN": "s3cret"}):
+        assert profiling.authorized("Bearer s3cret")
+        assert not profiling.authorized("Bearer wrong")
+        assert not profiling.authorized(None)
@@ -0,0 +1,40 @@
+import os
+from unittest.mock import patch
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+from titanic import telemetry
+
+
+def test_disabled_telemetry_installs_nothing():
+    """Test qu'avec OTEL_SDK_DISABLED=true aucun provider n'est installé et les spans sont no-op."""
+    with (
+        patch.dict(os.environ, {"OTEL_SDK_DISABLED": "true"}),
+        patch("opentelemetry.trace.set_tracer_provider") as mock_set_provider,
+    ):
+        assert telemetry.configure("titanic-test") is None
+    mock_set_provider.assert_not_called()
+    with trace.get_tracer(__name__).start_as_current_span("noop") as span:
+        assert not span.is_recording()
+
+
+def test_configure_once_and_flush_on_shutdown():
+    """Test que le provider est installé une seule fois et que shutdown exporte les spans en file."""
+    exporter = InMemorySpanExporter()
+    with (
+        patch.dict(os.environ, {"OTEL_SDK_DISABLED": "false"}),
+        patch("opentelemetry.trace.set_tracer_provider") as mock_set_provider,
+    ):
+        provider = telemetry.configure("titanic-test", exporter)
+        assert telemetry.configure("titanic-other", InMemorySpanExporter()) is provider
+        mock_set_provider.assert_called_once_with(provider)
+        assert provider.resource.attributes["service.name"] == "titanic-test"
+
+        with provider.get_tracer(__name__).start_as_current_span("model_inference"):
+            pass
+        assert exporter.get_finished_spans() == (), "Les spans devraient être exportés par lot"
+        telemetry.shutdown()
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["model_inference"]
+    telemetry.shutdown()  # Sans provider : sans effet
@@ -0,0 +1,44 @@
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from titanic.training.steps.search_hyperparameters import SEARCH_SPACE, search_hyperparameters
+
+
+def test_search_hyperparameters_returns_best_candidate(tmp_path):
+    """Test que la recherche évalue les candidats en parallèle et logge un run imbriqué par candidat."""
+    df = pd.read_csv("data/all_titanic.csv").head(200)
+    x_file = tmp_path / "x_train.csv"
+    y_file = tmp_path / "y_train.csv"
+    df[["Pclass", "Sex", "SibSp", "Parch"]].to_csv(x_file, index=False)
+    df[["Survived"]].to_csv(y_file, index=False)
+
+    logged_metrics = []
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("titanic.training.steps.search_hyperparameters.start_run") as mock_start_run,
+        patch("mlflow.log_params"),
+        patch("mlflow.log_metric", side_effect=lambda key, value, step=0: logged_metrics.append((key, value))),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.side_effect = [str(x_file), str(y_file)]
+
+        best = search_hyperparameters("xtrain/xtrain.csv", "ytrain/ytrain.csv", "random", 3, 42, n_workers=2)
+
+        assert set(best) == set(SEARCH_SPACE)
+        assert mock_start_run.call_count == 3, "Un run imbriqué par candidat"
+        assert all(call.kwargs["nested"] for call in mock_start_run.call_args_list)
+
+        candidate_scores = [value for key, value in logged_metrics if key == "cv_accuracy"]
+        best_score = dict(logged_metrics)["best_cv_accuracy"]
+        assert len(candidate_scores) == 3
+        assert best_score == max(candidate_scores)
+
+
+def test_search_hyperparameters_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        search_hyperparameters("xtrain/xtrain.csv", "ytrain/ytrain.csv", "bayesian")
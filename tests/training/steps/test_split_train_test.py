@@ -1,8 +1,17 @@
 from unittest.mock import patch
 import shutil
+import numpy as np
+import pytest
 import pandas as pd
 
-from titanic.training.steps.split_train_test import split_train_test, FEATURES, TARGET
+from titanic.training.steps.split_train_test import (
+    FEATURES,
+    HashSplitter,
+    TARGET,
+    hash_fraction,
+    split_train_test,
+    split_train_test_chunked,
+)
 
 
 def test_split_train_test_with_real_data(tmp_path):
@@ -23,8 +32,9 @@ def test_split_train_test_with_real_data(tmp_path):
     with (
         patch("mlflow.active_run") as mock_run,
         patch("mlflow.log_artifact", side_effect=mock_log_artifact_side_effect),
-        patch("titanic.training.steps.split_train_test.client") as mock_client,
+        patch("titanic.training.tracking.get_client") as mock_get_client,
     ):
+        mock_client = mock_get_client.return_value
         mock_run.return_value.info.run_id = "test-run"
 
         artifacts_dir = tmp_path / "artifacts"
@@ -63,3 +73,115 @@ def test_split_train_test_with_real_data(tmp_path):
 
         test_ratio = len(xtest) / total_split_size
         assert 0.25 < test_ratio < 0.35, f"Le ratio test ({test_ratio:.2f}) devrait être proche de 0.3"
+
+
+def _run_chunked_split(tmp_path, data_copy, chunk_size):
+    saved_files = {}
+
+    def mock_log_artifact_side_effect(path, artifact_path):
+        saved_path = tmp_path / f"saved_{chunk_size}_{artifact_path}.csv"
+        shutil.copy(path, saved_path)
+        saved_files[artifact_path] = saved_path
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact", side_effect=mock_log_artifact_side_effect),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.return_value = str(data_copy)
+
+        result = split_train_test_chunked("path_output/data.csv", chunk_size=chunk_size)
+
+    assert result == ("xtrain/xtrain.csv", "xtest/xtest.csv", "ytrain/ytrain.csv", "ytest/ytest.csv")
+    return {name: pd.read_csv(path) for name, path in saved_files.items()}
+
+
+def test_split_train_test_chunked_is_independent_of_chunk_size(tmp_path):
+    """Test que le split chunké est déterministe et ne dépend pas de la taille des chunks."""
+    data_file = "data/all_titanic.csv"
+    original_size = len(pd.read_csv(data_file))
+
+    small_chunks = _run_chunked_split(tmp_path, data_file, chunk_size=100)
+    one_chunk = _run_chunked_split(tmp_path, data_file, chunk_size=10_000)
+
+    for name in ("xtrain", "xtest", "ytrain", "ytest"):
+        pd.testing.assert_frame_equal(small_chunks[name], one_chunk[name])
+
+    assert list(small_chunks["xtrain"].columns) == FEATURES
+    assert list(small_chunks["ytest"].columns) == [TARGET]
+    assert len(small_chunks["xtrain"]) + len(small_chunks["xtest"]) == original_size
+    test_ratio = len(small_chunks["xtest"]) / original_size
+    assert 0.25 < test_ratio < 0.35, f"Le ratio test ({test_ratio:.2f}) devrait être proche de 0.3"
+
+
+def test_hash_fraction_is_row_independent():
+    """Test que la position d'un identifiant ne dépend pas des autres lignes."""
+    ids = pd.Series([1, 2, 3, 4, 5])
+    fractions = hash_fraction(ids)
+
+    assert ((fractions >= 0) & (fractions < 1)).all()
+    assert hash_fraction(ids.iloc[2:]).tolist() == fractions[2:].tolist()
+    assert hash_fraction(ids, random_state=1).tolist() != fractions.tolist()
+
+
+def test_hash_splitter_is_stable_when_rows_are_appended():
+    """Test que l'ajout de lignes en fin de fichier ne change pas les affectations existantes."""
+    df = pd.read_csv("data/all_titanic.csv")
+    head = df.head(800)
+
+    for stratify in (False, True):
+        full_mask = HashSplitter(stratify=stratify).is_test(df["PassengerId"], df["Survived"])
+        head_mask = HashSplitter(stratify=stratify).is_test(head["PassengerId"], head["Survived"])
+        assert (full_mask[:800] == head_mask).all()
+
+
+def test_hash_splitter_stratified_keeps_class_ratios():
+    """Test que le split stratifié garde la proportion de test à une ligne près dans chaque classe."""
+    df = pd.read_csv("data/all_titanic.csv")
+    splitter = HashSplitter(test_size=0.3, stratify=True)
+
+    masks = [splitter.is_test(chunk["PassengerId"], chunk["Survived"]) for chunk in np.array_split(df, 7)]
+    is_test = np.concatenate(masks)
+
+    for label in (0, 1):
+        in_class = (df["Survived"] == label).to_numpy()
+        assert abs(is_test[in_class].sum() - 0.3 * in_class.sum()) <= 1
+
+
+def test_split_train_test_hash_strategy_matches_chunked_split(tmp_path):
+    """Test que la stratégie hash sur le jeu complet donne le même split que la version chunkée."""
+    data_file = "data/all_titanic.csv"
+    saved_files = {}
+
+    def mock_log_artifact_side_effect(path, artifact_path):
+        saved_path = tmp_path / f"saved_full_{artifact_path}.csv"
+        shutil.copy(path, saved_path)
+        saved_files[artifact_path] = saved_path
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact", side_effect=mock_log_artifact_side_effect),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.return_value = data_file
+
+        split_train_test("path_output/data.csv", strategy="hash")
+
+    chunked = _run_chunked_split(tmp_path, data_file, chunk_size=200)
+    for name in ("xtrain", "xtest", "ytrain", "ytest"):
+        pd.testing.assert_frame_equal(pd.read_csv(saved_files[name]), chunked[name])
+
+
+def test_split_train_test_rejects_unknown_strategy():
+    with (
+        patch("mlflow.active_run"),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+        pytest.raises(ValueError),
+    ):
+        mock_client = mock_get_client.return_value
+        mock_client.download_artifacts.return_value = "data/all_titanic.csv"
+        split_train_test("path_output/data.csv", strategy="kfold")
@@ -3,6 +3,7 @@ import pandas as pd
 import joblib
 import shutil
 import numpy as np
+from sklearn.ensemble import RandomForestClassifier
 
 from titanic.training.steps.train import train
 
@@ -22,8 +23,12 @@ def test_train_with_real_data(tmp_path):
     with (
         patch("mlflow.active_run") as mock_run,
         patch("mlflow.log_artifact", side_effect=mock_log_artifact_side_effect),
-        patch("titanic.training.steps.train.client") as mock_client,
+        patch("mlflow.log_dict") as mock_log_dict,
+        patch("mlflow.log_param"),
+        patch("mlflow.log_metric"),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
     ):
+        mock_client = mock_get_client.return_value
         mock_run.return_value.info.run_id = "test-run"
 
         x_train = df[["Pclass", "Sex", "SibSp", "Parch"]].head(100)
@@ -41,6 +46,10 @@ def test_train_with_real_data(tmp_path):
         assert "model_trained" in result
         assert ".joblib" in result
 
+        schema, schema_path = mock_log_dict.call_args.args
+        assert schema_path == "model_trained/feature_schema.json", "Le schéma devrait être loggé à côté du modèle"
+        assert schema["columns"] == ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"]
+
         assert saved_model_path is not None, "Le modèle devrait avoir été sauvegardé"
         assert saved_model_path.exists(), "Le fichier modèle devrait exister"
 
@@ -57,3 +66,81 @@ def test_train_with_real_data(tmp_path):
         probas = model.predict_proba(x_test)
         assert probas.shape == (5, 2), "Les probabilités devraient être de shape (5, 2)"
         assert np.allclose(probas.sum(axis=1), 1.0), "Les probabilités devraient sommer à 1"
+
+
+def _write_train_split(tmp_path, rows=100):
+    df = pd.read_csv("data/all_titanic.csv").head(rows)
+    x_file = tmp_path / "x_train.csv"
+    y_file = tmp_path / "y_train.csv"
+    df[["Pclass", "Sex", "SibSp", "Parch"]].to_csv(x_file, index=False)
+    df[["Survived"]].to_csv(y_file, index=False)
+    return x_file, y_file
+
+
+def test_train_logs_scaling_metrics(tmp_path):
+    """Test que train logge le temps de fit, la mémoire pic et le nombre de jobs."""
+    x_file, y_file = _write_train_split(tmp_path)
+    logged_metrics = {}
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact"),
+        patch("mlflow.log_dict"),
+        patch("mlflow.log_param") as mock_log_param,
+        patch("mlflow.log_metric", side_effect=lambda key, value, step=0: logged_metrics.update({key: value})),
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.side_effect = [str(x_file), str(y_file)]
+
+        train("xtrain/xtrain.csv", "ytrain/ytrain.csv", n_estimators=10, max_depth=3, random_state=42, n_jobs=2)
+
+        mock_log_param.assert_called_once_with("n_jobs", 2)
+        assert logged_metrics["fit_time_seconds"] > 0
+        assert logged_metrics["process_peak_rss_mb"] > 0
+        assert 0 <= logged_metrics["fit_peak_rss_increase_mb"] <= logged_metrics["process_peak_rss_mb"]
+        assert logged_metrics["n_trees"] == 10
+
+
+def test_train_warm_start_grows_existing_forest(tmp_path):
+    """Test que le mode warm start ajoute des arbres à une forêt existante, avec sa max_depth."""
+    x_file, y_file = _write_train_split(tmp_path)
+    x_train = pd.get_dummies(pd.read_csv(x_file))
+    existing = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=42)
+    existing.fit(x_train, pd.read_csv(y_file).iloc[:, 0])
+    existing_file = tmp_path / "existing.joblib"
+    joblib.dump(existing, existing_file)
+    saved_model_path = tmp_path / "saved_model.joblib"
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact", side_effect=lambda path, artifact_path: shutil.copy(path, saved_model_path)),
+        patch("mlflow.log_dict"),
+        patch("mlflow.log_param"),
+        patch("mlflow.log_metric"),
+        patch("mlflow.artifacts.download_artifacts", return_value=str(existing_file)) as mock_download,
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+        patch("titanic.training.steps.train.logging") as mock_logging,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.side_effect = [str(x_file), str(y_file)]
+
+        train(
+            "xtrain/xtrain.csv",
+            "ytrain/ytrain.csv",
+            n_estimators=3,
+            max_depth=5,
+            random_state=42,
+            warm_start_model_uri="runs:/previous/model_trained/model.joblib",
+        )
+
+        mock_download.assert_called_once()
+        assert mock_download.call_args.kwargs["artifact_uri"] == "runs:/previous/model_trained/model.joblib"
+        model = joblib.load(saved_model_path)
+        assert len(model.estimators_) == 8, "La forêt devrait avoir grandi de 3 arbres"
+        assert model.estimators_[:5][0].tree_.node_count == existing.estimators_[0].tree_.node_count
+        assert all(tree.get_depth() <= 3 for tree in model.estimators_), "Les nouveaux arbres gardent max_depth=3"
+        warnings = [call.args[0] for call in mock_logging.warning.call_args_list]
+        assert any("max_depth=5 ignored" in message for message in warnings)
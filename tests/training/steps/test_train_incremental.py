@@ -0,0 +1,68 @@
+from unittest.mock import patch
+import shutil
+
+import joblib
+import pandas as pd
+import pytest
+
+from titanic.training.feature_schema import encode_features
+from titanic.training.steps.train_incremental import train_incremental
+
+
+def test_train_incremental_fits_chunk_by_chunk(tmp_path):
+    """Test que train_incremental entraîne un modèle partial_fit sur des chunks."""
+    df = pd.read_csv("data/all_titanic.csv").head(300)
+    df.loc[:63, "Sex"] = "male"  # Le premier chunk ne contient qu'une modalité
+    x_file = tmp_path / "x_train.csv"
+    y_file = tmp_path / "y_train.csv"
+    df[["Pclass", "Sex", "SibSp", "Parch"]].to_csv(x_file, index=False)
+    df[["Survived"]].to_csv(y_file, index=False)
+    saved_model_path = tmp_path / "saved_model.joblib"
+    logged_metrics = {}
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact", side_effect=lambda path, artifact_path: shutil.copy(path, saved_model_path)),
+        patch("mlflow.log_metric", side_effect=lambda key, value, step=0: logged_metrics.update({key: value})),
+        patch("mlflow.log_dict") as mock_log_dict,
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_client = mock_get_client.return_value
+        mock_run.return_value.info.run_id = "test-run"
+        mock_client.download_artifacts.side_effect = [str(x_file), str(y_file)]
+
+        result = train_incremental("xtrain/xtrain.csv", "ytrain/ytrain.csv", chunk_size=64, random_state=42)
+
+    assert result == "model_trained/model.joblib"
+    assert logged_metrics["train_rows"] == 300
+
+    schema, schema_path = mock_log_dict.call_args.args
+    assert schema_path == "model_trained/feature_schema.json"
+    assert schema["columns"] == ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"]
+
+    model = joblib.load(saved_model_path)
+    probas = model.predict_proba(encode_features(df[["Pclass", "Sex", "SibSp", "Parch"]].head(5), schema))
+    assert probas.shape == (5, 2)
+
+
+def test_train_incremental_rejects_empty_input(tmp_path):
+    """Test que train_incremental refuse un split vide au lieu de logger un modèle non entraîné."""
+    x_file = tmp_path / "x_train.csv"
+    y_file = tmp_path / "y_train.csv"
+    x_file.write_text("Pclass,Sex,SibSp,Parch\n")
+    y_file.write_text("Survived\n")
+
+    with (
+        patch("mlflow.active_run") as mock_run,
+        patch("mlflow.log_artifact") as mock_log_artifact,
+        patch("mlflow.log_dict") as mock_log_dict,
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+    ):
+        mock_run.return_value.info.run_id = "test-run"
+        mock_get_client.return_value.download_artifacts.side_effect = [str(x_file), str(y_file)]
+
+        with pytest.raises(ValueError, match="empty training input"):
+            train_incremental("xtrain/xtrain.csv", "ytrain/ytrain.csv", chunk_size=64, random_state=42)
+
+    mock_log_artifact.assert_not_called()
+    mock_log_dict.assert_not_called()
@@ -1,8 +1,12 @@
+import json
+from pathlib import Path
 from unittest.mock import patch, Mock
 import pandas as pd
+import pytest
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 
+from titanic.training.feature_schema import build_feature_schema
 from titanic.training.steps.validate import validate
 
 
@@ -12,7 +16,7 @@ def test_validate_with_real_model_and_data(tmp_path):
     logged_metrics = {}
     logged_dicts = {}
 
-    def capture_metric(key, value):
+    def capture_metric(key, value, step=0):
         """Capture les métriques loggées pour vérification."""
         logged_metrics[key] = value
 
@@ -26,8 +30,10 @@ def test_validate_with_real_model_and_data(tmp_path):
         patch("mlflow.log_dict", side_effect=capture_dict),
         patch("mlflow.sklearn.log_model") as mock_log_model,
         patch("mlflow.register_model"),
-        patch("titanic.training.steps.validate.client") as mock_client,
+        patch("titanic.training.tracking.get_client") as mock_get_client,
+        patch("titanic.training.steps.validate.get_client", mock_get_client),
     ):
+        mock_client = mock_get_client.return_value
         mock_run.return_value.info.run_id = "test-run"
         mock_model_info = Mock()
         mock_model_info.model_uri = "runs:/test/model"
@@ -44,34 +50,79 @@ def test_validate_with_real_model_and_data(tmp_path):
         x_file = tmp_path / "x_test.csv"
         y_file = tmp_path / "y_test.csv"
 
+        schema_file = tmp_path / "feature_schema.json"
+
         joblib.dump(model, model_file)
+        schema_file.write_text(json.dumps(build_feature_schema(x_test)))
         x_test.to_csv(x_file, index=False)
         y_test.to_csv(y_file, index=False)
 
-        mock_client.download_artifacts.side_effect = [str(model_file), str(x_file), str(y_file)]
+        mock_client.download_artifacts.side_effect = [str(model_file), str(schema_file), str(x_file), str(y_file)]
 
-        validate("model_trained/model.joblib", "xtest/xtest.csv", "ytest/ytest.csv")
+        validate("model_trained/model.joblib", "xtest/xtest.csv", "ytest/ytest.csv", n_workers=2)
 
-        assert "mse" in logged_metrics, "MSE devrait être loggé"
-        assert "mae" in logged_metrics, "MAE devrait être loggé"
-        assert "r2" in logged_metrics, "R2 devrait être loggé"
-        assert "medae" in logged_metrics, "MedAE devrait être loggé"
+        for name in ("accuracy", "roc_auc", "log_loss", "brier", "tn", "fp", "fn", "tp"):
+            assert name in logged_metrics, f"{name} devrait être loggé"
 
-        assert logged_metrics["mse"] >= 0, "MSE devrait être positif"
-        assert logged_metrics["mae"] >= 0, "MAE devrait être positif"
-        assert -1 <= logged_metrics["r2"] <= 1, "R2 devrait être entre -1 et 1"
-        assert logged_metrics["medae"] >= 0, "MedAE devrait être positif"
+        assert 0 <= logged_metrics["accuracy"] <= 1, "L'accuracy devrait être entre 0 et 1"
+        assert 0 <= logged_metrics["roc_auc"] <= 1, "La ROC-AUC devrait être entre 0 et 1"
+        assert logged_metrics["log_loss"] >= 0, "La log-loss devrait être positive"
+        assert sum(logged_metrics[k] for k in ("tn", "fp", "fn", "tp")) == 50, "La matrice de confusion couvre le test"
+        assert logged_metrics["accuracy_ci_lower"] <= logged_metrics["accuracy"] <= logged_metrics["accuracy_ci_upper"]
 
-        assert logged_metrics["mae"] <= logged_metrics["mse"], "MAE devrait être <= MSE (en général)"
+        assert "calibration.json" in logged_dicts, "La calibration devrait être loggée"
+        assert sum(logged_dicts["calibration.json"]["count"]) == 50
 
         assert "feature_importance.json" in logged_dicts, "Feature importance devrait être loggé"
         feature_importance = logged_dicts["feature_importance.json"]
-        assert len(feature_importance) > 0, "Feature importance ne devrait pas être vide"
+        assert list(feature_importance) == list(x_dummies.columns), "Importances alignées sur les colonnes du fit"
         assert all(isinstance(v, (int, float)) for v in feature_importance.values()), (
             "Les importances devraient être numériques"
         )
 
         mock_log_model.assert_called_once()
+        model_id, logged_schema = mock_client.log_model_artifact.call_args.args
+        assert model_id == mock_model_info.model_id
+        assert Path(logged_schema).read_text() == schema_file.read_text()  # Copie en cache du schéma téléchargé
         call_kwargs = mock_log_model.call_args.kwargs
         assert "signature" in call_kwargs, "Le modèle devrait être loggé avec une signature"
         assert "input_example" in call_kwargs, "Le modèle devrait être loggé avec un input_example"
+
+
+def test_validate_chunked_matches_full_read(tmp_path):
+    """Test que la validation chunk par chunk donne les mêmes métriques que la lecture complète."""
+    df = pd.read_csv("data/all_titanic.csv").head(120)
+    x_test = df[["Pclass", "Sex", "SibSp", "Parch"]]
+    y_test = df[["Survived"]]
+    model = RandomForestClassifier(n_estimators=10, max_depth=3, random_state=42)
+    model.fit(pd.get_dummies(x_test), y_test.iloc[:, 0])
+
+    model_file = tmp_path / "model.joblib"
+    x_file = tmp_path / "x_test.csv"
+    y_file = tmp_path / "y_test.csv"
+    schema_file = tmp_path / "feature_schema.json"
+    joblib.dump(model, model_file)
+    schema_file.write_text(json.dumps(build_feature_schema(x_test)))
+    x_test.to_csv(x_file, index=False)
+    y_test.to_csv(y_file, index=False)
+
+    runs = []
+    for chunk_size in (None, 7):
+        logged_metrics = {}
+        with (
+            patch("mlflow.active_run") as mock_run,
+            patch("mlflow.log_metric", side_effect=lambda key, value, step=0, m=logged_metrics: m.update({key: value})),
+            patch("mlflow.log_dict"),
+            patch("mlflow.sklearn.log_model"),
+            patch("mlflow.register_model"),
+            patch("titanic.training.tracking.get_client") as mock_get_client,
+            patch("titanic.training.steps.validate.get_client", mock_get_client),
+        ):
+            mock_client = mock_get_client.return_value
+            mock_run.return_value.info.run_id = "test-run"
+            mock_client.download_artifacts.side_effect = [str(model_file), str(schema_file), str(x_file), str(y_file)]
+
+            validate("model_trained/model.joblib", "xtest/xtest.csv", "ytest/ytest.csv", chunk_size)
+        runs.append(logged_metrics)
+
+    assert runs[1] == pytest.approx(runs[0])  # Sommes par chunk : égales à l'arrondi près
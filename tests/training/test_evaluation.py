@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, brier_score_loss, confusion_matrix, log_loss, roc_auc_score
+
+from titanic.training.evaluation import StreamingEvaluation, bootstrap_ci, calibration_bins, evaluate
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 500)
+    proba = np.clip(0.35 * y_true + rng.random(500) * 0.65, 0, 1).round(2)  # Avec des égalités
+    return y_true, proba
+
+
+def test_evaluate_matches_sklearn(predictions):
+    """Test que les métriques vectorisées correspondent à sklearn."""
+    y_true, proba = predictions
+    y_pred = (proba >= 0.5).astype(int)
+
+    metrics = evaluate(y_true, proba)
+
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred).ravel()
+    assert (metrics["tn"], metrics["fp"], metrics["fn"], metrics["tp"]) == (tn, fp, fn, tp)
+    assert metrics["accuracy"] == pytest.approx(accuracy_score(y_true, y_pred))
+    assert metrics["roc_auc"] == pytest.approx(roc_auc_score(y_true, proba))
+    assert metrics["log_loss"] == pytest.approx(log_loss(y_true, proba))
+    assert metrics["brier"] == pytest.approx(brier_score_loss(y_true, proba))
+
+
+def test_calibration_bins_cover_all_rows(predictions):
+    y_true, proba = predictions
+
+    bins = calibration_bins(y_true, proba, n_bins=5)
+
+    assert sum(bins["count"]) == len(y_true)
+    assert len(bins["bin_edges"]) == 6
+    assert all(rate is None or 0 <= rate <= 1 for rate in bins["observed_rate"])
+
+
+def test_bootstrap_ci_is_reproducible_and_brackets_estimate(predictions):
+    """Test que les intervalles bootstrap sont reproductibles et encadrent l'estimation."""
+    y_true, proba = predictions
+
+    parallel = bootstrap_ci(y_true, proba, n_resamples=60, n_workers=3)
+    again = bootstrap_ci(y_true, proba, n_resamples=60, n_workers=3)
+
+    assert parallel == again
+    accuracy = evaluate(y_true, proba)["accuracy"]
+    lower, upper = parallel["accuracy"]
+    assert lower <= accuracy <= upper
+
+
+def test_streaming_evaluation_matches_evaluate(predictions):
+    """Test que les métriques accumulées chunk par chunk correspondent à evaluate sur tout le tableau."""
+    y_true, proba = predictions
+    evaluation = StreamingEvaluation(n_bins=5)
+
+    for start in range(0, len(y_true), 64):
+        evaluation.update(y_true[start : start + 64], proba[start : start + 64])
+
+    assert evaluation.metrics() == pytest.approx(evaluate(y_true, proba))
+    calibration = calibration_bins(y_true, proba, n_bins=5)
+    assert evaluation.calibration()["count"] == calibration["count"]
+    assert evaluation.calibration()["mean_predicted"] == pytest.approx(calibration["mean_predicted"])
+    y_sample, proba_sample = evaluation.sample
+    assert np.array_equal(y_sample, y_true) and np.array_equal(proba_sample, proba), "Le test tient dans l'échantillon"
+
+
+def test_streaming_evaluation_sample_is_bounded(predictions):
+    """Test que l'échantillon de bootstrap ne dépasse pas sample_size lignes, prises dans le test."""
+    y_true, proba = predictions
+    evaluation = StreamingEvaluation(sample_size=100)
+
+    for start in range(0, len(y_true), 64):
+        evaluation.update(y_true[start : start + 64], proba[start : start + 64])
+
+    y_sample, proba_sample = evaluation.sample
+    assert len(y_sample) == len(proba_sample) == 100
+    assert set(proba_sample) <= set(proba)
+    assert evaluation.metrics()["tp"] + evaluation.metrics()["fn"] == y_true.sum(), (
+        "Les métriques couvrent tout le test"
+    )
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from titanic.training.feature_schema import build_feature_schema, encode_features, schema_path_for
+
+
+def test_build_feature_schema_records_types_and_levels():
+    x = pd.DataFrame({"Pclass": [1, 3], "Sex": ["male", "female"], "SibSp": [0, 1], "Parch": [0, 2]})
+
+    schema = build_feature_schema(x)
+
+    assert schema["columns"] == ["Pclass", "SibSp", "Parch", "Sex_female", "Sex_male"]
+    assert schema["features"][0] == {"name": "Pclass", "dtype": "int64"}
+    assert schema["features"][1] == {"name": "Sex", "dtype": "category", "categories": ["female", "male"]}
+
+
+def test_encode_features_keeps_layout_when_levels_are_missing():
+    """Test qu'un échantillon sans toutes les modalités garde la disposition du fit."""
+    schema = build_feature_schema(
+        pd.DataFrame({"Pclass": [1, 3], "Sex": ["male", "female"], "SibSp": [0, 1], "Parch": [0, 2]})
+    )
+    x = pd.DataFrame({"Parch": [0], "Sex": ["male"], "SibSp": [0], "Pclass": [3]})  # Colonnes dans le désordre
+
+    encoded = encode_features(x, schema)
+
+    assert list(encoded.columns) == schema["columns"]
+    assert encoded.iloc[0].tolist() == [3, 0, 0, False, True]
+
+
+def test_build_feature_schema_with_forced_categories():
+    x = pd.DataFrame({"Sex": ["male"]})
+
+    schema = build_feature_schema(x, {"Sex": ["female", "male"]})
+
+    assert schema["columns"] == ["Sex_female", "Sex_male"]
+
+
+def test_schema_path_for_model():
+    assert schema_path_for("model_trained/model.joblib") == "model_trained/feature_schema.json"
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+# Modules lourds qui ne doivent être importés qu'à l'exécution d'une étape
+HEAVY_MODULES = ("mlflow", "pandas", "sklearn", "scipy", "ydata_profiling", "boto3", "joblib")
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Temps d'import cumulé (µs) de chaque module chargé, mesuré avec python -X importtime."""
+    command = [sys.executable, "-X", "importtime", "-c", f"import {module}"]
+    result = subprocess.run(command, capture_output=True, text=True, check=True)  # noqa: S603
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        times[name] = int(cumulative)
+    return times
+
+
+def test_training_main_import_is_light():
+    """Test qu'importer le workflow (--help, tests) ne charge ni mlflow ni la pile de calcul."""
+    times = _import_times("titanic.training.main")
+
+    loaded = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+    assert loaded == [], f"Modules lourds importés au chargement : {loaded}"
+
+
+def test_score_cli_import_is_light():
+    """Test qu'importer la CLI de scoring (--help) ne charge ni mlflow ni la pile de calcul."""
+    times = _import_times("titanic.training.score")
+
+    loaded = sorted({name.split(".")[0] for name in times} & set(HEAVY_MODULES))
+    assert loaded == [], f"Modules lourds importés au chargement : {loaded}"
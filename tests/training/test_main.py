@@ -3,20 +3,67 @@ from titanic.training.main import workflow
 
 
 def test_workflow_runs_all_steps():
-    #Implémenter le test unitaire
-        with (
+    # Implémenter le test unitaire
+    with (
         patch("titanic.training.main.load_data") as mock_load,
         patch("titanic.training.main.split_train_test") as mock_split,
         patch("titanic.training.main.train") as mock_train,
         patch("titanic.training.main.validate"),
     ):
+        mock_load.return_value = "data.csv"
+        mock_split.return_value = ("x_train.csv", "x_test.csv", "y_train.csv", "y_test.csv")
+        mock_train.return_value = "model.joblib"
 
-            mock_load.return_value = "data.csv"
-            mock_split.return_value = ("x_train.csv", "x_test.csv", "y_train.csv", "y_test.csv")
-            mock_train.return_value = "model.joblib"
+        workflow("input.csv", n_estimators=10, max_depth=5, random_state=42)
 
-            workflow("input.csv", n_estimators=10, max_depth=5, random_state=42)
+        mock_load.assert_called_once()
+        mock_split.assert_called_once()
+        mock_train.assert_called_once()
 
-            mock_load.assert_called_once()
-            mock_split.assert_called_once()
-            mock_train.assert_called_once()
\ No newline at end of file
+
+def test_workflow_passes_hyperparameters_to_train():
+    with (
+        patch("titanic.training.main.load_data", return_value="data.csv"),
+        patch("titanic.training.main.split_train_test", return_value=("xtr", "xte", "ytr", "yte")),
+        patch("titanic.training.main.search_hyperparameters") as mock_search,
+        patch("titanic.training.main.train", return_value="model.joblib") as mock_train,
+        patch("titanic.training.main.validate"),
+    ):
+        workflow("input.csv", n_estimators=10, max_depth=5, random_state=7)
+
+        mock_search.assert_not_called()
+        mock_train.assert_called_once_with("xtr", "ytr", 10, 5, 7, None, None)
+
+
+def test_workflow_trains_best_candidate_when_searching():
+    with (
+        patch("titanic.training.main.load_data", return_value="data.csv"),
+        patch("titanic.training.main.split_train_test", return_value=("xtr", "xte", "ytr", "yte")),
+        patch("titanic.training.main.search_hyperparameters") as mock_search,
+        patch("titanic.training.main.train", return_value="model.joblib") as mock_train,
+        patch("titanic.training.main.validate"),
+    ):
+        mock_search.return_value = {"n_estimators": 200, "max_depth": 8}
+
+        workflow("input.csv", n_estimators=10, max_depth=5, random_state=7, search="random", n_candidates=4)
+
+        mock_search.assert_called_once_with("xtr", "ytr", "random", 4, 7, None)
+        mock_train.assert_called_once_with("xtr", "ytr", 200, 8, 7, None, None)
+
+
+def test_workflow_chunked_mode_uses_streaming_steps():
+    with (
+        patch("titanic.training.main.load_data", return_value="data.csv") as mock_load,
+        patch("titanic.training.main.split_train_test") as mock_split,
+        patch("titanic.training.main.split_train_test_chunked", return_value=("xtr", "xte", "ytr", "yte")),
+        patch("titanic.training.main.train") as mock_train,
+        patch("titanic.training.main.train_incremental", return_value="model.joblib") as mock_train_incremental,
+        patch("titanic.training.main.validate") as mock_validate,
+    ):
+        workflow("input.csv", n_estimators=10, max_depth=5, random_state=7, chunk_size=500)
+
+        mock_load.assert_called_once_with("input.csv", 500)
+        mock_split.assert_not_called()
+        mock_train.assert_not_called()
+        mock_train_incremental.assert_called_once_with("xtr", "ytr", 500, 7)
+        mock_validate.assert_called_once_with("model.joblib", "xte", "yte", 500, bootstrap_sample_size=100_000)
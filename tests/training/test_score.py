@@ -0,0 +1,48 @@
+import json
+from unittest.mock import patch
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from titanic.training.feature_schema import build_feature_schema, encode_features
+from titanic.training.score import score
+
+FEATURES = ["Pclass", "Sex", "SibSp", "Parch"]
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    """Forêt entraînée sur le jeu complet, et son schéma, tels que loggés par l'entraînement."""
+    df = pd.read_csv("data/all_titanic.csv")
+    schema = build_feature_schema(df[FEATURES])
+    model = RandomForestClassifier(n_estimators=10, max_depth=4, random_state=42)
+    model.fit(encode_features(df[FEATURES], schema), df["Survived"])
+
+    model_file = tmp_path / "model.joblib"
+    schema_file = tmp_path / "feature_schema.json"
+    joblib.dump(model, model_file)
+    schema_file.write_text(json.dumps(schema))
+    return model, schema, [str(model_file), str(schema_file)]
+
+
+@pytest.mark.parametrize(("input_format", "n_workers"), [("csv", 2), ("parquet", 1)])
+def test_score_writes_predictions_in_file_order(tmp_path, model_files, input_format, n_workers):
+    """Test que le scoring par tranches, en pool ou non, donne les prédictions du modèle dans l'ordre du fichier."""
+    model, schema, downloads = model_files
+    df = pd.read_csv("data/all_titanic.csv")
+    input_path = "data/all_titanic.csv"
+    if input_format == "parquet":
+        input_path = str(tmp_path / "all_titanic.parquet")
+        df.to_parquet(input_path)
+    output_path = tmp_path / "predictions.parquet"
+
+    with patch("mlflow.artifacts.download_artifacts", side_effect=downloads) as download:
+        report = score("runs:/abc/model_trained/model.joblib", input_path, str(output_path), 300, n_workers)
+
+    assert download.call_args_list[1].kwargs["artifact_uri"] == "runs:/abc/model_trained/feature_schema.json"
+    predictions = pd.read_parquet(output_path)
+    assert report["rows"] == len(df) and report["rows_per_second"] > 0
+    assert predictions["PassengerId"].tolist() == df["PassengerId"].tolist()
+    assert predictions["prediction"].tolist() == model.predict(encode_features(df[FEATURES], schema)).tolist()
@@ -0,0 +1,191 @@
+import threading
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from titanic.artifact_cache import get_cache
+from titanic.training.tracking import (
+    AsyncRunLogger,
+    RunLogger,
+    download_artifact,
+    get_client,
+    get_run_logger,
+    start_run,
+)
+
+
+def test_metrics_and_params_are_sent_in_one_batch():
+    client = Mock()
+    run_logger = AsyncRunLogger("run-1", client=client)
+
+    run_logger.log_metric("accuracy", 0.8)
+    run_logger.log_metric("roc_auc", 0.9)
+    run_logger.log_params({"n_jobs": 2})
+    client.log_batch.assert_not_called()
+
+    run_logger.close()
+
+    client.log_batch.assert_called_once()
+    kwargs = client.log_batch.call_args.kwargs
+    assert [metric.key for metric in kwargs["metrics"]] == ["accuracy", "roc_auc"]
+    assert [(param.key, param.value) for param in kwargs["params"]] == [("n_jobs", "2")]
+
+
+def test_artifact_is_staged_before_the_caller_deletes_it(tmp_path):
+    """Test que l'upload asynchrone survit à la suppression du fichier de l'appelant."""
+    uploaded = {}
+    release = threading.Event()
+
+    def slow_upload(run_id, local_path, artifact_path):
+        release.wait(5)
+        with open(local_path) as f:
+            uploaded[artifact_path] = f.read()
+
+    client = Mock()
+    client.log_artifact.side_effect = slow_upload
+    run_logger = AsyncRunLogger("run-1", client=client)
+
+    source = tmp_path / "xtrain.csv"
+    source.write_text("a,b\n1,2\n")
+    run_logger.log_artifact(str(source), "xtrain")
+    source.unlink()
+    release.set()
+
+    run_logger.wait_for("xtrain/xtrain.csv")
+    assert uploaded == {"xtrain": "a,b\n1,2\n"}
+    run_logger.close()
+
+
+def test_artifact_is_copied_before_the_caller_rewrites_it(tmp_path):
+    """Test qu'une réécriture sur place du fichier de l'appelant ne change ni l'upload ni le cache."""
+    uploaded = {}
+    release = threading.Event()
+
+    def slow_upload(run_id, local_path, artifact_path):
+        release.wait(5)
+        with open(local_path) as f:
+            uploaded[artifact_path] = f.read()
+
+    client = Mock()
+    client.log_artifact.side_effect = slow_upload
+    run_logger = AsyncRunLogger("run-1", client=client)
+
+    source = tmp_path / "xtrain.csv"
+    source.write_text("a,b\n1,2\n")
+    run_logger.log_artifact(str(source), "xtrain")
+    source.write_text("a,b\n3,4\n")  # Même inode
+    release.set()
+    run_logger.wait_for("xtrain/xtrain.csv")
+
+    assert uploaded == {"xtrain": "a,b\n1,2\n"}
+    assert Path(get_cache().lookup("runs:/run-1/xtrain/xtrain.csv")).read_text() == "a,b\n1,2\n"
+    run_logger.close()
+
+
+def test_log_dict_uploads_json_in_subdirectory():
+    client = Mock()
+    run_logger = AsyncRunLogger("run-1", client=client)
+
+    run_logger.log_dict({"k": "v"}, "model_trained/feature_schema.json")
+    run_logger.wait_for("model_trained/feature_schema.json")
+
+    run_id, local_path, artifact_path = client.log_artifact.call_args.args
+    assert (run_id, artifact_path) == ("run-1", "model_trained")
+    assert local_path.endswith("feature_schema.json")
+    run_logger.close()
+
+
+def test_close_raises_upload_errors():
+    client = Mock()
+    client.log_batch.side_effect = RuntimeError("tracking server down")
+    run_logger = AsyncRunLogger("run-1", client=client)
+    run_logger.log_metric("accuracy", 0.8)
+
+    with pytest.raises(RuntimeError):
+        run_logger.close()
+
+
+def test_start_run_installs_and_removes_async_logger():
+    assert type(get_run_logger()) is RunLogger
+
+    with patch("titanic.training.tracking.AsyncRunLogger") as mock_logger_class, start_run():
+        assert get_run_logger() is mock_logger_class.return_value
+
+    mock_logger_class.return_value.close.assert_called_once()
+    assert type(get_run_logger()) is RunLogger
+
+
+def test_client_is_created_once_on_first_use():
+    """Test que le client mlflow est partagé et créé au premier appel seulement."""
+    get_client.cache_clear()
+    with patch("mlflow.MlflowClient") as mock_client_class:
+        assert get_client() is get_client()
+    mock_client_class.assert_called_once_with()
+    get_client.cache_clear()
+
+
+def test_download_artifact_reads_uploaded_artifact_from_cache(tmp_path):
+    """Test qu'un artefact uploadé par le run est relu depuis le cache local, sans téléchargement."""
+    client = Mock()
+    source = tmp_path / "xtrain.csv"
+    source.write_text("a,b\n1,2\n")
+
+    run_logger = AsyncRunLogger("run-1", client=client)
+    run_logger.log_artifact(str(source), "xtrain")
+    source.unlink()
+    with (
+        patch("mlflow.active_run") as mock_active_run,
+        patch("titanic.training.tracking.get_run_logger", return_value=run_logger),
+        patch("titanic.training.tracking.get_client") as mock_client,
+    ):
+        mock_active_run.return_value.info.run_id = "run-1"
+        local_path = download_artifact("xtrain/xtrain.csv")
+    run_logger.close()
+
+    assert Path(local_path).read_text() == "a,b\n1,2\n"
+    mock_client.return_value.download_artifacts.assert_not_called()
+
+
+def test_failed_upload_is_not_served_from_cache(tmp_path):
+    """Test qu'un artefact dont l'upload a échoué n'est pas mis en cache et que download_artifact remonte l'erreur."""
+    client = Mock()
+    client.log_artifact.side_effect = RuntimeError("upload failed")
+    source = tmp_path / "xtrain.csv"
+    source.write_text("a,b\n1,2\n")
+
+    run_logger = AsyncRunLogger("run-1", client=client)
+    run_logger.log_artifact(str(source), "xtrain")
+    with (
+        patch("mlflow.active_run") as mock_active_run,
+        patch("titanic.training.tracking.get_run_logger", return_value=run_logger),
+        pytest.raises(RuntimeError, match="upload failed"),
+    ):
+        mock_active_run.return_value.info.run_id = "run-1"
+        download_artifact("xtrain/xtrain.csv")
+    with pytest.raises(RuntimeError):
+        run_logger.close()
+
+    assert get_cache().lookup("runs:/run-1/xtrain/xtrain.csv") is None
+
+
+def test_batches_respect_the_combined_entity_limit():
+    """Test qu'un lot n'envoie jamais plus de 1000 métriques et paramètres ensemble."""
+    client = Mock()
+    run_logger = AsyncRunLogger("run-1", client=client)
+
+    for i in range(99):
+        run_logger.log_param(f"p{i}", i)
+    for i in range(1000):
+        run_logger.log_metric(f"m{i}", i)
+    run_logger.close()
+
+    sizes = [len(call.kwargs["metrics"]) + len(call.kwargs["params"]) for call in client.log_batch.call_args_list]
+    assert max(sizes) <= 1000 and sum(sizes) == 1099
+
+
+def test_sync_logger_forwards_step():
+    with patch("mlflow.log_metric") as mock_log_metric:
+        RunLogger().log_metric("loss", 0.5, step=3)
+
+    mock_log_metric.assert_called_once_with("loss", 0.5, step=3)